@@ -0,0 +1,73 @@
+"""
+Local benchmarks for the planetarium API.
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the
+project root and prints its results as a table.
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+PLACEHOLDER_ENV = {
+    "SECRET_KEY": "benchmark-secret-key",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_DB": "planetarium",
+    "POSTGRES_USER": "planetarium",
+    "POSTGRES_PASSWORD": "planetarium",
+}
+
+
+def profile_env(profile: str) -> dict:
+    """Environment for a child process running under ``profile``."""
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    env["DJANGO_SETTINGS_MODULE"] = "planetarium_api.settings"
+    env["DJANGO_PROFILE"] = profile
+    return env
+
+
+def setup_django(profile: str = "test") -> None:
+    """Configure Django in the current process under ``profile``."""
+    for key, value in profile_env(profile).items():
+        os.environ.setdefault(key, value)
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run against a fresh, migrated test database (in memory on SQLite)."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def timed(function, repeat: int) -> tuple:
+    """Median milliseconds of ``repeat`` calls and the size of the result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, len(result)
+
+
+def print_table(headers: list, rows: list) -> None:
+    widths = [
+        max(len(str(value)) for value in column)
+        for column in zip(headers, *rows)
+    ]
+    for row in [headers, *rows]:
+        print(
+            "  ".join(
+                str(value).rjust(width) for value, width in zip(row, widths)
+            )
+        )
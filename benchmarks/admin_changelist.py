@@ -0,0 +1,128 @@
+"""
+Admin change lists of tickets and show sessions as tickets pile up, with
+the registered admins (``list_select_related``) and with plain
+``ModelAdmin`` classes dereferencing foreign keys per row in ``__str__``.
+
+    python -m benchmarks.admin_changelist --tickets 1000 100000 1000000
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+from benchmarks import print_table, setup_django, test_database
+
+SEATS_PER_SESSION = 10_000
+
+
+def seed_tickets(reservation, sessions: list, start: int, stop: int) -> None:
+    from planetarium.models import Ticket
+
+    def tickets():
+        for index in range(start, stop):
+            session, seat = divmod(index, SEATS_PER_SESSION)
+            yield Ticket(
+                row=seat // 100 + 1,
+                seat=seat % 100 + 1,
+                show_session=sessions[session],
+                reservation=reservation,
+            )
+
+    Ticket.objects.bulk_create(tickets(), batch_size=5000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--tickets", type=int, nargs="+", default=[1000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib import admin
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import RequestFactory
+
+    from planetarium.models import (
+        AstronomyShow,
+        PlanetariumDome,
+        Reservation,
+        ShowSession,
+        Ticket,
+    )
+
+    admin.autodiscover()
+    plain_site = admin.AdminSite(name="plain")
+    plain_site.register(Ticket)
+    plain_site.register(ShowSession)
+    admins = (
+        ("registered", admin.site),
+        ("plain ModelAdmin", plain_site),
+    )
+
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with test_database():
+        user = get_user_model().objects.create_superuser(
+            email="benchmark@user.com", password="benchmark"
+        )
+        factory = RequestFactory()
+        dome = PlanetariumDome.objects.create(
+            name="Dome", rows=100, seats_in_row=100
+        )
+        reservation = Reservation.objects.create(user=user)
+        sessions = []
+        seeded = 0
+
+        rows = []
+        for tickets in sorted(args.tickets):
+            while len(sessions) * SEATS_PER_SESSION < tickets:
+                sessions.append(
+                    ShowSession.objects.create(
+                        astronomy_show=AstronomyShow.objects.create(
+                            title=f"Show {len(sessions)}",
+                            description="Show",
+                        ),
+                        planetarium_dome=dome,
+                        show_time=datetime.datetime(
+                            2030, 1, 1, tzinfo=datetime.timezone.utc
+                        )
+                        + datetime.timedelta(hours=len(sessions)),
+                    )
+                )
+            seed_tickets(reservation, sessions, seeded, tickets)
+            seeded = tickets
+
+            for name, site in admins:
+                for model in (Ticket, ShowSession):
+                    model_admin = site._registry[model]
+                    timings = []
+                    for _ in range(args.repeat):
+                        request = factory.get("/")
+                        request.user = user
+                        queries.clear()
+                        with connection.execute_wrapper(count_query):
+                            start = time.perf_counter()
+                            model_admin.changelist_view(request).render()
+                            timings.append(time.perf_counter() - start)
+                    rows.append(
+                        (
+                            tickets,
+                            model.__name__,
+                            name,
+                            len(queries),
+                            f"{statistics.median(timings) * 1000:.1f}",
+                        )
+                    )
+        print_table(["tickets", "change list", "admin", "queries", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Throughput of ``manage.py serve`` against ``manage.py runserver``.
+
+Both servers are started under the test profile on free local ports and
+loaded by a pool of client threads, each reusing one keep-alive
+connection.
+
+    python -m benchmarks.app_server --requests 5000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import print_table, profile_env
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            connection.request("GET", "/healthz")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def client(port: int, path: str, requests: int) -> list:
+    latencies = []
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path)
+            connection.getresponse().read()
+        except (http.client.HTTPException, OSError):
+            # runserver closes the connection after every response.
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    return latencies
+
+
+def run_load(port: int, path: str, requests: int, concurrency: int) -> tuple:
+    per_client = requests // concurrency
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(
+            pool.map(
+                lambda _: client(port, path, per_client), range(concurrency)
+            )
+        )
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for result in results for latency in result)
+    return (
+        len(latencies) / elapsed,
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99) - 1],
+    )
+
+
+def benchmark(name: str, command: list, args) -> tuple:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "manage.py", *command, f"127.0.0.1:{port}"],
+        env=profile_env("test"),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(port)
+        throughput, p50, p99 = run_load(
+            port, args.path, args.requests, args.concurrency
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    return (
+        name,
+        f"{throughput:.0f}",
+        f"{p50 * 1000:.2f}",
+        f"{p99 * 1000:.2f}",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    serve = ["serve"]
+    if args.workers:
+        serve += ["--workers", str(args.workers)]
+
+    rows = [
+        benchmark("runserver", ["runserver", "--noreload"], args),
+        benchmark("serve", serve + ["--bind"], args),
+    ]
+    print_table(("server", "req/s", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+A kiosk page load: the show, its sessions, the dome and the seat map,
+fetched with four JWT-authenticated requests or one /api/batch/ request.
+
+Requests go through the full middleware stack in process; ``--rtt-ms``
+adds the network round trip each request would pay.
+
+    python -m benchmarks.batch --rtt-ms 40
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup_django, test_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    with test_database():
+        from planetarium_api.tests import kiosk_paths, sample_kiosk_data
+
+        user = get_user_model().objects.create_user(
+            email="benchmark@user.com", password="benchmark"
+        )
+        paths = kiosk_paths(*sample_kiosk_data())
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+        def separate() -> None:
+            for path in paths:
+                assert client.get(path).status_code == 200
+
+        def batched() -> None:
+            response = client.post(
+                "/api/batch/",
+                {"requests": [{"path": path} for path in paths]},
+                format="json",
+            )
+            assert response.status_code == 200, response.content
+
+        rows = []
+        for name, load, round_trips in (
+            ("4 requests", separate, len(paths)),
+            ("1 batch", batched, 1),
+        ):
+            load()
+            timings = []
+            for _ in range(args.repeat):
+                # Reset the user throttle history.
+                cache.clear()
+                start = time.perf_counter()
+                load()
+                timings.append(time.perf_counter() - start)
+            server_ms = statistics.median(timings) * 1000
+            network_ms = round_trips * args.rtt_ms
+            rows.append(
+                (
+                    name,
+                    round_trips,
+                    f"{server_ms:.2f}",
+                    f"{network_ms:.0f}",
+                    f"{server_ms + network_ms:.2f}",
+                )
+            )
+        print_table(
+            ["page load", "round trips", "server ms", "network ms", "total"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Finding the best block of seats in a 5,000-seat dome at different
+occupancies, through ``seating.best_seats`` (query and scan) and through
+the ``/best_seats/`` endpoint.
+
+    python -m benchmarks.best_seats --rows 50 --seats-in-row 100
+"""
+
+import argparse
+import datetime
+import random
+
+from benchmarks import print_table, setup_django, test_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--seats-in-row", type=int, default=100)
+    parser.add_argument(
+        "--occupancy", type=float, nargs="+", default=[0, 0.5, 0.9]
+    )
+    parser.add_argument("--party-size", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from planetarium import seating
+    from planetarium.models import (
+        AstronomyShow,
+        PlanetariumDome,
+        Reservation,
+        ShowSession,
+        Ticket,
+    )
+
+    rng = random.Random(0)
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email="benchmark@user.com", password="benchmark"
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        show = AstronomyShow.objects.create(title="Show", description="Show")
+        dome = PlanetariumDome.objects.create(
+            name="Dome", rows=args.rows, seats_in_row=args.seats_in_row
+        )
+        seats = [
+            (row, seat)
+            for row in range(1, args.rows + 1)
+            for seat in range(1, args.seats_in_row + 1)
+        ]
+
+        rows = []
+        for occupancy in args.occupancy:
+            show_session = ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=datetime.datetime(
+                    2030, 1, 1, tzinfo=datetime.timezone.utc
+                ),
+            )
+            reservation = Reservation.objects.create(user=user)
+            Ticket.objects.bulk_create(
+                (
+                    Ticket(
+                        row=row,
+                        seat=seat,
+                        show_session=show_session,
+                        reservation=reservation,
+                    )
+                    for row, seat in rng.sample(
+                        seats, int(len(seats) * occupancy)
+                    )
+                ),
+                batch_size=5000,
+            )
+            show_session = ShowSession.objects.select_related(
+                "planetarium_dome"
+            ).get(pk=show_session.pk)
+            url = reverse(
+                "planetarium:showsession-best-seats", args=[show_session.pk]
+            )
+
+            def request() -> list:
+                # Reset the user throttle history.
+                cache.clear()
+                response = client.get(url, {"party_size": args.party_size})
+                assert response.status_code == 200, response.content
+                return response.data["seats"]
+
+            for name, function in (
+                (
+                    "best_seats",
+                    lambda: seating.best_seats(
+                        show_session, args.party_size, user=user
+                    ),
+                ),
+                ("GET /best_seats/", request),
+            ):
+                ms, found = timed(function, args.repeat)
+                rows.append((f"{occupancy:.0%}", name, found, f"{ms:.2f}"))
+        print_table(["occupancy", "method", "seats found", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cancelling a large group booking: deleting its tickets one at a time
+(the admin inline), ``Reservation.delete()`` cascading through the ORM
+with its per-ticket signals, and ``booking.cancel_reservation``.
+
+    python -m benchmarks.cancellation --tickets 100 1000 5000
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+from benchmarks import print_table, setup_django, test_database
+
+
+def seed_group_booking(user, show_session, tickets: int):
+    from planetarium.models import Reservation, Ticket
+
+    seats_in_row = show_session.planetarium_dome.seats_in_row
+    reservation = Reservation.objects.create(user=user)
+    Ticket.objects.bulk_create(
+        (
+            Ticket(
+                row=index // seats_in_row + 1,
+                seat=index % seats_in_row + 1,
+                show_session=show_session,
+                reservation=reservation,
+            )
+            for index in range(tickets)
+        ),
+        batch_size=5000,
+    )
+    return reservation
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--tickets", type=int, nargs="+", default=[100, 1000, 5000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from planetarium.booking import cancel_reservation
+    from planetarium.models import (
+        AstronomyShow,
+        PlanetariumDome,
+        ShowSession,
+    )
+
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def per_ticket(reservation) -> None:
+        for ticket in reservation.tickets.all():
+            ticket.delete()
+        reservation.delete()
+
+    methods = (
+        ("per ticket", per_ticket),
+        ("Reservation.delete()", lambda reservation: reservation.delete()),
+        ("cancel_reservation", cancel_reservation),
+    )
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email="benchmark@user.com", password="benchmark"
+        )
+        show_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="Show", description="Show"
+            ),
+            planetarium_dome=PlanetariumDome.objects.create(
+                name="Dome", rows=200, seats_in_row=100
+            ),
+            show_time=datetime.datetime(
+                2030, 1, 1, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+        rows = []
+        for tickets in args.tickets:
+            for name, cancel in methods:
+                timings = []
+                for _ in range(args.repeat):
+                    reservation = seed_group_booking(
+                        user, show_session, tickets
+                    )
+                    queries.clear()
+                    with connection.execute_wrapper(count_query):
+                        start = time.perf_counter()
+                        cancel(reservation)
+                        timings.append(time.perf_counter() - start)
+                rows.append(
+                    (
+                        tickets,
+                        name,
+                        len(queries),
+                        f"{statistics.median(timings) * 1000:.2f}",
+                    )
+                )
+        print_table(["tickets", "method", "queries", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
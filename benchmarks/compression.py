@@ -0,0 +1,99 @@
+"""
+Response size and latency of large API responses uncompressed, gzipped
+and brotli-compressed (if brotli is installed), with the time to send
+them over a link of ``--mbps`` megabits per second.
+
+Requests go through the full middleware stack in process. The calendar
+carries an ETag, so its compressed bytes come from the cache after the
+first request.
+
+    python -m benchmarks.compression --sessions 2000 --mbps 20
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup_django, test_database
+from benchmarks.search import seed as seed_shows
+from benchmarks.theme_filter import seed_sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--mbps", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    from planetarium.models import PlanetariumDome
+    from planetarium_api.middleware import brotli
+
+    no_throttling = override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_CLASSES": [],
+        }
+    )
+    with test_database(), no_throttling:
+        seed_shows(200, 20)
+        seed_sessions(args.sessions)
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="benchmark@user.com", password="benchmark"
+            )
+        )
+        dome = PlanetariumDome.objects.get()
+        paths = {
+            "session list": "/api/planetarium/show_sessions/",
+            "dome detail": f"/api/planetarium/planetarium_domes/{dome.id}/",
+            "calendar (cached)": (
+                "/api/planetarium/show_sessions/calendar/"
+                "?start=2024-01-01&end=2024-01-31"
+            ),
+        }
+        encodings = ["identity", "gzip"] + (["br"] if brotli else [])
+
+        rows = []
+        for name, path in paths.items():
+            for encoding in encodings:
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                    timings.append(time.perf_counter() - start)
+                size = len(response.content)
+                server_ms = statistics.median(timings) * 1000
+                transfer_ms = size * 8 / (args.mbps * 1e6) * 1000
+                rows.append(
+                    (
+                        name,
+                        response.get("Content-Encoding", "identity"),
+                        f"{size / 1024:.1f}",
+                        f"{server_ms:.2f}",
+                        f"{transfer_ms:.2f}",
+                        f"{server_ms + transfer_ms:.2f}",
+                    )
+                )
+        print_table(
+            [
+                "response",
+                "encoding",
+                "KiB",
+                "server ms",
+                "transfer ms",
+                "total",
+            ],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
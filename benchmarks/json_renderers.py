@@ -0,0 +1,99 @@
+"""
+Encoding time and peak memory of DRF's JSONRenderer against the
+orjson-backed renderer, on ``ReservationDetailSerializer`` and
+``ShowSessionDetailSerializer`` payloads.
+
+    python -m benchmarks.json_renderers --reservations 500
+"""
+
+import argparse
+import tracemalloc
+
+from benchmarks import print_table, setup_django, test_database, timed
+from benchmarks.list_serializers import seed_tickets
+from benchmarks.search import seed as seed_shows
+from benchmarks.theme_filter import seed_sessions
+
+
+def peak_memory(function) -> float:
+    """Peak memory in KiB allocated while ``function`` runs."""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reservations", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+
+    from planetarium.models import Reservation, ShowSession
+    from planetarium.serializers import (
+        ReservationDetailSerializer,
+        ShowSessionDetailSerializer,
+    )
+    from planetarium_api.renderers import ORJSONRenderer
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email="benchmark@user.com", password="benchmark"
+        )
+        seed_shows(100, 20)
+        seed_sessions(args.sessions)
+        seed_tickets(user, args.reservations * 4)
+
+        payloads = {
+            "reservations": ReservationDetailSerializer(
+                Reservation.objects.prefetch_related(
+                    "tickets__show_session__astronomy_show",
+                    "tickets__show_session__planetarium_dome",
+                )[: args.reservations],
+                many=True,
+            ).data,
+            "show_sessions": ShowSessionDetailSerializer(
+                ShowSession.objects.select_related(
+                    "astronomy_show", "planetarium_dome"
+                ).prefetch_related("tickets", "astronomy_show__show_theme"),
+                many=True,
+            ).data,
+        }
+
+        rows = []
+        for name, data in payloads.items():
+            renderers = {"json": JSONRenderer(), "orjson": ORJSONRenderer()}
+            outputs = {
+                key: renderer.render(data)
+                for key, renderer in renderers.items()
+            }
+            if outputs["json"] != outputs["orjson"]:
+                raise SystemExit(f"{name}: outputs differ")
+            for key, renderer in renderers.items():
+                ms, _ = timed(lambda: [renderer.render(data)], args.repeat)
+                peak = peak_memory(lambda: renderer.render(data))
+                rows.append(
+                    (
+                        name,
+                        key,
+                        f"{len(outputs[key]) / 1024:.0f}",
+                        f"{ms:.2f}",
+                        f"{peak:.0f}",
+                    )
+                )
+        print_table(
+            ["payload", "renderer", "KiB", "ms", "peak KiB"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Rows per second of the session and ticket lists: DRF serializers against
+the ``.values()`` based serializers of ``planetarium.fast_serializers``.
+
+Both paths run the viewset's own list queryset, include the query, and
+must render to identical JSON.
+
+    python -m benchmarks.list_serializers --rows 10000
+"""
+
+import argparse
+import random
+
+from benchmarks import print_table, setup_django, test_database, timed
+from benchmarks.search import seed as seed_shows
+from benchmarks.theme_filter import seed_sessions
+
+
+def seed_tickets(user, tickets: int) -> None:
+    from planetarium.models import Reservation, ShowSession, Ticket
+
+    rng = random.Random(0)
+    session_ids = list(ShowSession.objects.values_list("id", flat=True))
+    reservations = Reservation.objects.bulk_create(
+        Reservation(user=user) for _ in range(tickets // 4)
+    )
+    seats = set()
+    while len(seats) < tickets:
+        seats.add(
+            (rng.choice(session_ids), rng.randint(1, 10), rng.randint(1, 20))
+        )
+    Ticket.objects.bulk_create(
+        (
+            Ticket(
+                show_session_id=session_id,
+                row=row,
+                seat=seat,
+                reservation=reservations[index % len(reservations)],
+            )
+            for index, (session_id, row, seat) in enumerate(sorted(seats))
+        ),
+        batch_size=5000,
+    )
+
+
+def list_view(viewset_class, user):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    request = Request(APIRequestFactory().get("/"))
+    request.user = user
+    return viewset_class(
+        request=request, action="list", format_kwarg=None, kwargs={}
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+
+    from planetarium.views import ShowSessionViewSet, TicketViewSet
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email="benchmark@user.com", password="benchmark"
+        )
+        seed_shows(1000, 50)
+        seed_sessions(args.rows)
+        seed_tickets(user, args.rows)
+
+        rows = []
+        for name, viewset_class in (
+            ("show_sessions", ShowSessionViewSet),
+            ("tickets", TicketViewSet),
+        ):
+            view = list_view(viewset_class, user)
+
+            def drf() -> list:
+                queryset = view.get_queryset()
+                return view.get_serializer(queryset, many=True).data
+
+            def values() -> list:
+                serializer = view.get_values_serializer()
+                return serializer.serialize(view.get_queryset())
+
+            renderer = JSONRenderer()
+            if renderer.render(drf()) != renderer.render(values()):
+                raise SystemExit(f"{name}: outputs differ")
+
+            drf_ms, count = timed(drf, args.repeat)
+            values_ms, _ = timed(values, args.repeat)
+            rows.append(
+                (
+                    name,
+                    count,
+                    f"{count / drf_ms * 1000:,.0f}",
+                    f"{count / values_ms * 1000:,.0f}",
+                    f"{drf_ms / values_ms:.1f}x",
+                )
+            )
+        print_table(
+            ["list", "rows", "drf rows/s", "values rows/s", "speedup"], rows
+        )
+
+
+if __name__ == "__main__":
+    main()
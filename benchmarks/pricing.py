@@ -0,0 +1,105 @@
+"""
+Pricing every seat of a large dome: evaluating the price rules (tier,
+session modifier, surge) seat by seat against a lookup in the cached
+price table of ``planetarium.pricing``.
+
+    python -m benchmarks.pricing --rows 40 --seats-in-row 50
+"""
+
+import argparse
+import datetime
+from decimal import Decimal
+
+from benchmarks import print_table, setup_django, test_database, timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--seats-in-row", type=int, default=50)
+    parser.add_argument("--tiers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from planetarium import pricing
+    from planetarium.models import (
+        AstronomyShow,
+        PlanetariumDome,
+        PriceTier,
+        ShowSession,
+        Ticket,
+    )
+
+    with test_database():
+        dome = PlanetariumDome.objects.create(
+            name="Dome", rows=args.rows, seats_in_row=args.seats_in_row
+        )
+        rows_per_tier = max(args.rows // args.tiers, 1)
+        PriceTier.objects.bulk_create(
+            PriceTier(
+                planetarium_dome=dome,
+                first_row=first_row,
+                last_row=min(first_row + rows_per_tier - 1, args.rows),
+                price=Decimal(30) - tier,
+            )
+            for tier, first_row in enumerate(
+                range(1, args.rows + 1, rows_per_tier)
+            )
+        )
+        show_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="Show", description="Show"
+            ),
+            planetarium_dome=dome,
+            show_time=datetime.datetime(
+                2030, 1, 1, tzinfo=datetime.timezone.utc
+            ),
+            price_modifier=Decimal("1.20"),
+        )
+        show_session.refresh_from_db()
+        seats = [
+            Ticket(row=row, seat=seat, show_session=show_session)
+            for row in range(1, args.rows + 1)
+            for seat in range(1, args.seats_in_row + 1)
+        ]
+
+        def per_seat_rules() -> list:
+            tiers = list(dome.price_tiers.all())
+            multiplier = pricing.surge(
+                pricing.sold_tickets([show_session.pk]).get(
+                    show_session.pk, 0
+                ),
+                dome.capacity,
+            )
+            for ticket in seats:
+                price = Decimal(settings.DEFAULT_TICKET_PRICE)
+                for tier in tiers:
+                    if tier.first_row <= ticket.row <= tier.last_row:
+                        price = tier.price
+                ticket.price = (
+                    price * show_session.price_modifier * multiplier
+                ).quantize(pricing.CENT)
+            return seats
+
+        def price_table() -> list:
+            pricing.price_tickets(seats)
+            return seats
+
+        reference = [ticket.price for ticket in per_seat_rules()]
+        assert [ticket.price for ticket in price_table()] == reference
+
+        rows = []
+        for name, function in (
+            ("per-seat rules", per_seat_rules),
+            ("price table", price_table),
+        ):
+            ms, priced = timed(function, args.repeat)
+            rows.append((name, priced, f"{ms:.2f}"))
+        print_table(["method", "seats", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Latency of show search against a plain ``icontains`` scan.
+
+Seeds a test database with generated shows and themes, then times the
+``/astronomy_shows/search/`` lookup (the in-memory index on SQLite, the
+GIN-indexed search vector on PostgreSQL) and the same lookup done with
+``icontains`` filters for a few queries.
+
+    python -m benchmarks.search --shows 100000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import print_table, setup_django, test_database, timed
+
+WORDS = (
+    "black hole nebula galaxy comet aurora eclipse pulsar quasar orbit "
+    "meteor supernova constellation planet moon saturn jupiter mars venus "
+    "telescope cosmic star dust light gravity wave voyage journey dark "
+    "matter energy universe horizon"
+).split()
+QUERIES = ("nebula", "black hol", "sup", "saturn moon", "cosmic voyage star")
+
+
+def vocabulary(rng: random.Random, size: int) -> list:
+    """Made up words, drawn with a long tail like real descriptions."""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choices(letters, k=rng.randint(4, 10)))
+        for _ in range(size)
+    ]
+
+
+def seed(shows: int, themes: int) -> None:
+    from planetarium.models import AstronomyShow, ShowTheme
+    from planetarium.search import update_search_vectors
+
+    rng = random.Random(0)
+    words = vocabulary(rng, 20_000)
+    ShowTheme.objects.bulk_create(
+        ShowTheme(name=f"{rng.choice(WORDS)} {index}")
+        for index in range(themes)
+    )
+    theme_ids = list(ShowTheme.objects.values_list("id", flat=True))
+    AstronomyShow.objects.bulk_create(
+        (
+            AstronomyShow(
+                title=" ".join([rng.choice(WORDS), *rng.choices(words, k=2)]),
+                description=" ".join(
+                    rng.choices(WORDS, k=3) + rng.choices(words, k=17)
+                ),
+            )
+            for _ in range(shows)
+        ),
+        batch_size=5000,
+    )
+    Link = AstronomyShow.show_theme.through
+    Link.objects.bulk_create(
+        (
+            Link(astronomyshow_id=show_id, showtheme_id=theme_id)
+            for show_id in AstronomyShow.objects.values_list("id", flat=True)
+            for theme_id in rng.sample(theme_ids, 2)
+        ),
+        batch_size=5000,
+    )
+    update_search_vectors()
+
+
+def scan(query: str, limit: int) -> list:
+    """The same lookup without an index: every word in title or text."""
+    from django.db.models import Q
+
+    from planetarium.models import AstronomyShow
+
+    shows = AstronomyShow.objects.all()
+    for word in query.split():
+        shows = shows.filter(
+            Q(title__icontains=word)
+            | Q(description__icontains=word)
+            | Q(show_theme__name__icontains=word)
+        )
+    return list(
+        shows.distinct()
+        .order_by("title")
+        .prefetch_related("show_theme")[:limit]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shows", type=int, default=100_000)
+    parser.add_argument("--themes", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from planetarium.search import get_index, search_shows
+
+    with test_database():
+        start = time.perf_counter()
+        seed(args.shows, args.themes)
+        print(
+            f"Seeded {args.shows} shows in {time.perf_counter() - start:.1f} s"
+        )
+
+        start = time.perf_counter()
+        get_index()
+        print(f"Built index in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        rows = []
+        for query in QUERIES:
+            search_ms, found = timed(
+                lambda: search_shows(query, args.limit), args.repeat
+            )
+            scan_ms, _ = timed(lambda: scan(query, args.limit), args.repeat)
+            rows.append((query, found, f"{search_ms:.2f}", f"{scan_ms:.2f}"))
+        print_table(["query", "results", "search ms", "icontains ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
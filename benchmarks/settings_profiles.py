@@ -0,0 +1,103 @@
+"""
+Compare the dev, test and prod settings profiles.
+
+Startup time is the wall time of a fresh interpreter importing
+``planetarium_api.wsgi``. Per-request overhead is measured in-process
+with the test client on a path that resolves to no view, so only the
+middleware stack and URL resolver run.
+
+    python -m benchmarks.settings_profiles --runs 5 --requests 2000
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import print_table, profile_env, setup_django
+
+PROFILES = ("dev", "test", "prod")
+
+STARTUP_SCRIPT = (
+    "import time; start = time.perf_counter(); "
+    "import planetarium_api.wsgi; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_startup(profile: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            env=profile_env(profile),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def measure_requests(profile: str, requests: int) -> float:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.settings_profiles",
+            "--worker",
+            profile,
+            "--requests",
+            str(requests),
+        ],
+        env=profile_env(profile),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)["per_request"]
+
+
+def run_worker(profile: str, requests: int) -> None:
+    setup_django(profile)
+
+    from django.test import Client
+
+    client = Client(HTTP_HOST="127.0.0.1", REMOTE_ADDR="127.0.0.1")
+    path = "/__benchmark__/"
+    for _ in range(min(requests, 100)):
+        client.get(path)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({"per_request": elapsed / requests}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--worker", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.requests)
+        return
+
+    rows = []
+    for profile in PROFILES:
+        startup = measure_startup(profile, args.runs)
+        per_request = measure_requests(profile, args.requests)
+        rows.append(
+            (profile, f"{startup * 1000:.1f}", f"{per_request * 1e6:.1f}")
+        )
+    print_table(("profile", "startup ms", "request us"), rows)
+
+
+if __name__ == "__main__":
+    main()
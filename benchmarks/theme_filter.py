@@ -0,0 +1,149 @@
+"""
+Filtering shows and sessions by theme without joining through the M2M.
+
+Seeds a test database with generated shows, themes and sessions, then
+times filtering by a few themes as an IN subquery (what the API does),
+a correlated EXISTS and a DISTINCT join, and the theme facets computed
+uncached, cached, and with one count query per theme.
+
+    python -m benchmarks.theme_filter --shows 20000 --sessions 100000
+"""
+
+import argparse
+import datetime
+import random
+
+from benchmarks import print_table, setup_django, test_database, timed
+from benchmarks.search import seed as seed_shows
+
+
+def seed_sessions(sessions: int) -> None:
+    from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+
+    rng = random.Random(0)
+    dome = PlanetariumDome.objects.create(
+        name="Dome", rows=10, seats_in_row=20
+    )
+    show_ids = list(AstronomyShow.objects.values_list("id", flat=True))
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    ShowSession.objects.bulk_create(
+        (
+            ShowSession(
+                astronomy_show_id=rng.choice(show_ids),
+                planetarium_dome=dome,
+                show_time=start + datetime.timedelta(hours=index),
+            )
+            for index in range(sessions)
+        ),
+        batch_size=5000,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shows", type=int, default=20_000)
+    parser.add_argument("--themes", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Count, Exists, OuterRef
+
+    from planetarium import cache
+    from planetarium.models import AstronomyShow, ShowSession, ShowTheme
+    from planetarium.views import filter_by_themes
+
+    with test_database():
+        seed_shows(args.shows, args.themes)
+        seed_sessions(args.sessions)
+        theme_ids = list(ShowTheme.objects.values_list("id", flat=True)[:3])
+
+        def ids(queryset) -> list:
+            return list(queryset.values_list("id", flat=True))
+
+        def exists(queryset, show_ref: str = "pk"):
+            return queryset.filter(
+                Exists(
+                    AstronomyShow.show_theme.through.objects.filter(
+                        showtheme_id__in=theme_ids,
+                        astronomyshow_id=OuterRef(show_ref),
+                    )
+                )
+            )
+
+        cases = {
+            "shows": (
+                lambda: ids(
+                    filter_by_themes(AstronomyShow.objects, theme_ids)
+                ),
+                lambda: ids(exists(AstronomyShow.objects)),
+                lambda: ids(
+                    AstronomyShow.objects.filter(
+                        show_theme__id__in=theme_ids
+                    ).distinct()
+                ),
+            ),
+            "sessions": (
+                lambda: ids(
+                    filter_by_themes(
+                        ShowSession.objects,
+                        theme_ids,
+                        show_field="astronomy_show_id",
+                    )
+                ),
+                lambda: ids(
+                    exists(ShowSession.objects, show_ref="astronomy_show_id")
+                ),
+                lambda: ids(
+                    ShowSession.objects.filter(
+                        astronomy_show__show_theme__id__in=theme_ids
+                    ).distinct()
+                ),
+            ),
+        }
+        rows = []
+        for name, functions in cases.items():
+            timings = [timed(function, args.repeat) for function in functions]
+            rows.append(
+                (name, timings[0][1], *(f"{ms:.2f}" for ms, _ in timings))
+            )
+        print_table(
+            ["filter", "rows", "in subquery ms", "exists ms", "join ms"],
+            rows,
+        )
+        print()
+
+        def grouped() -> list:
+            return list(
+                ShowTheme.objects.annotate(
+                    show_count=Count("astronomy_shows")
+                ).values("id", "name", "show_count")
+            )
+
+        def per_theme() -> list:
+            return [
+                (theme.id, theme.name, theme.astronomy_shows.count())
+                for theme in ShowTheme.objects.all()
+            ]
+
+        cache.cached(cache.THEME_FACETS, "all", grouped)
+        rows = [
+            ("query per theme", *timed(per_theme, args.repeat)),
+            ("grouped query", *timed(grouped, args.repeat)),
+            (
+                "cached",
+                *timed(
+                    lambda: cache.cached(cache.THEME_FACETS, "all", grouped),
+                    args.repeat,
+                ),
+            ),
+        ]
+        print_table(
+            ["facets", "ms", "themes"],
+            [(name, f"{ms:.2f}", found) for name, ms, found in rows],
+        )
+
+
+if __name__ == "__main__":
+    main()
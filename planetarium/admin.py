@@ -1,27 +1,172 @@
 from django.contrib import admin
+from django.db import transaction
 
+from planetarium import cache
+from planetarium.booking import cancel_tickets
 from planetarium.models import (
     AstronomyShow,
     ShowTheme,
     ShowSession,
     PlanetariumDome,
+    PriceTier,
+    SeatHold,
     Ticket,
     Reservation,
+    WaitlistEntry,
 )
+from planetarium.pagination import EstimatedCountPaginator
 
 
-class TicketInline(admin.TabularInline):
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin of a table with millions of rows: the change list is counted
+    once, from the planner's estimate when possible, and the default
+    delete action, which lists and deletes the objects one by one, is
+    replaced by actions running a single statement.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_actions(self, request) -> dict:
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+
+class SessionDomeMixin:
+    """Load the dome with the session, ``Ticket.clean`` reads it."""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "show_session":
+            kwargs["queryset"] = ShowSession.objects.select_related(
+                "planetarium_dome"
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class TicketInline(SessionDomeMixin, admin.TabularInline):
     model = Ticket
     extra = 1
+    # A select of every session renders ShowSession.__str__ per option.
+    autocomplete_fields = ("show_session",)
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(LargeTableAdmin):
     inlines = (TicketInline,)
+    list_display = ("__str__", "created_at")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    search_fields = ("=id", "user__email")
+    date_hierarchy = "created_at"
+    actions = ("cancel_reservations",)
+
+    def get_queryset(self, request):
+        # Autocomplete results are rendered with Reservation.__str__.
+        return super().get_queryset(request).select_related("user")
+
+    @admin.action(description="Cancel selected reservations")
+    def cancel_reservations(self, request, queryset) -> None:
+        with transaction.atomic():
+            count = queryset.count()
+            # The tickets are deleted by the cascade from the reservations.
+            seats = cancel_tickets(
+                Ticket.objects.filter(reservation__in=queryset), queryset
+            )
+            if not seats:
+                queryset.delete()
+        self.message_user(
+            request,
+            f"Cancelled {count} reservations, "
+            f"released {sum(seats.values())} seats.",
+        )
+
+    def delete_model(self, request, obj) -> None:
+        with transaction.atomic():
+            cancel_tickets(Ticket.objects.filter(reservation=obj))
+            obj.delete()
+
+
+class PriceTierInline(admin.TabularInline):
+    model = PriceTier
+    extra = 1
+
+
+@admin.register(PlanetariumDome)
+class PlanetariumDomeAdmin(admin.ModelAdmin):
+    inlines = (PriceTierInline,)
+    readonly_fields = ("capacity",)
+    search_fields = ("name",)
+
+
+@admin.register(AstronomyShow)
+class AstronomyShowAdmin(admin.ModelAdmin):
+    search_fields = ("title",)
+
+
+@admin.register(ShowSession)
+class ShowSessionAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "show_time", "price_modifier")
+    list_select_related = ("astronomy_show", "planetarium_dome")
+    autocomplete_fields = ("astronomy_show", "planetarium_dome")
+    search_fields = ("astronomy_show__title", "planetarium_dome__name")
+    date_hierarchy = "show_time"
+    ordering = ("-show_time",)
+    actions = ("reset_price_modifier",)
+
+    def get_queryset(self, request):
+        # Autocomplete results are rendered with ShowSession.__str__.
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("astronomy_show", "planetarium_dome")
+        )
+
+    @admin.action(description="Reset price modifier of selected sessions")
+    def reset_price_modifier(self, request, queryset) -> None:
+        count = queryset.update(price_modifier=1)
+        cache.invalidate(cache.PRICE_TABLES)
+        self.message_user(request, f"Reset prices of {count} sessions.")
+
+
+@admin.register(Ticket)
+class TicketAdmin(SessionDomeMixin, LargeTableAdmin):
+    list_display = ("__str__", "price")
+    list_select_related = ("show_session__astronomy_show",)
+    autocomplete_fields = ("show_session", "reservation")
+    actions = ("cancel_selected_tickets",)
+
+    @admin.action(description="Cancel selected tickets")
+    def cancel_selected_tickets(self, request, queryset) -> None:
+        with transaction.atomic():
+            reservation_ids = list(
+                queryset.order_by()
+                .values_list("reservation", flat=True)
+                .distinct()
+            )
+            seats = cancel_tickets(queryset)
+            # Reservations left without tickets are cancelled as well.
+            Reservation.objects.filter(
+                pk__in=reservation_ids, tickets__isnull=True
+            ).delete()
+        self.message_user(request, f"Cancelled {sum(seats.values())} tickets.")
+
+    def delete_model(self, request, obj) -> None:
+        # Tickets send no post_delete signal, see planetarium.signals.
+        cancel_tickets(Ticket.objects.filter(pk=obj.pk))
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_select_related = ("user",)
+    autocomplete_fields = ("show_session", "user")
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_select_related = ("user",)
+    autocomplete_fields = ("show_session", "user")
 
 
-admin.site.register(AstronomyShow)
 admin.site.register(ShowTheme)
-admin.site.register(ShowSession)
-admin.site.register(PlanetariumDome)
-admin.site.register(Ticket)
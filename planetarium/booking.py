@@ -0,0 +1,103 @@
+"""Ticket purchases and cancellations."""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, QuerySet
+from django.dispatch import Signal
+from rest_framework.exceptions import ValidationError
+
+from planetarium.models import Reservation, Ticket
+from planetarium.pricing import price_tickets
+from planetarium.schedule import invalidate_calendar
+from planetarium.seating import check_holds, lock_sessions, release_holds
+from planetarium_api import metrics
+
+# Sent after tickets are cancelled, with ``seats``: a dict of released
+# seats by show session id.
+seats_released = Signal()
+
+
+def create_reservation(user, tickets_data: list) -> Reservation:
+    """
+    Create a reservation of ``user`` with the validated ``tickets_data``
+    in one transaction: the sessions are locked, holds checked and the
+    tickets priced, then one insert for the reservation and one for all of
+    its tickets, and the user's holds on the bought seats are released.
+    The created tickets are kept in ``reservation.created_tickets`` and
+    their sum in ``reservation.total_price``.
+    """
+    tickets = [Ticket(**ticket_data) for ticket_data in tickets_data]
+    with transaction.atomic():
+        # Purchases and holds of the same sessions wait for each other
+        # here, so each is checked and priced from what the previous one
+        # left.
+        lock_sessions({ticket.show_session_id for ticket in tickets})
+        own_holds = check_holds(user, tickets)
+        price_tickets(tickets)
+        reservation = Reservation.objects.create(user=user)
+        for ticket in tickets:
+            ticket.reservation = reservation
+        try:
+            reservation.created_tickets = Ticket.objects.bulk_create(tickets)
+        except IntegrityError:
+            # Sold since the tickets were validated.
+            raise ValidationError(
+                {"non_field_errors": ["This seat is already taken."]},
+                code="unique",
+            )
+        release_holds(own_holds)
+    reservation.total_price = sum(ticket.price for ticket in tickets)
+    # bulk_create sends no post_save signals.
+    invalidate_calendar(ticket.show_session.show_time for ticket in tickets)
+    return reservation
+
+
+def cancel_tickets(tickets: QuerySet, delete: QuerySet = None) -> dict:
+    """
+    Delete ``tickets`` with a single DELETE statement and return the
+    released seats by show session id. With ``delete``, the objects whose
+    deletion cascades to the tickets are deleted instead.
+
+    Tickets are not loaded and no ``post_delete`` signal is sent per
+    ticket; ``seats_released`` is sent once for all of them instead, when
+    the transaction commits.
+    """
+    with transaction.atomic():
+        seats = dict(
+            tickets.order_by()
+            .values("show_session")
+            .annotate(seats=Count("id"))
+            .values_list("show_session", "seats")
+        )
+        if seats:
+            # Ticket has no delete signals or dependent rows, so Django
+            # deletes them without fetching them first.
+            (tickets if delete is None else delete).delete()
+            transaction.on_commit(lambda: send_seats_released(seats))
+    return seats
+
+
+def send_seats_released(seats: dict) -> None:
+    metrics.inc("tickets_cancelled_total", sum(seats.values()))
+    seats_released.send(sender=Ticket, seats=seats)
+
+
+def cancel_reservation(reservation: Reservation, ticket_ids=None) -> dict:
+    """
+    Cancel the tickets of ``reservation`` with the given ids, or all of
+    them, and delete the reservation once it has no tickets left.
+    """
+    # Not the related manager, its results may be prefetched.
+    tickets = Ticket.objects.filter(reservation=reservation)
+    with transaction.atomic():
+        if ticket_ids is None:
+            # The tickets are deleted by the cascade from the reservation.
+            seats = cancel_tickets(
+                tickets, Reservation.objects.filter(pk=reservation.pk)
+            )
+            if not seats:
+                reservation.delete()
+        else:
+            seats = cancel_tickets(tickets.filter(pk__in=ticket_ids))
+            if not tickets.exists():
+                reservation.delete()
+    return seats
@@ -0,0 +1,111 @@
+"""
+Cached API results under versioned keys.
+
+Each cached result belongs to a namespace whose version is part of its
+key, so ``invalidate(namespace)`` drops every result of the namespace at
+once without knowing their keys. A result may also depend on parts of a
+namespace (the days of the session calendar) with versions of their
+own, so ``invalidate_parts`` only drops the results covering them. With
+the default per-process cache, other workers see a change after
+``PLANETARIUM_CACHE_TIMEOUT`` at most.
+"""
+
+import hashlib
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from planetarium_api import metrics
+
+THEME_FACETS = "theme_facets"
+SESSION_CALENDAR = "session_calendar"
+PRICE_TABLES = "price_tables"
+
+# Result of cached_with_etag when the client already has the result.
+NOT_MODIFIED = object()
+
+
+def version_key(namespace: str) -> str:
+    return f"planetarium:{namespace}:version"
+
+
+def get_version(namespace: str):
+    return cache.get_or_set(version_key(namespace), time.time_ns, None)
+
+
+def invalidate(namespace: str) -> None:
+    cache.set(version_key(namespace), time.time_ns(), timeout=None)
+
+
+def part_version_key(namespace: str, part: str) -> str:
+    return f"planetarium:{namespace}:{part}:version"
+
+
+def get_part_versions(namespace: str, parts) -> list:
+    keys = [part_version_key(namespace, part) for part in parts]
+    versions = cache.get_many(keys)
+    # A missing version is never read as an old one, it starts anew.
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_parts(namespace: str, parts) -> None:
+    version = time.time_ns()
+    cache.set_many(
+        {part_version_key(namespace, part): version for part in parts},
+        timeout=None,
+    )
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header with ``etag``; compressed
+    responses carry the weak form of the ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.removeprefix("W/") == etag for tag in parse_etags(if_none_match)
+    )
+
+
+def cached_with_etag(
+    namespace: str, key: str, compute: Callable, parts=(), if_none_match=None
+) -> tuple:
+    """
+    The cached ``compute()`` result for ``key`` in ``namespace`` and an
+    ETag that changes with the versions of the namespace and ``parts``.
+    The result is ``NOT_MODIFIED`` when ``if_none_match`` has the ETag.
+    """
+    full_key = f"planetarium:{namespace}:{get_version(namespace)}:{key}"
+    if parts:
+        digest = hashlib.md5(
+            ":".join(map(str, get_part_versions(namespace, parts))).encode()
+        ).hexdigest()
+        full_key = f"{full_key}:{digest}"
+    etag = f'"{hashlib.md5(full_key.encode()).hexdigest()}"'
+    if etag_matches(if_none_match, etag):
+        metrics.inc("cache_requests_total", cache=namespace, result="hit")
+        return NOT_MODIFIED, etag
+
+    value = cache.get(full_key)
+    if value is None:
+        metrics.inc("cache_requests_total", cache=namespace, result="miss")
+        value = compute()
+        cache.set(full_key, value, settings.PLANETARIUM_CACHE_TIMEOUT)
+    else:
+        metrics.inc("cache_requests_total", cache=namespace, result="hit")
+    return value, etag
+
+
+def cached(namespace: str, key: str, compute: Callable, parts=()):
+    """Return the cached ``compute()`` result for ``key`` in ``namespace``."""
+    return cached_with_etag(namespace, key, compute, parts)[0]
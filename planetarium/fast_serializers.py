@@ -0,0 +1,115 @@
+"""
+Read-only list serialization straight from ``.values()`` rows.
+
+A ``ValuesSerializer`` mirrors a DRF list serializer: each of its output
+fields is read from one ``.values()`` lookup and converted by the DRF
+field only when the field changes the value (dates and times), so the
+output is identical to the DRF serializer's without building model
+instances or bound fields per row.
+"""
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from planetarium.fieldsets import requested
+from planetarium.serializers import (
+    ShowSessionListSerializer,
+    TicketListSerializer,
+)
+
+# Fields whose representation of a database value is the value itself.
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.SlugRelatedField,
+    serializers.StringRelatedField,
+)
+
+
+class ValuesSerializer:
+    serializer_class = None
+    # Output field -> ``.values()`` lookup, in output order.
+    lookups = {}
+
+    def __init__(self, field_names=None) -> None:
+        fields = self.serializer_class().fields
+        self.getters = []
+        for name, lookup in self.lookups.items():
+            if field_names is not None and name not in field_names:
+                continue
+            field = fields[name]
+            if isinstance(field, PASSTHROUGH_FIELDS):
+                convert = None
+            else:
+                convert = field.to_representation
+            self.getters.append((name, lookup, convert))
+
+    def serialize(self, queryset) -> list:
+        lookups = [lookup for _, lookup, _ in self.getters]
+        converters = [
+            (name, convert)
+            for name, _, convert in self.getters
+            if convert is not None
+        ]
+        names = [name for name, _, _ in self.getters]
+        data = []
+        for row in queryset.values_list(*lookups):
+            item = dict(zip(names, row))
+            for name, convert in converters:
+                if item[name] is not None:
+                    item[name] = convert(item[name])
+            data.append(item)
+        return data
+
+
+class ShowSessionValuesSerializer(ValuesSerializer):
+    serializer_class = ShowSessionListSerializer
+    lookups = {
+        "id": "id",
+        "astronomy_show": "astronomy_show__title",
+        # PlanetariumDome.__str__ is its name.
+        "planetarium_dome": "planetarium_dome__name",
+        "show_time": "show_time",
+        "tickets_left": "tickets_left",
+    }
+
+
+class TicketValuesSerializer(ValuesSerializer):
+    serializer_class = TicketListSerializer
+    lookups = {
+        "id": "id",
+        "row": "row",
+        "seat": "seat",
+        "price": "price",
+        "astronomy_show": "show_session__astronomy_show__title",
+        "planetarium_dome": "show_session__planetarium_dome__name",
+        "created_at": "reservation__created_at",
+    }
+
+
+class ValuesListMixin:
+    """
+    Viewset serving ``list`` with ``values_serializer_class`` whenever it
+    can produce the same response as the list serializer.
+    """
+
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        serializer_class = self.values_serializer_class
+        if (
+            serializer_class is None
+            or self.get_serializer_class()
+            is not serializer_class.serializer_class
+            or self.paginator is not None
+            or requested(self.request, "expand")
+        ):
+            return None
+        return serializer_class(requested(self.request, "fields"))
+
+    def list(self, request, *args, **kwargs) -> Response:
+        serializer = self.get_values_serializer()
+        if serializer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(serializer.serialize(queryset))
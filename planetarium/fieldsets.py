@@ -0,0 +1,140 @@
+"""
+Sparse fieldsets and field expansion.
+
+``?fields=id,title`` limits a response to the listed fields and
+``?expand=show_theme`` replaces related fields by the nested serializers
+listed in the serializer's ``expandable_fields``. Viewsets then load only
+the relations that the remaining fields read.
+"""
+
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested(request, param: str):
+    """Names listed in a comma separated query parameter, or None."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return frozenset(name.strip() for name in value.split(",") if name.strip())
+
+
+class SparseFieldsMixin:
+    """Serializer honouring ``?fields=`` and ``?expand=`` of its request."""
+
+    # Field name -> (serializer class, keyword arguments).
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        self.sparse_fields = requested(request, "fields")
+        self.expanded_fields = requested(request, "expand") or frozenset()
+
+    def get_fields(self) -> dict:
+        fields = super().get_fields()
+        for name in self.expanded_fields & fields.keys():
+            if name in self.expandable_fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(**kwargs)
+        if self.sparse_fields is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in self.sparse_fields
+            }
+        return fields
+
+
+def relation_path(model, source: str) -> tuple:
+    """Related fields that ``source`` follows from ``model``."""
+    path = []
+    for attr in source.split("."):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        path.append(field)
+        model = field.related_model
+    return tuple(path)
+
+
+def related_paths(serializer, prefix: str = "", many: bool = False) -> tuple:
+    """
+    ``(select_related, prefetch_related)`` lookups read by the fields of
+    a model serializer. Relations below a to-many relation are prefetched.
+    """
+    select, prefetch = set(), set()
+    model = serializer.Meta.model
+    for field in serializer.fields.values():
+        if field.source == "*":
+            continue
+        path = relation_path(model, field.source)
+        if not path:
+            continue
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Read from the foreign key column itself.
+            path = path[:-1]
+            if not path:
+                continue
+        lookup = prefix + "__".join(relation.name for relation in path)
+        to_many = many or any(
+            relation.many_to_many or relation.one_to_many for relation in path
+        )
+        (prefetch if to_many else select).add(lookup)
+
+        nested = getattr(field, "child", field)
+        if isinstance(nested, serializers.ModelSerializer):
+            nested_select, nested_prefetch = related_paths(
+                nested, lookup + "__", to_many
+            )
+            select |= nested_select
+            prefetch |= nested_prefetch
+    # Keep only the longest lookups, they load their prefixes as well.
+    return (
+        {
+            path
+            for path in select
+            if not any(other.startswith(path + "__") for other in select)
+        },
+        {
+            path
+            for path in prefetch
+            if not any(other.startswith(path + "__") for other in prefetch)
+        },
+    )
+
+
+@lru_cache(maxsize=256)
+def cached_related_paths(serializer_class, fields, expand) -> tuple:
+    serializer = serializer_class()
+    serializer.sparse_fields = fields
+    serializer.expanded_fields = expand or frozenset()
+    return related_paths(serializer)
+
+
+class SparseFieldsViewSetMixin:
+    """Viewset loading only the relations its response fields read."""
+
+    def optimize_queryset(self, queryset: QuerySet) -> QuerySet:
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, serializers.ModelSerializer):
+            return queryset
+        select, prefetch = cached_related_paths(
+            serializer_class,
+            requested(self.request, "fields"),
+            requested(self.request, "expand"),
+        )
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
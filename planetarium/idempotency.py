@@ -0,0 +1,156 @@
+"""
+``Idempotency-Key`` support for POST requests that create objects.
+
+A key is stored in the ``IdempotencyKey`` table, unique per user, before
+the create runs, so concurrent requests with the same key on any worker
+are told apart by the database: only the first one creates, the others
+get 409 Conflict while it runs. Its successful response is stored with a
+fingerprint of the request body for ``IDEMPOTENCY_KEY_TTL`` seconds. A
+retry with the same key and body gets the stored response back without
+running the create again; the same key with another body is rejected.
+A failed request releases its key.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from planetarium.models import IdempotencyKey
+from planetarium_api import metrics
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name=IDEMPOTENCY_HEADER,
+    type=str,
+    location=OpenApiParameter.HEADER,
+    description=(
+        "Unique key of the request. Retries with the same key get the "
+        "first response back instead of creating again."
+    ),
+)
+
+
+def fingerprint(request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{request.method} {request.path}\n{body}".encode()
+    ).hexdigest()
+
+
+def replay(stored: IdempotencyKey) -> Response:
+    response = Response(stored.response, status=stored.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def live_keys(user):
+    """Keys of ``user`` within their TTL, without those of dead requests."""
+    now = timezone.now()
+    return IdempotencyKey.objects.filter(
+        Q(status_code__isnull=False)
+        | Q(
+            created_at__gte=now
+            - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        ),
+        user=user,
+        created_at__gte=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+    )
+
+
+def claim_key(user, key: str, request_fingerprint: str):
+    """
+    Insert ``key`` for ``user``. Returns None when claimed, else the key
+    stored by a concurrent request.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    dead = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    IdempotencyKey.objects.filter(
+        Q(created_at__lt=expired)
+        | Q(key=key, status_code__isnull=True, created_at__lt=dead),
+        user=user,
+    ).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=request_fingerprint
+            )
+        return None
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first()
+
+
+class IdempotentCreateMixin:
+    """Make ``create`` idempotent for requests with an Idempotency-Key."""
+
+    def replay_or_reject(
+        self, stored: IdempotencyKey, request_fingerprint: str
+    ) -> Response:
+        if stored.status_code is None:
+            return Response(
+                {
+                    "detail": f"A request with this {IDEMPOTENCY_HEADER} "
+                    "is still in progress."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        if stored.fingerprint != request_fingerprint:
+            return Response(
+                {
+                    "detail": f"This {IDEMPOTENCY_HEADER} was already used "
+                    "with a different request."
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        metrics.inc("cache_requests_total", cache="idempotency", result="hit")
+        return replay(stored)
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    def create(self, request, *args, **kwargs) -> Response:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if not request.user.is_authenticated:
+            # Keys are stored per user.
+            self.permission_denied(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {
+                    "detail": f"{IDEMPOTENCY_HEADER} must be at most "
+                    f"{MAX_KEY_LENGTH} characters."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_fingerprint = fingerprint(request)
+        stored = live_keys(request.user).filter(key=key).first()
+        if stored is None:
+            stored = claim_key(request.user, key, request_fingerprint)
+        if stored is not None:
+            return self.replay_or_reject(stored, request_fingerprint)
+
+        metrics.inc("cache_requests_total", cache="idempotency", result="miss")
+        claimed = IdempotencyKey.objects.filter(user=request.user, key=key)
+        try:
+            # Errors are raised, so only successful responses are stored.
+            response = super().create(request, *args, **kwargs)
+        except BaseException:
+            claimed.delete()
+            raise
+        claimed.update(
+            status_code=response.status_code, response=response.data
+        )
+        return response
@@ -0,0 +1,73 @@
+"""
+Seat maps of planetarium domes.
+
+A layout is a string with one line of seat positions per row, rows
+separated by ``/``: ``S`` is a seat, ``W`` a wheelchair space and ``.``
+an aisle or any position without a seat. Rows may differ in length;
+``seats_in_row`` is the longest one and seats are numbered by their
+position in the row, so seat numbers skip aisles. A dome without a
+layout is a rectangle of ``rows`` x ``seats_in_row`` seats.
+
+``seat_index`` turns a layout into one byte per position of the
+``rows`` x ``seats_in_row`` grid, so checking a seat is an index lookup.
+"""
+
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+
+ROW_SEPARATOR = "/"
+SEAT = "S"
+WHEELCHAIR_SPACE = "W"
+NO_SEAT = "."
+
+# Values of the seat index.
+EMPTY = 0
+SEAT_PLACE = 1
+WHEELCHAIR_PLACE = 2
+PLACES = {SEAT: SEAT_PLACE, WHEELCHAIR_SPACE: WHEELCHAIR_PLACE, NO_SEAT: EMPTY}
+
+
+def layout_rows(layout: str) -> list:
+    return layout.split(ROW_SEPARATOR)
+
+
+def validate_layout(layout: str) -> None:
+    if not layout:
+        return
+    for number, row in enumerate(layout_rows(layout), start=1):
+        if not row:
+            raise ValidationError(f"Row {number} of the layout is empty.")
+        unknown = set(row) - PLACES.keys()
+        if unknown:
+            raise ValidationError(
+                f"Row {number} of the layout has unknown positions: "
+                f"{''.join(sorted(unknown))}. Use {SEAT} for seats, "
+                f"{WHEELCHAIR_SPACE} for wheelchair spaces and {NO_SEAT} "
+                "for aisles."
+            )
+    if SEAT not in layout and WHEELCHAIR_SPACE not in layout:
+        raise ValidationError("The layout has no seats.")
+
+
+def dimensions(layout: str) -> tuple:
+    """``(rows, seats_in_row)`` of the grid of a layout."""
+    rows = layout_rows(layout)
+    return len(rows), max(len(row) for row in rows)
+
+
+@lru_cache(maxsize=256)
+def seat_index(layout: str, rows: int, seats_in_row: int) -> bytes:
+    """Place of every grid position, row by row."""
+    if not layout:
+        return bytes([SEAT_PLACE]) * (rows * seats_in_row)
+    return b"".join(
+        bytes(PLACES[position] for position in row).ljust(
+            seats_in_row, bytes([EMPTY])
+        )
+        for row in layout_rows(layout)
+    )
+
+
+def capacity(index: bytes) -> int:
+    return len(index) - index.count(EMPTY)
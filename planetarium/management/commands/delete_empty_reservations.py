@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from planetarium.models import Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete reservations without tickets, such as those left by "
+        "failed single-ticket purchases"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Reservations deleted per query (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=60,
+            help="Only delete reservations older than this many minutes "
+            "(default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the empty reservations without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        empty = Reservation.objects.filter(
+            created_at__lt=timezone.now()
+            - timedelta(minutes=options["older_than"]),
+            tickets__isnull=True,
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{empty.count()} empty reservations")
+            return
+
+        batch_size = max(options["batch_size"], 1)
+        deleted = 0
+        while True:
+            batch = list(
+                empty.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            # Checked again in case a ticket was added since the lookup.
+            deleted += (
+                empty.filter(pk__in=batch)
+                .delete()[1]
+                .get(Reservation._meta.label, 0)
+            )
+            if len(batch) < batch_size:
+                break
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} empty reservations")
+        )
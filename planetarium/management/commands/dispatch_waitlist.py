@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from planetarium.waitlist import dispatch
+
+
+class Command(BaseCommand):
+    help = "Offer seats released in sold-out sessions to waiting users"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Sessions processed per run (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep dispatching every this many seconds, "
+            "0 runs once (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            offers = dispatch(max(options["batch_size"], 1))
+            self.stdout.write(f"Offered seats to {offers} waiting users")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from planetarium_api.schema import generate_schema, schema_file
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema file served by /api/schema/"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--file",
+            default=None,
+            help="Output path (default: settings.OPENAPI_SCHEMA_FILE)",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["file"]) if options["file"] else schema_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Workers may read the file while it is written, so swap it in.
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(generate_schema())
+        os.replace(tmp_path, path)
+
+        self.stdout.write(self.style.SUCCESS(f"Schema written to {path}"))
@@ -0,0 +1,129 @@
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_SCRIPT = """
+import io, json, sys, time
+
+start = time.perf_counter()
+from planetarium_api.wsgi import application
+booted = time.perf_counter()
+
+environ = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": sys.argv[1],
+    "SERVER_NAME": "127.0.0.1",
+    "SERVER_PORT": "80",
+    "HTTP_HOST": "127.0.0.1",
+    "REMOTE_ADDR": "127.0.0.1",
+    "wsgi.input": io.BytesIO(),
+    "wsgi.url_scheme": "http",
+}
+statuses = []
+response = application(environ, lambda status, headers: statuses.append(status))
+b"".join(response)
+served = time.perf_counter()
+
+print(json.dumps({
+    "boot": booted - start,
+    "first_request": served - booted,
+    "status": statuses[0],
+}))
+"""
+
+
+def parse_importtime(output: str) -> list:
+    """Parse ``-X importtime`` lines into (module, self_us, cumulative_us)."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Report import time of a WSGI worker, from process start "
+        "to the first served request"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--path",
+            default="/api/planetarium/",
+            help="Path of the first request (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of modules and packages to list",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Worker boots to take the median timings from",
+        )
+
+    def boot_worker(self, path: str) -> tuple:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT, path],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        return timings, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        runs = [
+            self.boot_worker(options["path"])
+            for _ in range(max(options["runs"], 1))
+        ]
+        modules = runs[0][1]
+        timings = {
+            key: statistics.median(run[0][key] for run in runs)
+            for key in ("boot", "first_request")
+        }
+        timings["status"] = runs[0][0]["status"]
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split(".")[0]] += self_us
+
+        top = options["top"]
+        self.stdout.write(self.style.MIGRATE_HEADING("Packages (self time)"))
+        for name, self_us in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[:top]:
+            self.stdout.write(f"{self_us / 1000:10.1f} ms  {name}")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("Modules (cumulative time)")
+        )
+        for name, _, cumulative_us in sorted(
+            modules, key=lambda module: module[2], reverse=True
+        )[:top]:
+            self.stdout.write(f"{cumulative_us / 1000:10.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Worker"))
+        self.stdout.write(f"{len(modules):10d}     modules imported")
+        self.stdout.write(f"{timings['boot'] * 1000:10.1f} ms  boot")
+        self.stdout.write(
+            f"{timings['first_request'] * 1000:10.1f} ms  first request "
+            f"{options['path']} ({timings['status']})"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{(timings['boot'] + timings['first_request']) * 1000:10.1f}"
+                " ms  time to first request"
+            )
+        )
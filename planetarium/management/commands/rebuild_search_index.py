@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import AstronomyShow
+from planetarium.search import update_search_vectors, uses_search_vector
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the full-text search vectors of all astronomy shows "
+        "and make workers rebuild their in-memory search index"
+    )
+
+    def handle(self, *args, **options):
+        update_search_vectors()
+        target = (
+            "search vectors" if uses_search_vector() else "in-memory index"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {target} of {AstronomyShow.objects.count()} shows"
+            )
+        )
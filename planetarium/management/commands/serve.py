@@ -0,0 +1,88 @@
+import importlib.util
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium_api.server import ASGI_WORKER_CLASS, Server, default_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API under gunicorn with pre-forked workers. The code is "
+        "preloaded in the master: restart it, not just the workers "
+        "(SIGHUP), to deploy new code"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--bind",
+            default="0.0.0.0:8000",
+            help="Address to listen on (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: WEB_CONCURRENCY or from cores)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads per sync worker (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Serve planetarium_api.asgi with uvicorn workers",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=30,
+            help="Seconds before a silent worker is restarted",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=0,
+            help="Recycle a worker after this many requests (0: never)",
+        )
+        parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="Restart workers on code changes (disables preloading)",
+        )
+
+    def handle(self, *args, **options):
+        if options["asgi"] and not importlib.util.find_spec("uvicorn"):
+            raise CommandError("--asgi requires uvicorn to be installed.")
+
+        if settings.METRICS_DIR:
+            # Totals of the workers of a previous run.
+            for path in Path(settings.METRICS_DIR).glob("metrics-*.json"):
+                path.unlink()
+
+        workers = options["workers"] or default_workers(options["asgi"])
+        gunicorn_options = {
+            "bind": options["bind"],
+            "workers": workers,
+            "threads": options["threads"],
+            "timeout": options["timeout"],
+            "graceful_timeout": options["timeout"],
+            "max_requests": options["max_requests"],
+            "max_requests_jitter": options["max_requests"] // 10,
+            "preload_app": not options["reload"],
+            "reload": options["reload"],
+            "accesslog": "-",
+        }
+        if options["asgi"]:
+            gunicorn_options["worker_class"] = ASGI_WORKER_CLASS
+
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Serving on {options['bind']} with {workers} workers"
+            )
+        )
+        Server(gunicorn_options, asgi=options["asgi"]).run()
@@ -1,24 +1,51 @@
-import time
-
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+from planetarium_api.health import wait_for_database
 
 
 class Command(BaseCommand):
-    help_ = "Wait until the database is available"
+    help = "Wait until the database accepts queries"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to probe (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait before giving up (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound of the backoff delay (default: %(default)s)",
+        )
+
+    def on_retry(self, error, delay: float) -> None:
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Database unavailable, waiting {delay:.1f} seconds..."
+            )
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE("Waiting for database..."))
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write(
-                    self.style.NOTICE(
-                        "Database unavailable, waiting 1 second..."
-                    )
-                )
-                time.sleep(1)
-        self.stdout.write(self.style.SUCCESS("Database available!"))
+        try:
+            latency = wait_for_database(
+                alias=options["database"],
+                timeout=options["timeout"],
+                max_delay=options["max_delay"],
+                on_retry=self.on_retry,
+            )
+        except OperationalError as error:
+            raise CommandError(f"Database unavailable: {error}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database available! ({latency * 1000:.1f} ms)"
+            )
+        )
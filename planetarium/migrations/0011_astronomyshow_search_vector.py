@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:07
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX_NAME = "planetarium_astronomyshow_search_vector_gin"
+
+
+def create_search_index(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX {INDEX_NAME} ON planetarium_astronomyshow "
+        "USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE planetarium_astronomyshow AS show SET search_vector = "
+        "setweight(to_tsvector('english', show.title), 'A') || "
+        "setweight(to_tsvector('english', show.description), 'B') || "
+        "setweight(to_tsvector('english', coalesce(("
+        "SELECT string_agg(theme.name, ' ') "
+        "FROM planetarium_astronomyshow_show_theme AS link "
+        "JOIN planetarium_showtheme AS theme ON theme.id = link.showtheme_id "
+        "WHERE link.astronomyshow_id = show.id), '')), 'C')"
+    )
+
+
+def drop_search_index(apps, schema_editor) -> None:
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0010_alter_planetariumdome_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
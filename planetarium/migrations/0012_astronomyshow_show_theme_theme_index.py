@@ -0,0 +1,20 @@
+from django.db import migrations
+
+INDEX_NAME = "planetarium_astronomyshow_show_theme_theme_show"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0011_astronomyshow_search_vector"),
+    ]
+
+    # The unique (astronomyshow_id, showtheme_id) index of the M2M table
+    # cannot serve lookups by theme, which filtering by theme needs.
+    operations = [
+        migrations.RunSQL(
+            f"CREATE INDEX {INDEX_NAME} "
+            "ON planetarium_astronomyshow_show_theme "
+            "(showtheme_id, astronomyshow_id)",
+            f"DROP INDEX {INDEX_NAME}",
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0013_waitlistentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="price_modifier",
+            field=models.DecimalField(
+                decimal_places=2, default=1, max_digits=4
+            ),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=8, null=True
+            ),
+        ),
+        migrations.CreateModel(
+            name="PriceTier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("first_row", models.PositiveIntegerField()),
+                ("last_row", models.PositiveIntegerField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=8)),
+                (
+                    "planetarium_dome",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_tiers",
+                        to="planetarium.planetariumdome",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["planetarium_dome", "first_row"],
+            },
+        ),
+    ]
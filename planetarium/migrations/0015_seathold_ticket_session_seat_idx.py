@@ -0,0 +1,64 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("planetarium", "0014_pricing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("row", models.PositiveIntegerField()),
+                ("seat", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["row", "seat"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["show_session", "row", "seat"],
+                name="ticket_session_seat_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="seathold",
+            name="show_session",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="holds",
+                to="planetarium.showsession",
+            ),
+        ),
+        migrations.AddField(
+            model_name="seathold",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="seat_holds",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="seathold",
+            unique_together={("show_session", "row", "seat")},
+        ),
+    ]
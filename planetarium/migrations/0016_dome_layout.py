@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:49
+
+from django.db import migrations, models
+from django.db.models import F
+
+import planetarium.layout
+
+
+def fill_capacity(apps, schema_editor) -> None:
+    PlanetariumDome = apps.get_model("planetarium", "PlanetariumDome")
+    PlanetariumDome.objects.update(capacity=F("rows") * F("seats_in_row"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0015_seathold_ticket_session_seat_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="planetariumdome",
+            name="capacity",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="planetariumdome",
+            name="layout",
+            field=models.TextField(
+                blank=True,
+                default="",
+                validators=[planetarium.layout.validate_layout],
+            ),
+        ),
+        migrations.RunPython(fill_capacity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-19 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0016_dome_layout"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reservation",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="showsession",
+            name="show_time",
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
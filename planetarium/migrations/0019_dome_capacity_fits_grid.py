@@ -0,0 +1,40 @@
+# Generated by Django 4.2.6 on 2026-10-19 04:15
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0018_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="planetariumdome",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(
+                        (
+                            "capacity",
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("rows"), "*", models.F("seats_in_row")
+                            ),
+                        ),
+                        ("layout", ""),
+                    ),
+                    models.Q(
+                        models.Q(("layout", ""), _negated=True),
+                        (
+                            "capacity__lte",
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("rows"), "*", models.F("seats_in_row")
+                            ),
+                        ),
+                    ),
+                    _connector="OR",
+                ),
+                name="dome_capacity_fits_grid",
+            ),
+        ),
+    ]
@@ -2,10 +2,14 @@ import os.path
 import uuid
 
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
+from planetarium import layout
 from planetarium_api import settings
 
 
@@ -15,6 +19,9 @@ class AstronomyShow(models.Model):
     show_theme = models.ManyToManyField(
         "ShowTheme", related_name="astronomy_shows"
     )
+    # Title, description and theme names, maintained by planetarium.search
+    # and only filled on PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self) -> str:
         return self.title
@@ -34,7 +41,11 @@ class ShowSession(models.Model):
     planetarium_dome = models.ForeignKey(
         "PlanetariumDome", on_delete=models.CASCADE, related_name="sessions"
     )
-    show_time = models.DateTimeField()
+    show_time = models.DateTimeField(db_index=True)
+    # Multiplies the price tiers of the dome, see planetarium.pricing.
+    price_modifier = models.DecimalField(
+        max_digits=4, decimal_places=2, default=1
+    )
 
     def __str__(self) -> str:
         return f"{self.astronomy_show.title} - {self.planetarium_dome.name} - {self.show_time}"
@@ -50,17 +61,95 @@ class PlanetariumDome(models.Model):
     name = models.CharField(max_length=100, unique=True)
     rows = models.PositiveIntegerField()
     seats_in_row = models.PositiveIntegerField()
+    # Seat map, see planetarium.layout. Rows and seats_in_row follow it.
+    layout = models.TextField(
+        blank=True, default="", validators=[layout.validate_layout]
+    )
+    # Seats and wheelchair spaces, computed by save(). QuerySet.update(),
+    # bulk_create() and fixtures skip save(): set it with them, the
+    # dome_capacity_fits_grid constraint rejects capacities that cannot be.
+    capacity = models.PositiveIntegerField(default=0, editable=False)
     image = models.ImageField(
         upload_to=planetarium_dome_image_path, null=True, blank=True
     )
 
-    @property
-    def capacity(self) -> int:
-        return self.rows * self.seats_in_row
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(
+                    layout="",
+                    capacity=models.F("rows") * models.F("seats_in_row"),
+                )
+                | (
+                    ~models.Q(layout="")
+                    & models.Q(
+                        capacity__lte=models.F("rows")
+                        * models.F("seats_in_row")
+                    )
+                ),
+                name="dome_capacity_fits_grid",
+            )
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs) -> None:
+        if self.layout:
+            self.rows, self.seats_in_row = layout.dimensions(self.layout)
+        self.capacity = layout.capacity(self.seat_index)
+        super().save(*args, **kwargs)
+
+    @property
+    def seat_index(self) -> bytes:
+        return layout.seat_index(self.layout, self.rows, self.seats_in_row)
+
+    def has_seat(self, row: int, seat: int) -> bool:
+        return (
+            1 <= row <= self.rows
+            and 1 <= seat <= self.seats_in_row
+            and self.seat_index[(row - 1) * self.seats_in_row + seat - 1]
+            != layout.EMPTY
+        )
+
+
+class PriceTier(models.Model):
+    """Base ticket price of a range of rows of a dome."""
+
+    planetarium_dome = models.ForeignKey(
+        PlanetariumDome, on_delete=models.CASCADE, related_name="price_tiers"
+    )
+    first_row = models.PositiveIntegerField()
+    last_row = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+
+    class Meta:
+        ordering = ["planetarium_dome", "first_row"]
+
+    def __str__(self) -> str:
+        return f"{self.planetarium_dome.name}: rows {self.first_row}-{self.last_row}"
+
+    def clean(self) -> None:
+        if not 1 <= self.first_row <= self.last_row:
+            raise DjangoValidationError(
+                "Rows must be a range starting from row 1."
+            )
+        if self.last_row > self.planetarium_dome.rows:
+            raise DjangoValidationError(
+                "Row number is too big for this planetarium dome."
+            )
+        if self.planetarium_dome.pk is None:
+            return
+        overlapping = PriceTier.objects.filter(
+            planetarium_dome=self.planetarium_dome,
+            first_row__lte=self.last_row,
+            last_row__gte=self.first_row,
+        ).exclude(pk=self.pk)
+        if overlapping.exists():
+            raise DjangoValidationError(
+                "Rows overlap another price tier of this dome."
+            )
+
 
 class Ticket(models.Model):
     row = models.PositiveIntegerField()
@@ -74,10 +163,21 @@ class Ticket(models.Model):
         related_name="tickets",
         null=False,
     )
+    # Set when the ticket is bought, see planetarium.pricing.
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, blank=True
+    )
 
     class Meta:
         unique_together = ("row", "seat", "show_session")
         ordering = ["row", "seat"]
+        indexes = [
+            # Seat map of a session in row order, see planetarium.seating.
+            models.Index(
+                fields=["show_session", "row", "seat"],
+                name="ticket_session_seat_idx",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"row: {self.row} - seat: {self.seat}. Show: {self.show_session.astronomy_show.title}"
@@ -93,17 +193,25 @@ class Ticket(models.Model):
         if seat > num_seat:
             raise ValidationError("Seat number is too big for this row.")
 
-    def clean(self) -> None:
+    @staticmethod
+    def validate_place(dome: "PlanetariumDome", row: int, seat: int) -> None:
         Ticket.validate_seat_and_row(
-            seat=self.seat,
-            num_seat=self.show_session.planetarium_dome.seats_in_row,
-            row=self.row,
-            num_rows=self.show_session.planetarium_dome.rows,
+            seat=seat,
+            num_seat=dome.seats_in_row,
+            row=row,
+            num_rows=dome.rows,
+        )
+        if not dome.has_seat(row, seat):
+            raise ValidationError("There is no seat at this position.")
+
+    def clean(self) -> None:
+        Ticket.validate_place(
+            self.show_session.planetarium_dome, self.row, self.seat
         )
 
 
 class Reservation(models.Model):
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -115,3 +223,99 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class WaitlistEntry(models.Model):
+    """A user waiting for seats of a sold-out session, served FIFO."""
+
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="waitlist"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+    )
+    seats = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by planetarium.waitlist.dispatch when seats are offered.
+    offered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        unique_together = ("show_session", "user")
+        indexes = [
+            # Queue order of waiting entries, for dispatching and positions.
+            models.Index(
+                fields=["show_session", "created_at", "id"],
+                condition=models.Q(offered_at__isnull=True),
+                name="waitlist_queue_idx",
+            )
+        ]
+        verbose_name_plural = "waitlist entries"
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.show_session_id}"
+
+    @property
+    def position(self):
+        """1-based place in the queue, None once seats were offered."""
+        if self.offered_at is not None:
+            return None
+        return (
+            WaitlistEntry.objects.filter(
+                models.Q(created_at__lt=self.created_at)
+                | models.Q(created_at=self.created_at, id__lt=self.id),
+                show_session_id=self.show_session_id,
+                offered_at__isnull=True,
+            ).count()
+            + 1
+        )
+
+
+class SeatHold(models.Model):
+    """A seat kept for a user until ``expires_at``, see planetarium.seating."""
+
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    row = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("show_session", "row", "seat")
+        ordering = ["row", "seat"]
+
+    def __str__(self) -> str:
+        return f"row: {self.row} - seat: {self.seat} held by {self.user}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    An Idempotency-Key of a user and the response to its first request,
+    see planetarium.idempotency. ``status_code`` is None while that
+    request is still running.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self) -> str:
+        return f"{self.key} of {self.user}"
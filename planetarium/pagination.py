@@ -0,0 +1,121 @@
+"""
+Pagination of tables too large to count.
+
+``COUNT(*)`` reads a whole table or index, which on the ticket and
+reservation tables costs more than the page itself. Above
+``ESTIMATED_COUNT_THRESHOLD`` rows counts are approximate:
+
+- unfiltered querysets on PostgreSQL use the planner's row estimate in
+  ``pg_class.reltuples``;
+- other querysets are counted exactly once and the count is reused for
+  ``ESTIMATED_COUNT_TTL`` seconds.
+
+Smaller counts are always exact.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from planetarium_api import metrics
+
+
+def table_estimate(model, using: str = "default"):
+    """Planner estimate of the rows of ``model``'s table, None if unknown."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 for tables that were never analyzed.
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def count_cache_key(queryset: QuerySet):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f"{queryset.db}:{sql}:{params!r}".encode())
+    return f"planetarium:count:{digest.hexdigest()}"
+
+
+def estimated_count(queryset: QuerySet) -> tuple:
+    """``(count, approximate)`` of ``queryset``."""
+    threshold = settings.ESTIMATED_COUNT_THRESHOLD
+    query = queryset.query
+    if not (query.has_filters() or query.distinct or query.is_sliced):
+        estimate = table_estimate(queryset.model, queryset.db)
+        if estimate is not None and estimate >= threshold:
+            return estimate, True
+
+    key = count_cache_key(queryset)
+    if key is None:
+        return 0, False
+    count = cache.get(key)
+    if count is not None:
+        metrics.inc("cache_requests_total", cache="count", result="hit")
+        return count, True
+    metrics.inc("cache_requests_total", cache="count", result="miss")
+    count = queryset.count()
+    if count >= threshold:
+        cache.set(key, count, settings.ESTIMATED_COUNT_TTL)
+    return count, False
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting large unfiltered tables from the estimate."""
+
+    approximate = False
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        count, self.approximate = estimated_count(self.object_list)
+        return count
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination with ``EstimatedCountPaginator``; responses
+    flag an approximate ``count`` with ``count_approximate``.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data) -> Response:
+        response = super().get_paginated_response(data)
+        response.data = {
+            "count": response.data["count"],
+            "count_approximate": self.page.paginator.approximate,
+            **response.data,
+        }
+        return response
+
+    def get_paginated_response_schema(self, schema) -> dict:
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema["properties"]
+        response_schema["properties"] = {
+            "count": properties.pop("count"),
+            "count_approximate": {
+                "type": "boolean",
+                "description": "Whether count is an estimate.",
+            },
+            **properties,
+        }
+        return response_schema
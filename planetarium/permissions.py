@@ -25,3 +25,18 @@ class CanCreateAndRead(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         return False
+
+
+class CanCreateReadAndCancel(CanCreateAndRead):
+    """Also lets users cancel (DELETE or POST to an action) their own."""
+
+    def has_permission(self, request, view) -> bool:
+        cancelling = getattr(view, "action", None) == "cancel"
+        if request.method == "DELETE" or cancelling:
+            return request.user.is_authenticated
+        return super().has_permission(request, view)
+
+    def has_object_permission(self, request, view, obj) -> bool:
+        if request.method in ("POST", "DELETE"):
+            return obj.user == request.user
+        return super().has_object_permission(request, view, obj)
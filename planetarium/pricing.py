@@ -0,0 +1,106 @@
+"""
+Ticket prices.
+
+A seat costs the price of the ``PriceTier`` of its dome covering its row
+(``DEFAULT_TICKET_PRICE`` without one), times the session's
+``price_modifier``, times the surge multiplier of the session's
+occupancy (``PRICE_SURGE``). Tiers and modifier are precomputed into a
+table of prices by row for each session and cached, so pricing a whole
+seat map or a reservation is one list lookup per seat.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count
+
+from planetarium import cache
+from planetarium.models import ShowSession, Ticket
+
+CENT = Decimal("0.01")
+
+
+def build_price_table(show_session: ShowSession) -> tuple:
+    dome = show_session.planetarium_dome
+    prices = [Decimal(settings.DEFAULT_TICKET_PRICE)] * dome.rows
+    for first_row, last_row, price in dome.price_tiers.values_list(
+        "first_row", "last_row", "price"
+    ):
+        last_row = min(last_row, dome.rows)
+        prices[first_row - 1 : last_row] = [price] * (last_row - first_row + 1)
+    modifier = show_session.price_modifier
+    return tuple((price * modifier).quantize(CENT) for price in prices)
+
+
+def price_table(show_session: ShowSession) -> tuple:
+    """Prices of the rows of a session before surge, row 1 first."""
+    return cache.cached(
+        cache.PRICE_TABLES,
+        str(show_session.pk),
+        lambda: build_price_table(show_session),
+    )
+
+
+def surge(sold: int, capacity: int) -> Decimal:
+    occupancy = sold / capacity if capacity else 1
+    multiplier = Decimal(1)
+    for threshold, step in settings.PRICE_SURGE:
+        if occupancy >= threshold:
+            multiplier = Decimal(step)
+    return multiplier
+
+
+def row_prices(show_session: ShowSession, multiplier: Decimal) -> list:
+    table = price_table(show_session)
+    if multiplier == 1:
+        return list(table)
+    return [(price * multiplier).quantize(CENT) for price in table]
+
+
+def sold_tickets(show_session_ids) -> dict:
+    return dict(
+        Ticket.objects.filter(show_session__in=show_session_ids)
+        .order_by()
+        .values("show_session")
+        .annotate(sold=Count("id"))
+        .values_list("show_session", "sold")
+    )
+
+
+def price_tickets(tickets: list) -> None:
+    """
+    Set the price of unsaved ``tickets`` (of any sessions), with one
+    query for the occupancy of all their sessions.
+    """
+    sessions = {
+        ticket.show_session_id: ticket.show_session for ticket in tickets
+    }
+    sold = sold_tickets(sessions)
+    prices = {
+        session_id: row_prices(
+            show_session,
+            surge(
+                sold.get(session_id, 0),
+                show_session.planetarium_dome.capacity,
+            ),
+        )
+        for session_id, show_session in sessions.items()
+    }
+    for ticket in tickets:
+        ticket.price = prices[ticket.show_session_id][ticket.row - 1]
+
+
+def quote(show_session: ShowSession) -> dict:
+    """Current prices of every row of a session."""
+    sold = sold_tickets([show_session.pk]).get(show_session.pk, 0)
+    multiplier = surge(sold, show_session.planetarium_dome.capacity)
+    return {
+        "show_session": show_session.pk,
+        "surge": multiplier,
+        "rows": [
+            {"row": row, "price": price}
+            for row, price in enumerate(
+                row_prices(show_session, multiplier), start=1
+            )
+        ],
+    }
@@ -0,0 +1,132 @@
+"""Show sessions grouped into calendar days or weeks."""
+
+import datetime
+from itertools import groupby
+
+from django.db import transaction
+
+from django.db.models import (
+    Count,
+    DateField,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, TruncDate, TruncWeek
+from django.utils import timezone
+
+from planetarium import cache
+from planetarium.models import ShowSession, Ticket
+
+BUCKETS = {
+    "day": lambda field, tz: TruncDate(field, tzinfo=tz),
+    "week": lambda field, tz: TruncWeek(
+        field, output_field=DateField(), tzinfo=tz
+    ),
+}
+
+
+def day_start(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+
+def calendar_days(start: datetime.date, end: datetime.date) -> list:
+    """Cache parts of a calendar from ``start`` to ``end``: its days."""
+    return [
+        (start + datetime.timedelta(days=offset)).isoformat()
+        for offset in range((end - start).days + 1)
+    ]
+
+
+def invalidate_calendar(show_times=None) -> None:
+    """
+    Drop the cached calendars covering the days of ``show_times``, or all
+    of them, once the current transaction commits.
+    """
+    if show_times is None:
+        transaction.on_commit(lambda: cache.invalidate(cache.SESSION_CALENDAR))
+        return
+    days = {
+        timezone.localtime(show_time).date().isoformat()
+        for show_time in show_times
+    }
+    if days:
+        transaction.on_commit(
+            lambda: cache.invalidate_parts(cache.SESSION_CALENDAR, days)
+        )
+
+
+def invalidate_session_days(session_ids) -> None:
+    invalidate_calendar(
+        ShowSession.objects.filter(pk__in=session_ids).values_list(
+            "show_time", flat=True
+        )
+    )
+
+
+def calendar_sessions(
+    queryset: QuerySet, start: datetime.date, end: datetime.date, bucket: str
+) -> QuerySet:
+    """
+    Sessions from ``start`` to ``end`` (inclusive, in ``TIME_ZONE``),
+    each annotated with its ``bucket`` date and the totals of its bucket.
+    """
+    tickets_sold = Coalesce(
+        Subquery(
+            Ticket.objects.filter(show_session=OuterRef("pk"))
+            .values("show_session")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        Value(0),
+    )
+    capacity = F("planetarium_dome__capacity")
+    in_bucket = {"partition_by": [F("bucket")]}
+
+    return (
+        queryset.filter(
+            show_time__gte=day_start(start),
+            show_time__lt=day_start(end + datetime.timedelta(days=1)),
+        )
+        .select_related("astronomy_show", "planetarium_dome")
+        .annotate(
+            bucket=BUCKETS[bucket](
+                "show_time", timezone.get_current_timezone()
+            ),
+            capacity=capacity,
+            tickets_sold=tickets_sold,
+            tickets_left=capacity - F("tickets_sold"),
+            bucket_sessions=Window(Count("id"), **in_bucket),
+            bucket_capacity=Window(Sum(capacity), **in_bucket),
+            bucket_tickets_sold=Window(Sum(F("tickets_sold")), **in_bucket),
+        )
+        .order_by("show_time", "id")
+    )
+
+
+def session_calendar(
+    queryset: QuerySet, start: datetime.date, end: datetime.date, bucket: str
+) -> list:
+    """Buckets with sessions, in order, loaded with a single query."""
+    calendar = []
+    sessions = calendar_sessions(queryset, start, end, bucket)
+    for date, bucket_sessions in groupby(sessions, key=lambda s: s.bucket):
+        bucket_sessions = list(bucket_sessions)
+        first = bucket_sessions[0]
+        calendar.append(
+            {
+                "date": date,
+                "session_count": first.bucket_sessions,
+                "capacity": first.bucket_capacity,
+                "tickets_sold": first.bucket_tickets_sold,
+                "tickets_left": (
+                    first.bucket_capacity - first.bucket_tickets_sold
+                ),
+                "show_sessions": bucket_sessions,
+            }
+        )
+    return calendar
@@ -0,0 +1,205 @@
+"""
+Full-text search over astronomy shows.
+
+On PostgreSQL shows are matched against ``AstronomyShow.search_vector``
+(title, description and theme names, GIN indexed) with prefix queries
+ranked by ``ts_rank``. Other databases use ``ShowSearchIndex``, an
+in-memory inverted index rebuilt when shows or themes change.
+"""
+
+import heapq
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from planetarium.models import AstronomyShow, ShowTheme
+from planetarium_api import metrics
+
+TOKEN_RE = re.compile(r"\w+")
+SEARCH_CONFIG = "english"
+INDEX_VERSION_KEY = "search:shows:version"
+
+# Same weights as PostgreSQL's ts_rank for A, B and C labels.
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+THEME_WEIGHT = 0.2
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+
+def uses_search_vector() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def theme_names():
+    """Space separated theme names of the outer show, for SearchVector."""
+    return Coalesce(
+        Subquery(
+            ShowTheme.objects.filter(astronomy_shows=OuterRef("pk"))
+            .values("astronomy_shows")
+            .annotate(names=StringAgg("name", " "))
+            .values("names")
+        ),
+        Value(""),
+    )
+
+
+def update_search_vectors(show_ids=None) -> None:
+    """Recompute ``search_vector`` of the given shows (all if None)."""
+    if uses_search_vector():
+        shows = AstronomyShow.objects.all()
+        if show_ids is not None:
+            shows = shows.filter(pk__in=show_ids)
+        shows.update(
+            search_vector=(
+                SearchVector("title", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+                + SearchVector(theme_names(), weight="C", config=SEARCH_CONFIG)
+            )
+        )
+    invalidate_index()
+
+
+def invalidate_index() -> None:
+    """Make every worker rebuild its in-memory index on the next search."""
+    cache.set(INDEX_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+class ShowSearchIndex:
+    """Inverted index ``token -> {show id: score}`` with prefix lookup."""
+
+    def __init__(self) -> None:
+        self.postings = defaultdict(lambda: defaultdict(float))
+        self.vocabulary = []
+
+    @classmethod
+    def build(cls) -> "ShowSearchIndex":
+        index = cls()
+        for show_id, title, description in AstronomyShow.objects.values_list(
+            "id", "title", "description"
+        ).iterator():
+            index.add(show_id, tokenize(title), TITLE_WEIGHT)
+            index.add(show_id, tokenize(description), DESCRIPTION_WEIGHT)
+
+        theme_tokens = {
+            theme_id: tokenize(name)
+            for theme_id, name in ShowTheme.objects.values_list("id", "name")
+        }
+        links = AstronomyShow.show_theme.through.objects.values_list(
+            "astronomyshow_id", "showtheme_id"
+        )
+        for show_id, theme_id in links.iterator():
+            index.add(show_id, theme_tokens[theme_id], THEME_WEIGHT)
+
+        index.vocabulary = sorted(index.postings)
+        return index
+
+    def add(self, show_id: int, tokens: list, weight: float) -> None:
+        postings = self.postings
+        for token in tokens:
+            postings[token][show_id] += weight
+
+    def matches(self, prefix: str) -> dict:
+        """Scores of shows having a token starting with ``prefix``."""
+        start = bisect_left(self.vocabulary, prefix)
+        end = start
+        while end < len(self.vocabulary) and self.vocabulary[end].startswith(
+            prefix
+        ):
+            end += 1
+        if end - start == 1:
+            return self.postings[self.vocabulary[start]]
+
+        scores = defaultdict(float)
+        for token in self.vocabulary[start:end]:
+            for show_id, score in self.postings[token].items():
+                scores[show_id] += score
+        return scores
+
+    def search(self, query: str, limit: int) -> list:
+        """``(show id, rank)`` of shows matching every query token."""
+        matches = sorted(
+            (self.matches(token) for token in set(tokenize(query))), key=len
+        )
+        if not matches or not matches[0]:
+            return []
+
+        # Intersect starting from the rarest token.
+        rarest, others = matches[0], matches[1:]
+        ranks = {}
+        for show_id, rank in rarest.items():
+            for scores in others:
+                score = scores.get(show_id)
+                if score is None:
+                    break
+                rank += score
+            else:
+                ranks[show_id] = rank
+        return heapq.nsmallest(
+            limit, ranks.items(), key=lambda item: (-item[1], item[0])
+        )
+
+
+_index = None
+_index_version = None
+_index_built_at = 0.0
+
+
+def get_index() -> ShowSearchIndex:
+    global _index, _index_version, _index_built_at
+
+    version = cache.get(INDEX_VERSION_KEY)
+    expired = time.monotonic() - _index_built_at > settings.SEARCH_INDEX_TTL
+    if _index is None or version != _index_version or expired:
+        metrics.inc("cache_requests_total", cache="search", result="miss")
+        _index = ShowSearchIndex.build()
+        _index_version = version
+        _index_built_at = time.monotonic()
+    else:
+        metrics.inc("cache_requests_total", cache="search", result="hit")
+    return _index
+
+
+def search_shows(query: str, limit: int = 20) -> list:
+    """Shows matching every word of ``query`` as a prefix, best first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    shows = AstronomyShow.objects.prefetch_related("show_theme")
+    if uses_search_vector():
+        search_query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+        return list(
+            shows.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "id")[:limit]
+        )
+
+    ranked = get_index().search(query, limit)
+    shows_by_id = shows.in_bulk([show_id for show_id, _ in ranked])
+    results = []
+    for show_id, rank in ranked:
+        show = shows_by_id.get(show_id)
+        if show is not None:
+            show.rank = rank
+            results.append(show)
+    return results
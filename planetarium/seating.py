@@ -0,0 +1,276 @@
+"""
+Best available seats of a session.
+
+The occupancy of a session is a ``bytearray`` with one byte per
+position of the dome's grid, row by row, set for sold and held seats and
+for positions that are not seats on the public sale (aisles and
+wheelchair spaces, see planetarium.layout). Free runs of a row are found
+with a regular expression over the buffer, so finding a block of seats
+costs one query and a scan of the free runs, not of every seat.
+"""
+
+import heapq
+import json
+import re
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Aggregate, CharField, Q, QuerySet
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from planetarium import layout
+from planetarium.models import SeatHold, ShowSession, Ticket
+
+FREE = 0
+TAKEN = 1
+# Seat index place -> occupancy of an unsold position.
+UNSOLD = bytes.maketrans(
+    bytes([layout.EMPTY, layout.SEAT_PLACE, layout.WHEELCHAIR_PLACE]),
+    bytes([TAKEN, FREE, TAKEN]),
+)
+FREE_RUN = re.compile(b"\x00+")
+HOLD_ATTEMPTS = 3
+
+
+class SeatNumbers(Aggregate):
+    """Comma separated seat numbers of a group."""
+
+    function = "GROUP_CONCAT"
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            function="STRING_AGG",
+            template="%(function)s(%(expressions)s::text, ',')",
+            **extra_context,
+        )
+
+
+def seats_by_row(queryset: QuerySet) -> QuerySet:
+    return (
+        queryset.order_by()
+        .values("row")
+        .annotate(seats=SeatNumbers("seat"))
+        .values_list("row", "seats")
+    )
+
+
+@lru_cache(maxsize=256)
+def unsold_occupancy(dome_layout: str, rows: int, seats_in_row: int) -> bytes:
+    """Occupancy of a session of a dome without sold or held seats."""
+    index = layout.seat_index(dome_layout, rows, seats_in_row)
+    return index.translate(UNSOLD)
+
+
+def occupancy(show_session: ShowSession, user=None) -> bytearray:
+    """Sold and held seats of a session, ignoring the holds of ``user``."""
+    dome = show_session.planetarium_dome
+    rows, seats_in_row = dome.rows, dome.seats_in_row
+    holds = SeatHold.objects.filter(
+        show_session=show_session, expires_at__gt=timezone.now()
+    )
+    if user is not None:
+        holds = holds.exclude(user=user)
+    tickets = Ticket.objects.filter(show_session=show_session)
+    # One row of comma separated seat numbers per dome row, instead of a
+    # row per taken seat.
+    taken = seats_by_row(tickets).union(seats_by_row(holds), all=True)
+
+    occupied = bytearray(unsold_occupancy(dome.layout, rows, seats_in_row))
+    rows_taken = list(taken)
+    # The seats of all rows parsed at once in C, instead of int() per seat.
+    seats_taken = json.loads(
+        "[[" + "],[".join(seats for _, seats in rows_taken) + "]]"
+    )
+    for (row, _), seats in zip(rows_taken, seats_taken):
+        # Tickets sold before the dome was made smaller are off the grid.
+        if not 1 <= row <= rows:
+            continue
+        if max(seats) > seats_in_row or min(seats) < 1:
+            seats = [seat for seat in seats if 1 <= seat <= seats_in_row]
+        offset = (row - 1) * seats_in_row - 1
+        for seat in seats:
+            occupied[offset + seat] = TAKEN
+    return occupied
+
+
+def find_block(
+    occupied: bytearray,
+    rows: int,
+    seats_in_row: int,
+    party_size: int,
+    centre: bool = True,
+):
+    """
+    ``(row, first seat)`` of the best block of ``party_size`` free seats
+    in one row, or None. With ``centre`` the block closest to the middle
+    of the dome wins, one row away counting as one seat; otherwise the
+    first block from the front.
+    """
+    middle_row = (rows - 1) / 2
+    ideal_start = (seats_in_row - party_size) / 2
+    best, best_score = None, None
+    for row in range(rows):
+        row_score = abs(row - middle_row) if centre else 0
+        if best_score is not None and row_score >= best_score:
+            continue
+        offset = row * seats_in_row
+        for run in FREE_RUN.finditer(occupied, offset, offset + seats_in_row):
+            start, end = run.start() - offset, run.end() - offset
+            if end - start < party_size:
+                continue
+            if not centre:
+                return row + 1, start + 1
+            start = min(max(round(ideal_start), start), end - party_size)
+            score = row_score + abs(start - ideal_start)
+            if best_score is None or score < best_score:
+                best, best_score = (row + 1, start + 1), score
+    return best
+
+
+def find_scattered(
+    occupied: bytearray, rows: int, seats_in_row: int, party_size: int
+) -> list:
+    """The ``party_size`` free seats closest to the middle of the dome."""
+    middle_row = (rows - 1) / 2
+    middle_seat = (seats_in_row - 1) / 2
+    free = (
+        (abs(index // seats_in_row - middle_row)
+         + abs(index % seats_in_row - middle_seat), index)
+        for index, taken in enumerate(occupied)
+        if taken == FREE
+    )  # fmt: skip
+    return sorted(
+        (index // seats_in_row + 1, index % seats_in_row + 1)
+        for _, index in heapq.nsmallest(party_size, free)
+    )
+
+
+def best_seats(
+    show_session: ShowSession,
+    party_size: int,
+    together: bool = True,
+    centre: bool = True,
+    user=None,
+) -> list:
+    """
+    ``(row, seat)`` of the best free seats for a party, empty when there
+    are none. Without ``together`` the party may be split when no row has
+    a block large enough.
+    """
+    dome = show_session.planetarium_dome
+    occupied = occupancy(show_session, user)
+    block = find_block(
+        occupied, dome.rows, dome.seats_in_row, party_size, centre
+    )
+    if block is not None:
+        row, first_seat = block
+        return [
+            (row, seat) for seat in range(first_seat, first_seat + party_size)
+        ]
+    if together or occupied.count(FREE) < party_size:
+        return []
+    return find_scattered(occupied, dome.rows, dome.seats_in_row, party_size)
+
+
+def hold_seats(
+    show_session: ShowSession, user, seconds=None, **preferences
+) -> tuple:
+    """
+    Find the best seats for ``user`` (see best_seats) and hold them for
+    ``seconds``, ``SEAT_HOLD_SECONDS`` by default, replacing the user's
+    previous holds in the session. Returns the seats and when their holds
+    expire, ``([], None)`` when there are none.
+
+    The seats are searched after locking the session, so seats sold or
+    held by purchases and holds running meanwhile are never held. Raises
+    IntegrityError if another user held one of the seats regardless.
+    """
+    if seconds is None:
+        seconds = settings.SEAT_HOLD_SECONDS
+    with transaction.atomic():
+        # Waits for purchases and holds of the session, see check_holds.
+        lock_sessions([show_session.pk])
+        seats = best_seats(show_session, user=user, **preferences)
+        if not seats:
+            return seats, None
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=seconds)
+        SeatHold.objects.filter(show_session=show_session).filter(
+            Q(expires_at__lte=now) | Q(user=user)
+        ).delete()
+        SeatHold.objects.bulk_create(
+            SeatHold(
+                show_session=show_session,
+                user=user,
+                row=row,
+                seat=seat,
+                expires_at=expires_at,
+            )
+            for row, seat in seats
+        )
+    return seats, expires_at
+
+
+def find_and_hold(show_session: ShowSession, user, **preferences) -> tuple:
+    """hold_seats, retried when another user held the seats first."""
+    for _ in range(HOLD_ATTEMPTS):
+        try:
+            return hold_seats(show_session, user, **preferences)
+        except IntegrityError:
+            continue
+    return [], None
+
+
+def lock_sessions(show_session_ids) -> None:
+    """Lock the rows of the sessions until the transaction ends."""
+    list(
+        ShowSession.objects.select_for_update()
+        .filter(pk__in=show_session_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def ticket_seats(tickets: list) -> Q:
+    seats = Q()
+    for ticket in tickets:
+        seats |= Q(
+            show_session_id=ticket.show_session_id,
+            row=ticket.row,
+            seat=ticket.seat,
+        )
+    return seats
+
+
+def check_holds(user, tickets: list) -> list:
+    """
+    Reject ``tickets`` for seats held by another user, and return the ids
+    of the user's own holds on them. Run it in the purchase transaction
+    after lock_sessions: the holds found are locked and no new ones are
+    made in the sessions until the tickets are saved.
+    """
+    holds = (
+        SeatHold.objects.select_for_update()
+        .filter(ticket_seats(tickets), expires_at__gt=timezone.now())
+        .values_list("pk", "user")
+    )
+    own = []
+    for pk, user_id in holds:
+        if user_id != user.pk:
+            raise ValidationError(
+                {"non_field_errors": ["This seat is held by another user."]}
+            )
+        own.append(pk)
+    return own
+
+
+def release_holds(hold_ids: list) -> None:
+    """Delete the holds of bought seats, see check_holds."""
+    if hold_ids:
+        SeatHold.objects.filter(pk__in=hold_ids).delete()
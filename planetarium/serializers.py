@@ -1,7 +1,10 @@
-from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator, UniqueTogetherValidator
 
+from planetarium.booking import create_reservation
+from planetarium.fieldsets import SparseFieldsMixin
+from planetarium.layout import dimensions
 from planetarium.models import (
     AstronomyShow,
     ShowTheme,
@@ -9,10 +12,16 @@ from planetarium.models import (
     PlanetariumDome,
     Ticket,
     Reservation,
+    WaitlistEntry,
 )
+from planetarium.validation import session_domes
 
+MAX_CALENDAR_DAYS = 92
+MAX_WAITLIST_SEATS = 10
+MAX_PARTY_SIZE = 20
 
-class ShowThemeSerializer(serializers.ModelSerializer):
+
+class ShowThemeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     name = serializers.CharField(
         validators=[
             UniqueValidator(
@@ -27,7 +36,15 @@ class ShowThemeSerializer(serializers.ModelSerializer):
         fields = ("id", "name")
 
 
-class AstronomyShowSerializer(serializers.ModelSerializer):
+class ShowThemeFacetSerializer(serializers.ModelSerializer):
+    show_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ShowTheme
+        fields = ("id", "name", "show_count")
+
+
+class AstronomyShowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AstronomyShow
         fields = ("id", "title", "description", "show_theme")
@@ -38,21 +55,95 @@ class AstronomyShowListSerializer(AstronomyShowSerializer):
         many=True, read_only=True, slug_field="name"
     )
 
+    expandable_fields = {
+        "show_theme": (ShowThemeSerializer, {"many": True, "read_only": True})
+    }
+
 
 class AstronomyShowDetailSerializer(AstronomyShowSerializer):
     show_theme = ShowThemeSerializer(many=True, read_only=True)
 
 
-class ShowSessionSerializer(serializers.ModelSerializer):
+class AstronomyShowSearchSerializer(AstronomyShowListSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(AstronomyShowListSerializer.Meta):
+        fields = AstronomyShowListSerializer.Meta.fields + ("rank",)
+
+
+class PlanetariumDomeSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    name = serializers.CharField(
+        validators=[
+            UniqueValidator(
+                queryset=PlanetariumDome.objects.all(),
+                message="Planetarium dome with this name already exists.",
+            )
+        ]
+    )
+
+    class Meta:
+        model = PlanetariumDome
+        fields = ("id", "name", "rows", "seats_in_row", "layout", "capacity")
+        extra_kwargs = {
+            "rows": {"required": False},
+            "seats_in_row": {"required": False},
+        }
+
+    def validate(self, attrs: dict) -> dict:
+        data = super().validate(attrs)
+        layout = data.get("layout", getattr(self.instance, "layout", ""))
+        if not layout:
+            for field in ("rows", "seats_in_row"):
+                if not data.get(field, getattr(self.instance, field, None)):
+                    raise serializers.ValidationError(
+                        {field: "Required for a dome without a layout."}
+                    )
+            return data
+        for field, size in zip(("rows", "seats_in_row"), dimensions(layout)):
+            if data.get(field, size) != size:
+                raise serializers.ValidationError(
+                    {field: f"Must be {size} to match the layout."}
+                )
+        return data
+
+
+class ShowSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ShowSession
-        fields = ("id", "astronomy_show", "planetarium_dome", "show_time")
+        fields = (
+            "id",
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "price_modifier",
+        )
+
+
+class ShowSessionField(serializers.PrimaryKeyRelatedField):
+    """Show session looked up through the request's ``SessionDomes``."""
+
+    def to_internal_value(self, data) -> ShowSession:
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            session_id = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        show_session = session_domes(self.context).get(session_id)
+        if show_session is None:
+            self.fail("does_not_exist", pk_value=data)
+        return show_session
+
 
+class TicketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    show_session = ShowSessionField(queryset=ShowSession.objects.all())
 
-class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
-        fields = ("id", "row", "seat", "show_session")
+        fields = ("id", "row", "seat", "show_session", "price")
+        read_only_fields = ("price",)
         validators = [
             UniqueTogetherValidator(
                 Ticket.objects.all(),
@@ -63,11 +154,8 @@ class TicketSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs) -> dict:
         data = super(TicketSerializer, self).validate(attrs)
-        Ticket.validate_seat_and_row(
-            seat=attrs["seat"],
-            num_seat=attrs["show_session"].planetarium_dome.seats_in_row,
-            row=attrs["row"],
-            num_rows=attrs["show_session"].planetarium_dome.rows,
+        session_domes(self.context).validate(
+            attrs["show_session"].id, attrs["row"], attrs["seat"]
         )
         return data
 
@@ -81,6 +169,11 @@ class ShowSessionListSerializer(ShowSessionSerializer):
     )
     tickets_left = serializers.IntegerField(read_only=True)
 
+    expandable_fields = {
+        "astronomy_show": (AstronomyShowListSerializer, {"read_only": True}),
+        "planetarium_dome": (PlanetariumDomeSerializer, {"read_only": True}),
+    }
+
     class Meta:
         model = ShowSession
         fields = (
@@ -92,19 +185,62 @@ class ShowSessionListSerializer(ShowSessionSerializer):
         )
 
 
-class PlanetariumDomeSerializer(serializers.ModelSerializer):
-    name = serializers.CharField(
-        validators=[
-            UniqueValidator(
-                queryset=PlanetariumDome.objects.all(),
-                message="Planetarium dome with this name already exists.",
-            )
-        ]
+class RowPriceSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=8, decimal_places=2)
+
+
+class SessionPricesSerializer(serializers.Serializer):
+    show_session = serializers.IntegerField()
+    surge = serializers.DecimalField(max_digits=4, decimal_places=2)
+    rows = RowPriceSerializer(many=True)
+
+
+class BestSeatsQuerySerializer(serializers.Serializer):
+    party_size = serializers.IntegerField(
+        min_value=1, max_value=MAX_PARTY_SIZE
+    )
+    together = serializers.BooleanField(
+        default=True, help_text="Only seats next to each other in one row"
+    )
+    centre = serializers.BooleanField(
+        default=True,
+        help_text="Closest to the middle of the dome, else from the front",
     )
 
-    class Meta:
-        model = PlanetariumDome
-        fields = ("id", "name", "rows", "seats_in_row", "capacity")
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class BestSeatsSerializer(serializers.Serializer):
+    show_session = serializers.IntegerField()
+    seats = SeatSerializer(many=True)
+    held_until = serializers.DateTimeField(allow_null=True)
+
+
+class SessionCalendarQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    bucket = serializers.ChoiceField(choices=("day", "week"), default="day")
+
+    def validate(self, attrs) -> dict:
+        days = (attrs["end"] - attrs["start"]).days + 1
+        if not 1 <= days <= MAX_CALENDAR_DAYS:
+            raise serializers.ValidationError(
+                f"The range must span 1 to {MAX_CALENDAR_DAYS} days."
+            )
+        return attrs
+
+
+class SessionCalendarSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    session_count = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    tickets_sold = serializers.IntegerField()
+    tickets_left = serializers.IntegerField()
+    show_sessions = ShowSessionListSerializer(many=True)
 
 
 class ShowSessionDetailSerializer(ShowSessionListSerializer):
@@ -135,6 +271,7 @@ class PlanetariumDomeDetailSerializer(PlanetariumDomeSerializer):
             "name",
             "rows",
             "seats_in_row",
+            "layout",
             "capacity",
             "sessions",
             "image",
@@ -160,12 +297,24 @@ class TicketListSerializer(TicketSerializer):
         source="show_session.planetarium_dome.name", read_only=True
     )
 
+    expandable_fields = {
+        "astronomy_show": (
+            AstronomyShowListSerializer,
+            {"source": "show_session.astronomy_show", "read_only": True},
+        ),
+        "planetarium_dome": (
+            PlanetariumDomeSerializer,
+            {"source": "show_session.planetarium_dome", "read_only": True},
+        ),
+    }
+
     class Meta:
         model = Ticket
         fields = (
             "id",
             "row",
             "seat",
+            "price",
             "astronomy_show",
             "planetarium_dome",
             "created_at",
@@ -176,20 +325,83 @@ class TicketDetailSerializer(TicketSerializer):
     show_session = ShowSessionListSerializer(read_only=True)
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class TicketPurchaseSerializer(TicketSerializer):
+    """A bought ticket with the reservation created for it."""
+
+    reservation = serializers.PrimaryKeyRelatedField(read_only=True)
+    created_at = serializers.DateTimeField(
+        source="reservation.created_at", read_only=True
+    )
+
+    class Meta(TicketSerializer.Meta):
+        fields = TicketSerializer.Meta.fields + ("reservation", "created_at")
+
+
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    total_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Reservation
-        fields = ("id", "created_at", "tickets")
+        fields = ("id", "created_at", "total_price", "tickets")
+
+    def to_internal_value(self, data) -> dict:
+        tickets = data.get("tickets") if hasattr(data, "get") else None
+        if isinstance(tickets, list):
+            # The sessions of all tickets in one query.
+            session_domes(self.context).load(
+                ticket.get("show_session")
+                for ticket in tickets
+                if isinstance(ticket, dict)
+            )
+        return super().to_internal_value(data)
+
+    def validate(self, attrs) -> dict:
+        seats = {
+            (ticket["show_session"].id, ticket["row"], ticket["seat"])
+            for ticket in attrs["tickets"]
+        }
+        if len(seats) != len(attrs["tickets"]):
+            raise serializers.ValidationError(
+                "The same seat is listed more than once.", code="duplicate"
+            )
+        return attrs
 
     def create(self, validated_data) -> Reservation:
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        return create_reservation(
+            validated_data["user"], validated_data["tickets"]
+        )
+
+
+class ReservationCancelSerializer(serializers.Serializer):
+    """Tickets of the reservation in ``context`` to cancel, all if none."""
+
+    tickets = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False
+    )
+
+    def validate(self, attrs) -> dict:
+        tickets = Ticket.objects.filter(
+            reservation=self.context["reservation"]
+        )
+        ticket_ids = attrs.get("tickets")
+        if ticket_ids is not None:
+            tickets = tickets.filter(pk__in=ticket_ids)
+            if tickets.count() != len(set(ticket_ids)):
+                raise serializers.ValidationError(
+                    {
+                        "tickets": "Some tickets are not part of this reservation."
+                    }
+                )
+        if tickets.filter(
+            show_session__show_time__lte=timezone.now()
+        ).exists():
+            raise serializers.ValidationError(
+                "Tickets of sessions that already started cannot be cancelled."
+            )
+        return attrs
 
 
 class ReservationListSerializer(ReservationSerializer):
@@ -198,3 +410,22 @@ class ReservationListSerializer(ReservationSerializer):
 
 class ReservationDetailSerializer(ReservationSerializer):
     tickets = TicketDetailSerializer(many=True, read_only=True)
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    position = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = (
+            "id",
+            "show_session",
+            "seats",
+            "position",
+            "created_at",
+            "offered_at",
+        )
+        read_only_fields = ("show_session", "created_at", "offered_at")
+        extra_kwargs = {
+            "seats": {"min_value": 1, "max_value": MAX_WAITLIST_SEATS}
+        }
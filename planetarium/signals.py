@@ -0,0 +1,106 @@
+"""Keep the show search index and cached API results in sync."""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from planetarium import cache, schedule, search
+from planetarium.booking import seats_released
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    PriceTier,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+def shows_changed(show_ids=None) -> None:
+    search.update_search_vectors(show_ids)
+    cache.invalidate(cache.THEME_FACETS)
+
+
+@receiver(post_save, sender=AstronomyShow)
+def index_saved_show(sender, instance, **kwargs) -> None:
+    search.update_search_vectors([instance.pk])
+    schedule.invalidate_calendar()
+
+
+@receiver(post_delete, sender=AstronomyShow)
+def unindex_deleted_show(sender, instance, **kwargs) -> None:
+    search.invalidate_index()
+    cache.invalidate(cache.THEME_FACETS)
+    schedule.invalidate_calendar()
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_theme.through)
+def index_show_themes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        shows_changed([instance.pk])
+    elif pk_set:
+        shows_changed(pk_set)
+    else:
+        # A theme's shows were cleared, their ids are gone with the links.
+        shows_changed()
+
+
+@receiver(post_save, sender=ShowTheme)
+def index_saved_theme(sender, instance, created, **kwargs) -> None:
+    if created:
+        cache.invalidate(cache.THEME_FACETS)
+    else:
+        shows_changed(
+            list(instance.astronomy_shows.values_list("id", flat=True))
+        )
+
+
+@receiver(pre_delete, sender=ShowTheme)
+def remember_theme_shows(sender, instance, **kwargs) -> None:
+    instance._search_show_ids = list(
+        instance.astronomy_shows.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=ShowTheme)
+def index_deleted_theme(sender, instance, **kwargs) -> None:
+    show_ids = getattr(instance, "_search_show_ids", None)
+    if show_ids:
+        search.update_search_vectors(show_ids)
+    cache.invalidate(cache.THEME_FACETS)
+
+
+@receiver(post_save, sender=ShowSession)
+@receiver(post_delete, sender=ShowSession)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_delete, sender=PlanetariumDome)
+def invalidate_calendar(sender, **kwargs) -> None:
+    schedule.invalidate_calendar()
+
+
+# No post_delete receiver for Ticket: it would keep bulk deletes from
+# using a single statement. Tickets are deleted by
+# planetarium.booking.cancel_tickets, which sends seats_released.
+@receiver(post_save, sender=Ticket)
+def invalidate_ticket_day(sender, instance, **kwargs) -> None:
+    schedule.invalidate_session_days([instance.show_session_id])
+
+
+@receiver(seats_released)
+def invalidate_released_days(sender, seats, **kwargs) -> None:
+    schedule.invalidate_session_days(seats)
+
+
+@receiver(post_save, sender=ShowSession)
+@receiver(post_delete, sender=ShowSession)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_save, sender=PriceTier)
+@receiver(post_delete, sender=PriceTier)
+def invalidate_price_tables(sender, **kwargs) -> None:
+    cache.invalidate(cache.PRICE_TABLES)
@@ -1,19 +1,57 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import Value
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from planetarium.models import PlanetariumDome, ShowTheme, AstronomyShow
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    IdempotencyKey,
+    PriceTier,
+    Reservation,
+    Ticket,
+    WaitlistEntry,
+)
+from planetarium.fast_serializers import (
+    ShowSessionValuesSerializer,
+    TicketValuesSerializer,
+)
+from planetarium import cache as planetarium_cache, seating
+from planetarium.booking import cancel_tickets, seats_released
+from planetarium.pagination import estimated_count
+from planetarium.waitlist import dispatch
 from planetarium.serializers import (
     AstronomyShowListSerializer,
     PlanetariumDomeSerializer,
+    ReservationSerializer,
     ShowThemeSerializer,
+    ShowSessionListSerializer,
+    TicketListSerializer,
 )
 
 ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
 PLANETARIUM_DOME_URL = reverse("planetarium:planetariumdome-list")
 SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+SEARCH_URL = reverse("planetarium:astronomyshow-search")
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+THEME_FACETS_URL = reverse("planetarium:showtheme-facets")
+SESSION_CALENDAR_URL = reverse("planetarium:showsession-calendar")
+TICKET_URL = reverse("planetarium:ticket-list")
+RESERVATION_URL = reverse("planetarium:reservation-list")
 
 
 def sample_astronomy_show(**params) -> AstronomyShow:
@@ -221,3 +259,1522 @@ class AdminShowsApiTests(TestCase):
         response = self.client.post(SHOW_THEME_URL, payload)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShowSearchApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.nebula = sample_astronomy_show(
+            title="Crab Nebula", description="A supernova remnant"
+        )
+        self.galaxy = sample_astronomy_show(
+            title="Andromeda", description="The nearest big galaxy"
+        )
+        self.galaxy.show_theme.add(sample_show_theme(name="Nebulae"))
+
+    def search(self, query: str, **params) -> list:
+        response = self.client.get(SEARCH_URL, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [show["id"] for show in response.data]
+
+    def test_search_ranks_title_matches_first(self) -> None:
+        self.assertEqual(
+            self.search("nebul"), [self.nebula.id, self.galaxy.id]
+        )
+
+    def test_search_matches_every_word(self) -> None:
+        self.assertEqual(self.search("crab rem"), [self.nebula.id])
+        self.assertEqual(self.search("crab galaxy"), [])
+
+    def test_search_follows_changes(self) -> None:
+        self.assertEqual(self.search("comet"), [])
+
+        self.galaxy.title = "Halley's Comet"
+        self.galaxy.save()
+        theme = ShowTheme.objects.get(name="Nebulae")
+        theme.name = "Tails"
+        theme.save()
+
+        self.assertEqual(self.search("comet"), [self.galaxy.id])
+        self.assertEqual(self.search("tail"), [self.galaxy.id])
+        self.assertEqual(self.search("nebula"), [self.nebula.id])
+
+    def test_search_limit_and_empty_query(self) -> None:
+        self.assertEqual(len(self.search("nebul", limit=1)), 1)
+        self.assertEqual(self.search(""), [])
+
+        response = self.client.get(SEARCH_URL, {"q": "a", "limit": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShowThemeFilterApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.stars = sample_show_theme(name="Stars")
+        self.planets = sample_show_theme(name="Planets")
+        sample_show_theme(name="Comets")
+        self.sun = sample_astronomy_show(title="Sun")
+        self.sun.show_theme.add(self.stars)
+        self.mars = sample_astronomy_show(title="Mars")
+        self.mars.show_theme.add(self.stars, self.planets)
+
+        dome = sample_planetarium_dome()
+        self.sessions = [
+            ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time="2024-01-01T20:00:00Z",
+            )
+            for show in (self.sun, self.mars)
+        ]
+
+    def test_filter_shows_by_theme(self) -> None:
+        response = self.client.get(
+            ASTRONOMY_SHOW_URL, {"theme": f"{self.stars.id},{self.planets.id}"}
+        )
+
+        self.assertEqual(
+            [show["title"] for show in response.data], ["Sun", "Mars"]
+        )
+
+    def test_filter_sessions_by_theme(self) -> None:
+        response = self.client.get(
+            SHOW_SESSION_URL, {"theme": str(self.planets.id)}
+        )
+
+        self.assertEqual(
+            [session["id"] for session in response.data],
+            [self.sessions[1].id],
+        )
+
+    def test_malformed_ids_rejected(self) -> None:
+        shows = self.client.get(ASTRONOMY_SHOW_URL, {"theme": "1,x"})
+        sessions = self.client.get(SHOW_SESSION_URL, {"astronomy_show": "a"})
+
+        self.assertEqual(shows.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("theme", shows.data)
+        self.assertEqual(sessions.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_theme_facets(self) -> None:
+        response = self.client.get(THEME_FACETS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(theme["name"], theme["show_count"]) for theme in response.data],
+            [("Stars", 2), ("Planets", 1), ("Comets", 0)],
+        )
+
+    def test_theme_facets_not_modified(self) -> None:
+        etag = self.client.get(THEME_FACETS_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            strong = self.client.get(THEME_FACETS_URL, HTTP_IF_NONE_MATCH=etag)
+        weak = self.client.get(
+            THEME_FACETS_URL, HTTP_IF_NONE_MATCH=f"W/{etag}"
+        )
+        sample_show_theme(name="Nebulae")
+        changed = self.client.get(THEME_FACETS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(strong.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(strong["ETag"], etag)
+        self.assertEqual(weak.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+    def test_theme_facets_follow_changes(self) -> None:
+        self.client.get(THEME_FACETS_URL)
+        self.mars.show_theme.remove(self.stars)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(THEME_FACETS_URL)
+        with self.assertNumQueries(0):
+            self.client.get(THEME_FACETS_URL)
+
+        self.assertEqual(response.data[0]["show_count"], 1)
+
+
+class SessionCalendarApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+        show = sample_astronomy_show()
+        dome = sample_planetarium_dome(rows=2, seats_in_row=5)
+        # Europe/Kiev is UTC+2 in January.
+        self.sessions = [
+            ShowSession.objects.create(
+                astronomy_show=show, planetarium_dome=dome, show_time=time
+            )
+            for time in (
+                "2024-01-01T10:00:00Z",
+                "2024-01-01T22:30:00Z",
+                "2024-01-02T12:00:00Z",
+                "2024-01-09T12:00:00Z",
+            )
+        ]
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.sessions[1],
+            reservation=reservation,
+        )
+
+    def calendar(self, **params) -> list:
+        response = self.client.get(
+            SESSION_CALENDAR_URL,
+            {"start": "2024-01-01", "end": "2024-01-31", **params},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_calendar_by_day_in_time_zone(self) -> None:
+        calendar = self.calendar()
+
+        self.assertEqual(
+            [
+                (day["date"], day["session_count"], day["tickets_left"])
+                for day in calendar
+            ],
+            [
+                ("2024-01-01", 1, 10),
+                ("2024-01-02", 2, 19),
+                ("2024-01-09", 1, 10),
+            ],
+        )
+        self.assertEqual(
+            [session["id"] for session in calendar[1]["show_sessions"]],
+            [self.sessions[1].id, self.sessions[2].id],
+        )
+        self.assertEqual(calendar[1]["show_sessions"][0]["tickets_left"], 9)
+
+    def test_calendar_by_week(self) -> None:
+        calendar = self.calendar(bucket="week")
+
+        self.assertEqual(
+            [(week["date"], week["session_count"]) for week in calendar],
+            [("2024-01-01", 3), ("2024-01-08", 1)],
+        )
+
+    def test_calendar_is_cached_until_tickets_change(self) -> None:
+        with self.assertNumQueries(1):
+            self.calendar()
+        with self.assertNumQueries(0):
+            self.calendar()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_tickets(Ticket.objects.all())
+
+        with self.assertNumQueries(1):
+            calendar = self.calendar()
+        self.assertEqual(calendar[1]["tickets_left"], 20)
+
+    def test_calendar_not_modified(self) -> None:
+        params = {"start": "2024-01-01", "end": "2024-01-31"}
+        etag = self.client.get(SESSION_CALENDAR_URL, params)["ETag"]
+
+        response = self.client.get(
+            SESSION_CALENDAR_URL, params, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_sales_keep_calendars_of_other_days(self) -> None:
+        january = self.calendar()
+        february = {"start": "2024-02-01", "end": "2024-02-29"}
+        self.calendar(**february)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                row=1,
+                seat=2,
+                show_session=self.sessions[1],
+                reservation=Reservation.objects.create(user=self.user),
+            )
+
+        with self.assertNumQueries(0):
+            self.calendar(**february)
+        with self.assertNumQueries(1):
+            calendar = self.calendar()
+        self.assertEqual(
+            calendar[1]["tickets_left"], january[1]["tickets_left"] - 1
+        )
+
+    def test_calendar_invalid_range(self) -> None:
+        for params in (
+            {"start": "2024-01-31", "end": "2024-01-01"},
+            {"start": "2024-01-01", "end": "2024-12-31"},
+            {"start": "2024-01-01"},
+        ):
+            response = self.client.get(SESSION_CALENDAR_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+        show = sample_astronomy_show()
+        show.show_theme.add(sample_show_theme())
+        self.session = ShowSession.objects.create(
+            astronomy_show=show,
+            planetarium_dome=sample_planetarium_dome(),
+            show_time="2024-01-01T20:00:00Z",
+        )
+
+    def test_fields_limit_response_and_queries(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                ASTRONOMY_SHOW_URL, {"fields": "id,title"}
+            )
+
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "id": self.session.astronomy_show_id,
+                    "title": "Astronomy Show 1",
+                }
+            ],
+        )
+
+    def test_expand_nests_related_objects(self) -> None:
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                SHOW_SESSION_URL,
+                {"fields": "id,astronomy_show", "expand": "astronomy_show"},
+            )
+
+        self.assertEqual(
+            response.data[0]["astronomy_show"],
+            {
+                "id": self.session.astronomy_show_id,
+                "title": "Astronomy Show 1",
+                "description": "Some description",
+                "show_theme": ["Show Theme 1"],
+            },
+        )
+
+    def test_unknown_fields_are_ignored(self) -> None:
+        response = self.client.get(
+            SHOW_SESSION_URL, {"fields": "id,missing", "expand": "missing"}
+        )
+
+        self.assertEqual(response.data, [{"id": self.session.id}])
+
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+
+        dome = sample_planetarium_dome()
+        reservation = Reservation.objects.create(user=self.user)
+        for index, show_time in enumerate(
+            ("2024-01-01T20:00:00Z", "2024-07-01T20:30:15.250000Z")
+        ):
+            session = ShowSession.objects.create(
+                astronomy_show=sample_astronomy_show(title=f"Show {index}"),
+                planetarium_dome=dome,
+                show_time=show_time,
+            )
+            Ticket.objects.create(
+                row=1,
+                seat=index + 1,
+                show_session=session,
+                reservation=reservation,
+            )
+
+    def assert_same_json(self, values_data, drf_data) -> None:
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(values_data), renderer.render(drf_data)
+        )
+
+    def test_session_list_matches_drf_serializer(self) -> None:
+        sessions = ShowSession.objects.annotate(tickets_left=Value(7))
+
+        self.assert_same_json(
+            ShowSessionValuesSerializer().serialize(sessions),
+            ShowSessionListSerializer(sessions, many=True).data,
+        )
+
+    def test_ticket_list_matches_drf_serializer(self) -> None:
+        tickets = Ticket.objects.all()
+
+        self.assert_same_json(
+            TicketValuesSerializer().serialize(tickets),
+            TicketListSerializer(tickets, many=True).data,
+        )
+
+    def test_list_endpoints_use_values(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get(TICKET_URL, {"fields": "id,created_at"})
+
+        # Plain dicts, not the OrderedDicts of DRF serializers.
+        self.assertIs(type(response.data[0]), dict)
+        self.assertEqual(list(response.data[0]), ["id", "created_at"])
+
+
+class IdempotencyKeyApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=sample_planetarium_dome(),
+            show_time="2024-01-01T20:00:00Z",
+        )
+        self.payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                {"row": 1, "seat": 2, "show_session": self.session.id},
+            ]
+        }
+
+    def reserve(self, key: str, payload: dict = None):
+        return self.client.post(
+            RESERVATION_URL,
+            payload or self.payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_anonymous_key_rejected(self) -> None:
+        self.client.force_authenticate(user=None)
+
+        response = self.reserve("anonymous")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_retry_returns_first_response(self) -> None:
+        first = self.reserve("retry-1")
+        with self.assertNumQueries(1):
+            retry = self.reserve("retry-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_ticket_retry_returns_first_response(self) -> None:
+        ticket = {"row": 2, "seat": 3, "show_session": self.session.id}
+        first = self.client.post(
+            TICKET_URL, ticket, format="json", HTTP_IDEMPOTENCY_KEY="t-1"
+        )
+        retry = self.client.post(
+            TICKET_URL, ticket, format="json", HTTP_IDEMPOTENCY_KEY="t-1"
+        )
+
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_key_reused_with_other_body(self) -> None:
+        self.reserve("reused")
+        other = {
+            "tickets": [{"row": 5, "seat": 5, "show_session": self.session.id}]
+        }
+
+        response = self.reserve("reused", other)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_concurrent_request_with_key_in_progress(self) -> None:
+        IdempotencyKey.objects.create(
+            user=self.user, key="busy", fingerprint="first request"
+        )
+
+        response = self.reserve("busy")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_key_of_dead_request_released(self) -> None:
+        IdempotencyKey.objects.create(
+            user=self.user, key="dead", fingerprint="first request"
+        )
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        response = self.reserve("dead")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_key_runs_again(self) -> None:
+        self.reserve("old")
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        Ticket.objects.all().delete()
+
+        response = self.reserve("old")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_keys_are_scoped_to_user(self) -> None:
+        self.reserve("shared")
+        other_user = get_user_model().objects.create_user(
+            email="other@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=other_user)
+
+        response = self.reserve("shared")
+
+        # Not replayed: the seats are taken by the first user.
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_failed_request_is_not_stored(self) -> None:
+        self.reserve("first")
+        failed = self.reserve("second")
+        Ticket.objects.all().delete()
+
+        retry = self.reserve("second")
+
+        self.assertEqual(failed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+
+
+class TicketPurchaseTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=sample_planetarium_dome(),
+            show_time="2024-01-01T20:00:00Z",
+        )
+
+    def count_writes(self, url: str, payload: dict) -> tuple:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, payload, format="json")
+        writes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        return response, writes
+
+    def test_single_ticket_purchase_writes(self) -> None:
+        response, writes = self.count_writes(
+            TICKET_URL, {"row": 1, "seat": 1, "show_session": self.session.id}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(writes), 2)
+        reservation = Reservation.objects.get(user=self.user)
+        self.assertEqual(response.data["reservation"], reservation.id)
+        self.assertEqual(response.data["id"], reservation.tickets.get().id)
+
+    def test_reservation_writes_tickets_in_one_insert(self) -> None:
+        tickets = [
+            {"row": 1, "seat": seat, "show_session": self.session.id}
+            for seat in range(1, 6)
+        ]
+
+        response, writes = self.count_writes(
+            RESERVATION_URL, {"tickets": tickets}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(len(response.data["tickets"]), 5)
+        self.assertEqual(Ticket.objects.count(), 5)
+
+    def test_seat_sold_meanwhile_rejected(self) -> None:
+        with mock.patch.object(
+            Ticket.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            response = self.client.post(
+                TICKET_URL,
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data,
+            {"non_field_errors": ["This seat is already taken."]},
+        )
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_same_seat_twice_rejected(self) -> None:
+        ticket = {"row": 1, "seat": 3, "show_session": self.session.id}
+
+        response = self.client.post(
+            RESERVATION_URL, {"tickets": [ticket, ticket]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_delete_empty_reservations(self) -> None:
+        kept = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.session, reservation=kept
+        )
+        recent = Reservation.objects.create(user=self.user)
+        for _ in range(3):
+            Reservation.objects.create(user=self.user)
+        Reservation.objects.exclude(pk__in=[kept.pk, recent.pk]).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        kept.created_at = timezone.now() - timedelta(days=1)
+        kept.save()
+
+        call_command(
+            "delete_empty_reservations", batch_size=2, stdout=StringIO()
+        )
+
+        self.assertQuerySetEqual(
+            Reservation.objects.order_by("pk"),
+            [kept, recent],
+        )
+
+
+class WaitlistApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{index}@user.com", password="testpass123"
+            )
+            for index in range(3)
+        ]
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=sample_planetarium_dome(rows=1, seats_in_row=2),
+            show_time=timezone.now() + timedelta(days=1),
+        )
+        reservation = Reservation.objects.create(user=self.users[0])
+        self.tickets = [
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=self.session,
+                reservation=reservation,
+            )
+            for seat in (1, 2)
+        ]
+        self.url = reverse(
+            "planetarium:showsession-waitlist", args=[self.session.id]
+        )
+
+    def join(self, user, seats: int = 1):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.url, {"seats": seats})
+
+    def test_join_in_order(self) -> None:
+        first = self.join(self.users[1])
+        second = self.join(self.users[2])
+        again = self.join(self.users[2])
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data["position"], 1)
+        self.assertEqual(second.data["position"], 2)
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["id"], second.data["id"])
+
+    def test_join_with_free_seats(self) -> None:
+        self.tickets[0].delete()
+
+        response = self.join(self.users[1])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_check_and_leave(self) -> None:
+        self.join(self.users[1])
+        self.join(self.users[2])
+
+        left = self.client.delete(self.url)
+        self.client.force_authenticate(user=self.users[1])
+        checked = self.client.get(self.url)
+        self.client.force_authenticate(user=self.users[2])
+        missing = self.client.get(self.url)
+
+        self.assertEqual(left.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(checked.data["position"], 1)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_dispatch_offers_released_seats_in_order(self) -> None:
+        self.join(self.users[1])
+        self.join(self.users[2])
+        self.assertEqual(dispatch(), 0)
+
+        self.tickets[0].delete()
+
+        self.assertEqual(dispatch(), 1)
+        self.assertEqual(dispatch(), 0)
+        first, second = WaitlistEntry.objects.all()
+        self.assertIsNotNone(first.offered_at)
+        self.assertIsNone(first.position)
+        self.assertIsNone(second.offered_at)
+        self.assertEqual(second.position, 1)
+
+    def test_dispatch_drops_expired_and_served_entries(self) -> None:
+        self.join(self.users[1])
+        self.join(self.users[2])
+        self.tickets[0].delete()
+        dispatch()
+        WaitlistEntry.objects.filter(user=self.users[1]).update(
+            offered_at=timezone.now() - timedelta(days=1)
+        )
+        self.session.holds.update(expires_at=timezone.now())
+
+        self.assertEqual(dispatch(), 1)
+        self.assertEqual(WaitlistEntry.objects.get().user, self.users[2])
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.session,
+            reservation=Reservation.objects.create(user=self.users[2]),
+        )
+        dispatch()
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_offered_seats_held_for_offered_user(self) -> None:
+        self.join(self.users[1])
+        self.tickets[0].delete()
+        dispatch()
+        ticket = {"row": 1, "seat": 1, "show_session": self.session.id}
+
+        self.client.force_authenticate(user=self.users[2])
+        rejected = self.client.post(TICKET_URL, ticket)
+        self.client.force_authenticate(user=self.users[1])
+        bought = self.client.post(TICKET_URL, ticket)
+
+        self.assertEqual(rejected.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(bought.status_code, status.HTTP_201_CREATED)
+
+    def test_earlier_tickets_keep_entry(self) -> None:
+        self.join(self.users[0])
+        self.tickets[0].delete()
+
+        self.assertEqual(dispatch(), 1)
+        self.assertTrue(WaitlistEntry.objects.exists())
+
+    def test_position_lookup_uses_queue_index(self) -> None:
+        self.join(self.users[1])
+        entry = WaitlistEntry.objects.get()
+
+        plan = WaitlistEntry.objects.filter(
+            show_session_id=entry.show_session_id,
+            offered_at__isnull=True,
+            created_at__lt=entry.created_at,
+        ).explain()
+
+        self.assertIn("waitlist_queue_idx", plan)
+
+
+class ReservationCancelApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        dome = sample_planetarium_dome()
+        self.sessions = [
+            ShowSession.objects.create(
+                astronomy_show=sample_astronomy_show(),
+                planetarium_dome=dome,
+                show_time=timezone.now() + timedelta(days=days),
+            )
+            for days in (1, 2)
+        ]
+        self.reservation = Reservation.objects.create(user=self.user)
+        self.tickets = [
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=session,
+                reservation=self.reservation,
+            )
+            for session in self.sessions
+            for seat in (1, 2, 3)
+        ]
+        self.cancel_url = reverse(
+            "planetarium:reservation-cancel", args=[self.reservation.id]
+        )
+
+    def test_cancel_some_tickets(self) -> None:
+        released = []
+        seats_released.connect(
+            lambda sender, seats, **kwargs: released.append(seats),
+            weak=False,
+            dispatch_uid="test_cancel_some_tickets",
+        )
+        self.addCleanup(
+            seats_released.disconnect,
+            dispatch_uid="test_cancel_some_tickets",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.cancel_url,
+                {"tickets": [ticket.id for ticket in self.tickets[2:4]]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["tickets"]), 4)
+        self.assertEqual(
+            released,
+            [{self.sessions[0].id: 1, self.sessions[1].id: 1}],
+        )
+
+    def test_cancel_deletes_tickets_in_one_statement(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(
+                reverse(
+                    "planetarium:reservation-detail",
+                    args=[self.reservation.id],
+                )
+            )
+
+        deletes = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("DELETE")
+            and "planetarium_ticket" in query["sql"].split("WHERE")[0]
+        ]
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_cancel_all_tickets_deletes_reservation(self) -> None:
+        response = self.client.post(
+            self.cancel_url,
+            {"tickets": [ticket.id for ticket in self.tickets]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_cancel_invalid_tickets(self) -> None:
+        other = Reservation.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            row=5, seat=5, show_session=self.sessions[0], reservation=other
+        )
+
+        response = self.client.post(
+            self.cancel_url, {"tickets": [ticket.id]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 7)
+
+    def test_cancel_started_session(self) -> None:
+        self.sessions[0].show_time = timezone.now() - timedelta(hours=1)
+        self.sessions[0].save()
+
+        response = self.client.post(self.cancel_url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 6)
+
+    def test_cancel_other_users_reservation(self) -> None:
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_user(
+                email="other@user.com", password="testpass123"
+            )
+        )
+
+        response = self.client.post(self.cancel_url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Ticket.objects.count(), 6)
+
+    def test_cancel_requires_authentication(self) -> None:
+        self.client.force_authenticate(user=None)
+
+        cancelled = self.client.post(self.cancel_url)
+        deleted = self.client.delete(
+            reverse(
+                "planetarium:reservation-detail", args=[self.reservation.id]
+            )
+        )
+
+        self.assertEqual(cancelled.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(deleted.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Ticket.objects.count(), 6)
+
+    def test_cancel_invalidates_calendar_days(self) -> None:
+        calendar = planetarium_cache.SESSION_CALENDAR
+        days = [
+            timezone.localtime(session.show_time).date().isoformat()
+            for session in self.sessions
+        ]
+        other_day = (timezone.localdate() + timedelta(days=10)).isoformat()
+        versions = planetarium_cache.get_part_versions(
+            calendar, [*days, other_day]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                self.cancel_url, {"tickets": [self.tickets[0].id]}
+            )
+        changed = planetarium_cache.get_part_versions(
+            calendar, [*days, other_day]
+        )
+
+        self.assertNotEqual(changed[0], versions[0])
+        self.assertEqual(changed[1:], versions[1:])
+
+
+class PricingApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        dome = sample_planetarium_dome(rows=4, seats_in_row=5)
+        PriceTier.objects.create(
+            planetarium_dome=dome, first_row=1, last_row=2, price="20.00"
+        )
+        PriceTier.objects.create(
+            planetarium_dome=dome, first_row=3, last_row=3, price="15.00"
+        )
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=dome,
+            show_time=timezone.now() + timedelta(days=1),
+            price_modifier="1.50",
+        )
+        self.prices_url = reverse(
+            "planetarium:showsession-prices", args=[self.session.id]
+        )
+
+    def sell(self, tickets: int) -> None:
+        sold = Ticket.objects.count()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.bulk_create(
+            Ticket(
+                row=index // 5 + 1,
+                seat=index % 5 + 1,
+                show_session=self.session,
+                reservation=reservation,
+            )
+            for index in range(sold, sold + tickets)
+        )
+
+    def test_prices_by_row(self) -> None:
+        response = self.client.get(self.prices_url)
+
+        self.assertEqual(response.data["surge"], "1.00")
+        self.assertEqual(
+            [row["price"] for row in response.data["rows"]],
+            ["30.00", "30.00", "22.50", "15.00"],
+        )
+
+    @override_settings(PRICE_SURGE=((0.5, "1.10"), (0.75, "1.20")))
+    def test_surge_by_occupancy(self) -> None:
+        self.sell(10)
+        half = self.client.get(self.prices_url).data
+        self.sell(5)
+        full = self.client.get(self.prices_url).data
+
+        self.assertEqual(half["surge"], "1.10")
+        self.assertEqual(half["rows"][0]["price"], "33.00")
+        self.assertEqual(full["surge"], "1.20")
+        self.assertEqual(full["rows"][3]["price"], "18.00")
+
+    def test_price_table_is_cached_until_tiers_change(self) -> None:
+        self.client.get(self.prices_url)
+        with self.assertNumQueries(3):
+            self.client.get(self.prices_url)
+
+        tier = PriceTier.objects.get(first_row=3)
+        tier.price = "5.00"
+        tier.save()
+
+        response = self.client.get(self.prices_url)
+        self.assertEqual(response.data["rows"][2]["price"], "7.50")
+
+    def test_reservation_prices_and_total(self) -> None:
+        response = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "show_session": self.session.id},
+                    {"row": 4, "seat": 1, "show_session": self.session.id},
+                ]
+            },
+            format="json",
+        )
+        listed = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["total_price"], "45.00")
+        self.assertEqual(
+            [ticket["price"] for ticket in response.data["tickets"]],
+            ["30.00", "15.00"],
+        )
+        self.assertEqual(listed.data["results"][0]["total_price"], "45.00")
+
+    def test_reservations_listed_newest_first(self) -> None:
+        self.sell(1)
+        self.sell(2)
+        newest, oldest = Reservation.objects.order_by("id")
+        Reservation.objects.filter(pk=oldest.pk).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+
+        listed = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(
+            [reservation["id"] for reservation in listed.data["results"]],
+            [newest.id, oldest.id],
+        )
+
+
+class BestSeatsApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=sample_planetarium_dome(rows=5, seats_in_row=10),
+            show_time=timezone.now() + timedelta(days=1),
+        )
+        self.url = reverse(
+            "planetarium:showsession-best-seats", args=[self.session.id]
+        )
+
+    def take(self, row: int, *seats) -> None:
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in seats:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                show_session=self.session,
+                reservation=reservation,
+            )
+
+    def find(self, **params) -> list:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(seat["row"], seat["seat"]) for seat in response.data["seats"]]
+
+    def test_centre_block(self) -> None:
+        self.assertEqual(
+            self.find(party_size=4), [(3, 4), (3, 5), (3, 6), (3, 7)]
+        )
+
+    def test_block_avoids_taken_seats(self) -> None:
+        self.take(3, 5, 6)
+
+        self.assertEqual(
+            self.find(party_size=4), [(2, 4), (2, 5), (2, 6), (2, 7)]
+        )
+        self.assertEqual(
+            self.find(party_size=2, centre="false"), [(1, 1), (1, 2)]
+        )
+
+    def test_scattered_seats(self) -> None:
+        for row in range(1, 6):
+            self.take(row, 3, 6, 9)
+
+        self.assertEqual(self.find(party_size=3), [])
+        self.assertEqual(
+            self.find(party_size=3, together="false"),
+            [(2, 5), (3, 4), (3, 5)],
+        )
+
+    def test_seats_off_a_smaller_grid_ignored(self) -> None:
+        self.take(1, 10)
+        self.take(5, 1)
+        PlanetariumDome.objects.update(rows=4, seats_in_row=9, capacity=36)
+        self.session.refresh_from_db()
+
+        self.assertEqual(len(self.find(party_size=9)), 9)
+
+    def test_invalid_party_size(self) -> None:
+        response = self.client.get(self.url, {"party_size": 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_seats(self) -> None:
+        response = self.client.post(self.url, {"party_size": 2})
+        held = [(seat["row"], seat["seat"]) for seat in response.data["seats"]]
+        other = get_user_model().objects.create_user(
+            email="other@user.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=other)
+        other_seats = self.find(party_size=2)
+        rejected = self.client.post(
+            TICKET_URL,
+            {"row": 3, "seat": 5, "show_session": self.session.id},
+        )
+        self.client.force_authenticate(user=self.user)
+        bought = self.client.post(
+            TICKET_URL,
+            {"row": 3, "seat": 5, "show_session": self.session.id},
+        )
+
+        self.assertIsNotNone(response.data["held_until"])
+        self.assertEqual(held, [(3, 5), (3, 6)])
+        self.assertNotIn(held[0], other_seats)
+        self.assertEqual(rejected.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            rejected.data,
+            {"non_field_errors": ["This seat is held by another user."]},
+        )
+        self.assertEqual(bought.status_code, status.HTTP_201_CREATED)
+        # The hold of the bought seat is released, the other one is kept.
+        self.assertEqual(
+            list(self.session.holds.values_list("row", "seat")), [(3, 6)]
+        )
+
+    def test_seats_sold_before_the_lock_not_held(self) -> None:
+        lock_sessions = seating.lock_sessions
+
+        def sell_centre_then_lock(show_session_ids) -> None:
+            self.take(3, 5, 6)
+            lock_sessions(show_session_ids)
+
+        with mock.patch.object(
+            seating, "lock_sessions", side_effect=sell_centre_then_lock
+        ):
+            seats, _ = seating.hold_seats(
+                self.session, self.user, party_size=2
+            )
+
+        self.assertEqual(seats, [(2, 5), (2, 6)])
+
+    def test_new_hold_replaces_previous(self) -> None:
+        self.client.post(self.url, {"party_size": 2})
+        self.client.post(self.url, {"party_size": 3})
+
+        self.assertEqual(self.session.holds.count(), 3)
+
+
+class DomeLayoutApiTests(TestCase):
+    LAYOUT = "..SS.SS../SSSS.SSSS/WSSS.SSSW"
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.dome = sample_planetarium_dome(
+            name="Layout Dome", rows=1, seats_in_row=1, layout=self.LAYOUT
+        )
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=self.dome,
+            show_time=timezone.now() + timedelta(days=1),
+        )
+
+    def test_dimensions_and_capacity_follow_layout(self) -> None:
+        self.assertEqual((self.dome.rows, self.dome.seats_in_row), (3, 9))
+        self.assertEqual(self.dome.capacity, 20)
+        self.assertEqual(sample_planetarium_dome().capacity, 50)
+
+    def test_create_dome_with_layout(self) -> None:
+        response = self.client.post(
+            PLANETARIUM_DOME_URL, {"name": "New Dome", "layout": "SS/S.S/SSS"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["rows"], 3)
+        self.assertEqual(response.data["seats_in_row"], 3)
+        self.assertEqual(response.data["capacity"], 7)
+
+    def test_dimensions_conflicting_with_layout_rejected(self) -> None:
+        response = self.client.post(
+            PLANETARIUM_DOME_URL,
+            {"name": "New Dome", "layout": "SS/S.S/SSS", "rows": 2},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("rows", response.data)
+
+    def test_stale_capacity_rejected(self) -> None:
+        dome = sample_planetarium_dome()
+
+        with self.assertRaises(IntegrityError):
+            PlanetariumDome.objects.filter(pk=dome.pk).update(rows=2)
+
+    def test_invalid_layout_rejected(self) -> None:
+        for payload in (
+            {"name": "Bad Dome", "layout": "SSX/SS"},
+            {"name": "Bad Dome", "layout": "SS//SS"},
+            {"name": "Bad Dome", "layout": "..."},
+            {"name": "Bad Dome", "rows": 3},
+        ):
+            response = self.client.post(PLANETARIUM_DOME_URL, payload)
+
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, payload
+            )
+
+    def test_ticket_for_aisle_rejected(self) -> None:
+        aisle = self.client.post(
+            TICKET_URL,
+            {"row": 1, "seat": 5, "show_session": self.session.id},
+        )
+        past_short_row = self.client.post(
+            TICKET_URL,
+            {"row": 1, "seat": 9, "show_session": self.session.id},
+        )
+        wheelchair = self.client.post(
+            TICKET_URL,
+            {"row": 3, "seat": 1, "show_session": self.session.id},
+        )
+
+        self.assertEqual(aisle.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            past_short_row.status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(wheelchair.status_code, status.HTTP_201_CREATED)
+
+    def test_best_seats_skip_aisles_and_wheelchair_spaces(self) -> None:
+        url = reverse(
+            "planetarium:showsession-best-seats", args=[self.session.id]
+        )
+
+        block = self.client.get(url, {"party_size": 4})
+        scattered = self.client.get(
+            url, {"party_size": 20, "together": "false"}
+        )
+
+        self.assertEqual(
+            [(seat["row"], seat["seat"]) for seat in block.data["seats"]],
+            [(2, 1), (2, 2), (2, 3), (2, 4)],
+        )
+        self.assertEqual(scattered.data["seats"], [])
+
+    def test_tickets_left_counts_layout_seats(self) -> None:
+        response = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(response.data[0]["tickets_left"], 20)
+
+
+class TicketValidationQueryTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@user.com", password="testpass123"
+        )
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(),
+            planetarium_dome=sample_planetarium_dome(rows=10, seats_in_row=10),
+            show_time=timezone.now() + timedelta(days=1),
+        )
+
+    def validate(self, tickets: list) -> tuple:
+        serializer = ReservationSerializer(data={"tickets": tickets})
+        with CaptureQueriesContext(connection) as queries:
+            valid = serializer.is_valid()
+        return (
+            valid,
+            serializer,
+            [
+                query["sql"]
+                for query in queries.captured_queries
+                if 'FROM "planetarium_showsession"' in query["sql"]
+                or 'FROM "planetarium_planetariumdome"' in query["sql"]
+            ],
+        )
+
+    def test_sessions_loaded_once_per_reservation(self) -> None:
+        tickets = [
+            {"row": 1, "seat": seat, "show_session": self.session.id}
+            for seat in range(1, 11)
+        ]
+
+        valid, _, session_queries = self.validate(tickets)
+
+        self.assertTrue(valid)
+        self.assertEqual(len(session_queries), 1)
+
+    def test_unknown_session_rejected(self) -> None:
+        valid, serializer, _ = self.validate(
+            [
+                {"row": 1, "seat": 1, "show_session": self.session.id},
+                {"row": 1, "seat": 2, "show_session": 0},
+                {"row": 1, "seat": 3, "show_session": "x"},
+            ]
+        )
+
+        self.assertFalse(valid)
+        errors = serializer.errors["tickets"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1]["show_session"][0].code, "does_not_exist")
+        self.assertEqual(errors[2]["show_session"][0].code, "incorrect_type")
+
+    def test_admin_change_lists_constant_queries(self) -> None:
+        self.client.force_login(self.user)
+        reservation = Reservation.objects.create(user=self.user)
+        ticket_url = reverse("admin:planetarium_ticket_changelist")
+        session_url = reverse("admin:planetarium_showsession_changelist")
+
+        def query_counts() -> tuple:
+            counts = []
+            for url in (ticket_url, session_url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                counts.append(len(queries))
+            return tuple(counts)
+
+        Ticket.objects.create(
+            row=1, seat=1, show_session=self.session, reservation=reservation
+        )
+        few = query_counts()
+        for index in range(2, 31):
+            show_session = ShowSession.objects.create(
+                astronomy_show=sample_astronomy_show(title=f"Show {index}"),
+                planetarium_dome=self.session.planetarium_dome,
+                show_time=timezone.now() + timedelta(days=index),
+            )
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                show_session=show_session,
+                reservation=reservation,
+            )
+
+        self.assertEqual(query_counts(), few)
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@user.com", password="testpass123"
+        )
+        self.client.force_login(self.user)
+        self.session = ShowSession.objects.create(
+            astronomy_show=sample_astronomy_show(title="Northern Lights"),
+            planetarium_dome=sample_planetarium_dome(),
+            show_time=timezone.now() + timedelta(days=1),
+            price_modifier="1.50",
+        )
+        self.reservations = [
+            Reservation.objects.create(user=self.user) for _ in range(3)
+        ]
+        for index, reservation in enumerate(self.reservations):
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    row=index + 1,
+                    seat=seat,
+                    show_session=self.session,
+                    reservation=reservation,
+                )
+
+    def run_action(self, model: str, action: str, ids: list) -> list:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse(f"admin:planetarium_{model}_changelist"),
+                {"action": action, "_selected_action": ids},
+            )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("UPDATE", "DELETE"))
+        ]
+
+    def test_change_list_counts_from_estimate(self) -> None:
+        url = reverse("admin:planetarium_ticket_changelist")
+        with mock.patch(
+            "planetarium.pagination.table_estimate", return_value=2_000_000
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            filtered = self.client.get(
+                reverse("admin:planetarium_reservation_changelist"),
+                {"q": "nobody"},
+            )
+
+        self.assertEqual(response.context["cl"].result_count, 2_000_000)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+        self.assertEqual(filtered.context["cl"].result_count, 0)
+
+    def test_small_tables_counted_exactly(self) -> None:
+        with mock.patch(
+            "planetarium.pagination.table_estimate", return_value=10
+        ):
+            response = self.client.get(
+                reverse("admin:planetarium_ticket_changelist")
+            )
+
+        self.assertEqual(response.context["cl"].result_count, 6)
+
+    def test_cancel_reservations_in_single_statements(self) -> None:
+        writes = self.run_action(
+            "reservation",
+            "cancel_reservations",
+            [reservation.id for reservation in self.reservations[:2]],
+        )
+
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_cancel_tickets_in_single_statement(self) -> None:
+        ids = list(Ticket.objects.filter(seat=1).values_list("id", flat=True))
+
+        writes = self.run_action("ticket", "cancel_selected_tickets", ids)
+
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    def test_cancel_tickets_deletes_emptied_reservations(self) -> None:
+        ids = list(
+            self.reservations[0].tickets.values_list("id", flat=True)
+        ) + [self.reservations[1].tickets.first().id]
+
+        self.run_action("ticket", "cancel_selected_tickets", ids)
+
+        self.assertEqual(
+            list(Reservation.objects.order_by("id")), self.reservations[1:]
+        )
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    def test_reset_price_modifier(self) -> None:
+        writes = self.run_action(
+            "showsession", "reset_price_modifier", [self.session.id]
+        )
+        self.session.refresh_from_db()
+
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.session.price_modifier, 1)
+
+    def test_delete_selected_disabled_for_large_tables(self) -> None:
+        response = self.client.get(
+            reverse("admin:planetarium_ticket_changelist")
+        )
+        actions = [
+            choice[0]
+            for choice in response.context["action_form"]
+            .fields["action"]
+            .choices
+        ]
+
+        self.assertNotIn("delete_selected", actions)
+        self.assertIn("cancel_selected_tickets", actions)
+
+    def test_show_session_autocomplete(self) -> None:
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "planetarium",
+                "model_name": "ticket",
+                "field_name": "show_session",
+                "term": "northern",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["id"] for result in response.json()["results"]],
+            [str(self.session.id)],
+        )
+
+
+class EstimatedCountPaginationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com",
+            password="testpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        for _ in range(5):
+            Reservation.objects.create(user=self.user)
+
+    def test_small_counts_exact(self) -> None:
+        response = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(response.data["count"], 5)
+        self.assertFalse(response.data["count_approximate"])
+        self.assertEqual(len(response.data["results"]), 3)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=5)
+    def test_large_counts_reused(self) -> None:
+        first = self.client.get(RESERVATION_URL)
+        Reservation.objects.create(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(RESERVATION_URL, {"page": 2})
+
+        self.assertEqual(first.data["count"], 5)
+        self.assertFalse(first.data["count_approximate"])
+        self.assertEqual(second.data["count"], 5)
+        self.assertTrue(second.data["count_approximate"])
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_unfiltered_tables_use_planner_estimate(self) -> None:
+        with mock.patch(
+            "planetarium.pagination.table_estimate", return_value=10**7
+        ) as table_estimate:
+            unfiltered = estimated_count(Reservation.objects.all())
+            filtered = estimated_count(
+                Reservation.objects.filter(user=self.user)
+            )
+
+        self.assertEqual(unfiltered, (10**7, True))
+        self.assertEqual(filtered, (5, False))
+        table_estimate.assert_called_once()
@@ -0,0 +1,55 @@
+"""
+Seat validation of tickets against the domes of their sessions.
+
+Checking a ticket needs the dimensions and seat index of the dome of its
+session, which reached through ``ticket.show_session.planetarium_dome``
+costs two queries per ticket. ``SessionDomes`` is a per-request memo of
+show sessions with their domes, shared through the serializer context:
+a reservation loads the sessions of all its tickets in one query, and
+each ticket is then checked without touching the database.
+"""
+
+from planetarium.models import ShowSession, Ticket
+
+CONTEXT_KEY = "session_domes"
+
+
+class SessionDomes:
+    """Show sessions by id, loaded together with their domes."""
+
+    def __init__(self) -> None:
+        self._sessions = {}
+
+    def load(self, session_ids) -> None:
+        missing = set()
+        for session_id in session_ids:
+            try:
+                missing.add(int(session_id))
+            except (TypeError, ValueError):
+                continue
+        missing -= self._sessions.keys()
+        if missing:
+            self._sessions.update(
+                ShowSession.objects.select_related("planetarium_dome").in_bulk(
+                    missing
+                )
+            )
+            # Remember unknown ids too, so they are not looked up again.
+            for session_id in missing - self._sessions.keys():
+                self._sessions[session_id] = None
+
+    def get(self, session_id: int):
+        """The session with its dome, None if it does not exist."""
+        self.load([session_id])
+        return self._sessions[session_id]
+
+    def validate(self, session_id: int, row: int, seat: int) -> None:
+        Ticket.validate_place(self.get(session_id).planetarium_dome, row, seat)
+
+
+def session_domes(context: dict) -> SessionDomes:
+    """The memo of a request, kept in the serializer ``context``."""
+    memo = context.get(CONTEXT_KEY)
+    if memo is None:
+        memo = context[CONTEXT_KEY] = SessionDomes()
+    return memo
@@ -1,13 +1,28 @@
 from typing import Type, List
 
-from django.db.models import Count, F, QuerySet
+from django.db.models import Count, F, QuerySet, Sum
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from planetarium_api import metrics
+from planetarium import cache, seating
+from planetarium.booking import cancel_reservation, create_reservation
+from planetarium.fast_serializers import (
+    ShowSessionValuesSerializer,
+    TicketValuesSerializer,
+    ValuesListMixin,
+)
+from planetarium.fieldsets import SparseFieldsViewSetMixin
+from planetarium.idempotency import IdempotentCreateMixin
+from planetarium.pagination import EstimatedCountPagination
+from planetarium.pricing import quote
+from planetarium.schedule import calendar_days, session_calendar
+from planetarium.search import search_shows
+from planetarium.waitlist import free_seats
 from planetarium.models import (
     AstronomyShow,
     ShowTheme,
@@ -15,92 +30,244 @@ from planetarium.models import (
     PlanetariumDome,
     Ticket,
     Reservation,
+    WaitlistEntry,
 )
 from planetarium.permissions import (
     IsAdminOrIfAuthenticatedReadOnly,
     CanCreateAndRead,
+    CanCreateReadAndCancel,
 )
 from planetarium.serializers import (
     AstronomyShowSerializer,
     AstronomyShowListSerializer,
     AstronomyShowDetailSerializer,
+    AstronomyShowSearchSerializer,
     ShowThemeSerializer,
+    ShowThemeFacetSerializer,
     ShowSessionSerializer,
     ShowSessionListSerializer,
     ShowSessionDetailSerializer,
+    SessionCalendarQuerySerializer,
+    SessionCalendarSerializer,
+    SessionPricesSerializer,
+    BestSeatsQuerySerializer,
+    BestSeatsSerializer,
     PlanetariumDomeSerializer,
     PlanetariumDomeDetailSerializer,
     PlanetariumDomeImageSerializer,
     TicketSerializer,
     TicketDetailSerializer,
     TicketListSerializer,
+    TicketPurchaseSerializer,
     ReservationSerializer,
+    ReservationCancelSerializer,
     ReservationListSerializer,
     ReservationDetailSerializer,
+    WaitlistEntrySerializer,
+)
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+THEME_PARAMETER = OpenApiParameter(
+    name="theme",
+    type={"type": "list", "items": {"type": "number"}},
+    description="Filter by show theme id (ex. theme=1,2,3)",
 )
 
+SESSION_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="astronomy_show",
+        type={"type": "list", "items": {"type": "number"}},
+        description="Filter by astronomy show id (ex. astronomy_show=1,2,3)",
+    ),
+    OpenApiParameter(
+        name="planetarium_dome",
+        type={"type": "list", "items": {"type": "number"}},
+        description="Filter by planetarium dome id (ex. planetarium_dome=1,2,3)",
+    ),
+    THEME_PARAMETER,
+]
+
+
+def cached_response(data, etag: str) -> Response:
+    if data is cache.NOT_MODIFIED:
+        return Response(
+            status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(data, headers={"ETag": etag})
+
+
+def params_to_ints(qs: str, param: str) -> List[int]:
+    try:
+        return [int(str_id) for str_id in qs.split(",")]
+    except ValueError:
+        raise ValidationError(
+            {param: "Must be a comma separated list of ids."}
+        )
+
+
+def filter_by_themes(
+    queryset: QuerySet, theme_ids: List[int], show_field: str = "pk"
+) -> QuerySet:
+    """
+    Keep rows whose show has any of the themes.
+
+    A semi-join on the M2M table by its (showtheme_id, astronomyshow_id)
+    index, so rows are not repeated and need no DISTINCT.
+    """
+    show_ids = AstronomyShow.show_theme.through.objects.filter(
+        showtheme_id__in=theme_ids
+    ).values("astronomyshow_id")
+    return queryset.filter(**{f"{show_field}__in": show_ids})
+
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
-    queryset = AstronomyShow.objects.prefetch_related("show_theme")
+class AstronomyShowViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
+    queryset = AstronomyShow.objects.all()
     serializer_class = AstronomyShowSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self) -> QuerySet:
+        queryset = self.queryset
+        theme = self.request.query_params.get("theme", None)
+
+        if theme and self.action == "list":
+            queryset = filter_by_themes(
+                queryset, params_to_ints(theme, "theme")
+            )
+
+        return self.optimize_queryset(queryset)
+
     def get_serializer_class(self) -> Type[AstronomyShowSerializer]:
         if self.action == "list":
             return AstronomyShowListSerializer
         if self.action == "retrieve":
             return AstronomyShowDetailSerializer
+        if self.action == "search":
+            return AstronomyShowSearchSerializer
         return self.serializer_class
 
+    @extend_schema(parameters=[THEME_PARAMETER])
+    def list(self, request, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Words to look for in show titles, descriptions "
+                "and theme names, matched as prefixes (ex. q=black hol)",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description=f"Maximum number of shows "
+                f"(default {SEARCH_LIMIT}, at most {MAX_SEARCH_LIMIT})",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def search(self, request) -> Response:
+        """Shows matching every word of the query, best match first"""
+        try:
+            limit = int(request.query_params.get("limit", SEARCH_LIMIT))
+        except ValueError:
+            return Response(
+                {"limit": ["A valid integer is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+
+        shows = search_shows(request.query_params.get("q", ""), limit)
+        serializer = self.get_serializer(shows, many=True)
+        return Response(serializer.data)
+
 
-class ShowThemeViewSet(viewsets.ModelViewSet):
+class ShowThemeViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self) -> QuerySet:
+        return self.optimize_queryset(self.queryset)
+
+    def get_serializer_class(self) -> Type[ShowThemeSerializer]:
+        if self.action == "facets":
+            return ShowThemeFacetSerializer
+        return self.serializer_class
+
+    @action(methods=["GET"], detail=False)
+    def facets(self, request) -> Response:
+        """Number of astronomy shows of every theme, most used first"""
+
+        def count_shows() -> list:
+            themes = (
+                ShowTheme.objects.annotate(show_count=Count("astronomy_shows"))
+                .values("id", "name", "show_count")
+                .order_by("-show_count", "name")
+            )
+            return self.get_serializer(themes, many=True).data
+
+        data, etag = cache.cached_with_etag(
+            cache.THEME_FACETS,
+            "all",
+            count_shows,
+            if_none_match=request.headers.get("If-None-Match"),
+        )
+        return cached_response(data, etag)
+
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
+class ShowSessionViewSet(
+    ValuesListMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet
+):
     queryset = ShowSession.objects.all()
     serializer_class = ShowSessionSerializer
+    values_serializer_class = ShowSessionValuesSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
-    @staticmethod
-    def _params_to_ints(qs: Type[QuerySet]) -> List[int]:
-        return [int(str_id) for str_id in qs.split(",")]
-
     def get_queryset(self) -> QuerySet:
         queryset = self.queryset
         planetarium_dome = self.request.query_params.get(
             "planetarium_dome", None
         )
         astronomy_show = self.request.query_params.get("astronomy_show", None)
+        theme = self.request.query_params.get("theme", None)
 
         if astronomy_show:
-            astronomy_show_ids = self._params_to_ints(astronomy_show)
+            astronomy_show_ids = params_to_ints(
+                astronomy_show, "astronomy_show"
+            )
             queryset = ShowSession.objects.filter(
                 astronomy_show__id__in=astronomy_show_ids
             )
 
         if planetarium_dome:
-            planetarium_dome_ids = self._params_to_ints(planetarium_dome)
+            planetarium_dome_ids = params_to_ints(
+                planetarium_dome, "planetarium_dome"
+            )
             queryset = ShowSession.objects.filter(
                 planetarium_dome__id__in=planetarium_dome_ids
             )
 
-        if self.action == "list":
-            capacity = F("planetarium_dome__rows") * F(
-                "planetarium_dome__seats_in_row"
+        if theme:
+            queryset = filter_by_themes(
+                queryset,
+                params_to_ints(theme, "theme"),
+                show_field="astronomy_show_id",
             )
-            queryset = queryset.select_related(
-                "astronomy_show", "planetarium_dome"
-            ).annotate(tickets_left=capacity - Count("tickets"))
 
-        if self.action == "retrieve":
-            queryset = queryset.select_related(
-                "astronomy_show", "planetarium_dome"
+        if self.action == "best_seats":
+            # The seat finder reads the dome's grid.
+            queryset = queryset.select_related("planetarium_dome")
+
+        if self.action == "list":
+            capacity = F("planetarium_dome__capacity")
+            queryset = queryset.annotate(
+                tickets_left=capacity - Count("tickets")
             )
 
-        return queryset.distinct()
+        return self.optimize_queryset(queryset.distinct())
 
     def get_serializer_class(self) -> Type[ShowSessionSerializer]:
         if self.action == "list":
@@ -109,29 +276,141 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
             return ShowSessionDetailSerializer
         return self.serializer_class
 
+    @extend_schema(parameters=SESSION_FILTER_PARAMETERS)
+    def list(self, request, *args, **kwargs) -> Response:
+        return super().list(request, *args, **kwargs)
+
     @extend_schema(
         parameters=[
-            OpenApiParameter(
-                name="astronomy_show",
-                type={"type": "list", "items": {"type": "number"}},
-                description="Filter by astronomy show id (ex. astronomy_show=1,2,3)",
-            ),
-            OpenApiParameter(
-                name="planetarium_dome",
-                type={"type": "list", "items": {"type": "number"}},
-                description="Filter by planetarium dome id (ex. planetarium_dome=1,2,3)",
-            ),
+            SessionCalendarQuerySerializer,
+            *SESSION_FILTER_PARAMETERS,
+        ],
+        responses=SessionCalendarSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False)
+    def calendar(self, request) -> Response:
+        """Sessions from start to end grouped by day or week, with totals"""
+        query = SessionCalendarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end, bucket = (
+            query.validated_data[key] for key in ("start", "end", "bucket")
+        )
+        filters = [
+            request.query_params.get(name, "")
+            for name in ("astronomy_show", "planetarium_dome", "theme")
         ]
+
+        def build_calendar() -> list:
+            buckets = session_calendar(self.get_queryset(), start, end, bucket)
+            return SessionCalendarSerializer(buckets, many=True).data
+
+        data, etag = cache.cached_with_etag(
+            cache.SESSION_CALENDAR,
+            ":".join([bucket, str(start), str(end), *filters]),
+            build_calendar,
+            parts=calendar_days(start, end),
+            if_none_match=request.headers.get("If-None-Match"),
+        )
+        return cached_response(data, etag)
+
+    @extend_schema(
+        methods=["GET"],
+        parameters=[BestSeatsQuerySerializer],
+        responses=BestSeatsSerializer,
     )
-    def list(self, request, *args, **kwargs) -> Response:
-        return super().list(request, *args, **kwargs)
+    @extend_schema(
+        methods=["POST"],
+        request=BestSeatsQuerySerializer,
+        responses=BestSeatsSerializer,
+    )
+    @action(
+        methods=["GET", "POST"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
+    def best_seats(self, request, pk=None) -> Response:
+        """Best free seats for a party, POST also holds them for you"""
+        # A plain dict, so that missing booleans get their defaults.
+        data = (
+            request.query_params.dict()
+            if request.method == "GET"
+            else request.data
+        )
+        query = BestSeatsQuerySerializer(data=data)
+        query.is_valid(raise_exception=True)
+        show_session = self.get_object()
+
+        if request.method == "POST":
+            seats, held_until = seating.find_and_hold(
+                show_session, request.user, **query.validated_data
+            )
+        else:
+            seats = seating.best_seats(
+                show_session, user=request.user, **query.validated_data
+            )
+            held_until = None
+        return Response(
+            BestSeatsSerializer(
+                {
+                    "show_session": show_session.pk,
+                    "seats": [
+                        {"row": row, "seat": seat} for row, seat in seats
+                    ],
+                    "held_until": held_until,
+                }
+            ).data
+        )
 
+    @extend_schema(responses=SessionPricesSerializer)
+    @action(methods=["GET"], detail=True)
+    def prices(self, request, pk=None) -> Response:
+        """Current ticket price of every row of the session"""
+        return Response(SessionPricesSerializer(quote(self.get_object())).data)
 
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        request=WaitlistEntrySerializer, responses=WaitlistEntrySerializer
+    )
+    @action(
+        methods=["GET", "POST", "DELETE"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
+    def waitlist(self, request, pk=None) -> Response:
+        """Join, check or leave the waitlist of a sold-out session"""
+        show_session = self.get_object()
+        entry = WaitlistEntry.objects.filter(
+            show_session=show_session, user=request.user
+        ).first()
+
+        if request.method == "DELETE":
+            if entry is not None:
+                entry.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if entry is not None:
+            return Response(WaitlistEntrySerializer(entry).data)
+        if request.method == "GET":
+            raise NotFound("You are not on the waitlist of this session.")
+
+        serializer = WaitlistEntrySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if free_seats(show_session) >= serializer.validated_data.get(
+            "seats", 1
+        ):
+            raise ValidationError(
+                "This session has free seats, buy tickets instead."
+            )
+        serializer.save(show_session=show_session, user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class PlanetariumDomeViewSet(SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = PlanetariumDome.objects.all()
     serializer_class = PlanetariumDomeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    def get_queryset(self) -> QuerySet:
+        return self.optimize_queryset(self.queryset)
+
     def get_serializer_class(self) -> Type[PlanetariumDomeSerializer]:
         if self.action == "retrieve":
             return PlanetariumDomeDetailSerializer
@@ -158,60 +437,101 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(
+    IdempotentCreateMixin,
+    ValuesListMixin,
+    SparseFieldsViewSetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    values_serializer_class = TicketValuesSerializer
     permission_classes = (CanCreateAndRead,)
 
     def get_queryset(self) -> QuerySet:
         queryset = Ticket.objects.filter(reservation__user=self.request.user)
 
-        if self.action in ["list", "retrieve"]:
-            queryset = queryset.select_related(
-                "show_session__astronomy_show", "reservation"
-            )
-
-        return queryset
+        return self.optimize_queryset(queryset)
 
     def get_serializer_class(self) -> Type[TicketSerializer]:
         if self.action == "retrieve":
             return TicketDetailSerializer
         if self.action == "list":
             return TicketListSerializer
+        if self.action == "create":
+            return TicketPurchaseSerializer
         return self.serializer_class
 
     def perform_create(self, serializer) -> None:
-        reservation = Reservation.objects.create(user=self.request.user)
-        serializer.save(reservation=reservation)
+        reservation = create_reservation(
+            self.request.user, [serializer.validated_data]
+        )
+        serializer.instance = reservation.created_tickets[0]
+        metrics.inc("reservations_created_total")
+        metrics.inc("tickets_sold_total")
 
 
-class OrderPagination(PageNumberPagination):
+class OrderPagination(EstimatedCountPagination):
     page_size = 3
     page_size_query_param = "page_size"
     max_page_size = 100
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
+class ReservationViewSet(
+    IdempotentCreateMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet
+):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     pagination_class = OrderPagination
-    permission_classes = (CanCreateAndRead,)
+    permission_classes = (CanCreateReadAndCancel,)
 
     def get_serializer_class(self) -> Type[ReservationSerializer]:
-        if self.action == "list":
+        if self.action in ("list", "cancel"):
             return ReservationListSerializer
         if self.action == "retrieve":
             return ReservationDetailSerializer
         return self.serializer_class
 
     def get_queryset(self) -> QuerySet:
-        queryset = Reservation.objects.filter(user=self.request.user)
-        if self.action in ["list", "retrieve"]:
-            queryset = queryset.prefetch_related(
-                "tickets__show_session__astronomy_show",
-                "tickets__show_session__planetarium_dome",
-            )
-        return queryset
+        # Meta.ordering does not apply to aggregating queries.
+        queryset = (
+            Reservation.objects.filter(user=self.request.user)
+            .annotate(total_price=Sum("tickets__price"))
+            .order_by("-created_at")
+        )
+        return self.optimize_queryset(queryset)
 
     def perform_create(self, serializer) -> None:
         serializer.save(user=self.request.user)
+        metrics.inc("reservations_created_total")
+        metrics.inc(
+            "tickets_sold_total", len(serializer.validated_data["tickets"])
+        )
+
+    def perform_destroy(self, instance) -> None:
+        serializer = ReservationCancelSerializer(
+            data={}, context={"reservation": instance}
+        )
+        serializer.is_valid(raise_exception=True)
+        cancel_reservation(instance)
+
+    @extend_schema(
+        request=ReservationCancelSerializer,
+        responses={200: ReservationListSerializer, 204: None},
+    )
+    @action(methods=["POST"], detail=True)
+    def cancel(self, request, pk=None) -> Response:
+        """Cancel some or all tickets of a reservation"""
+        reservation = self.get_object()
+        serializer = ReservationCancelSerializer(
+            data=request.data, context={"reservation": reservation}
+        )
+        serializer.is_valid(raise_exception=True)
+        cancel_reservation(
+            reservation, serializer.validated_data.get("tickets")
+        )
+
+        reservation = self.get_queryset().filter(pk=reservation.pk).first()
+        if reservation is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(ReservationListSerializer(reservation).data)
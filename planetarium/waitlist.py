@@ -0,0 +1,133 @@
+"""
+Waitlists of sold-out sessions.
+
+Users join the waitlist of a session without free seats and are served
+in the order they joined. ``dispatch``, run periodically by the
+``dispatch_waitlist`` command, offers seats freed by cancelled tickets
+or expired offers to the first waiting users of each session. Offered
+seats are held for the user (see planetarium.seating) for
+``WAITLIST_OFFER_SECONDS``, so nobody else can buy them; after that an
+entry whose user bought no tickets is dropped and the seats go to the
+next users.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from planetarium.models import ShowSession, Ticket, WaitlistEntry
+from planetarium.seating import hold_seats
+from planetarium_api import metrics
+
+
+def count_per_session(queryset: QuerySet, aggregate) -> Coalesce:
+    return Coalesce(
+        Subquery(
+            queryset.filter(show_session=OuterRef("pk"))
+            .order_by()
+            .values("show_session")
+            .annotate(total=aggregate)
+            .values("total")
+        ),
+        0,
+    )
+
+
+def with_free_seats(sessions: QuerySet) -> QuerySet:
+    """Annotate ``free_seats``: seats neither sold nor offered."""
+    capacity = F("planetarium_dome__capacity")
+    return sessions.annotate(
+        free_seats=capacity
+        - count_per_session(Ticket.objects.all(), Count("id"))
+        - count_per_session(
+            WaitlistEntry.objects.filter(offered_at__isnull=False),
+            Sum("seats"),
+        )
+    )
+
+
+def free_seats(show_session: ShowSession) -> int:
+    return (
+        with_free_seats(ShowSession.objects.filter(pk=show_session.pk))
+        .values_list("free_seats", flat=True)
+        .get()
+    )
+
+
+def offer_seats(show_session: ShowSession, now) -> int:
+    """
+    Offer the free seats of a session to its first waiting users, holding
+    the best of them for each user until the offer expires.
+    """
+    free = show_session.free_seats
+    offered = []
+    entries = WaitlistEntry.objects.filter(
+        show_session=show_session, offered_at__isnull=True
+    ).select_related("user")
+    # Every entry waits for one seat at least.
+    for entry in entries[:free]:
+        if entry.seats > free:
+            break
+        try:
+            places, _ = hold_seats(
+                show_session,
+                entry.user,
+                settings.WAITLIST_OFFER_SECONDS,
+                party_size=entry.seats,
+                together=False,
+            )
+        except IntegrityError:
+            # Someone just held one of the seats, retried on the next run.
+            break
+        if not places:
+            # The rest of the free seats are held by other users.
+            break
+        offered.append(entry.id)
+        free -= entry.seats
+    if offered:
+        WaitlistEntry.objects.filter(pk__in=offered).update(offered_at=now)
+    return len(offered)
+
+
+def dispatch(batch_size: int = 100) -> int:
+    """
+    Offer free seats of up to ``batch_size`` upcoming sessions with
+    waiting users, and return the number of offers made.
+    """
+    now = timezone.now()
+    WaitlistEntry.objects.filter(
+        offered_at__lte=now
+        - timedelta(seconds=settings.WAITLIST_OFFER_SECONDS)
+    ).delete()
+    # Users who bought tickets for the session since joining its waitlist
+    # are not waiting anymore.
+    bought = Ticket.objects.filter(
+        show_session=OuterRef("show_session"),
+        reservation__user=OuterRef("user"),
+        reservation__created_at__gte=OuterRef("created_at"),
+    )
+    WaitlistEntry.objects.filter(Exists(bought)).delete()
+
+    waiting = WaitlistEntry.objects.filter(
+        show_session=OuterRef("pk"), offered_at__isnull=True
+    )
+    sessions = (
+        with_free_seats(ShowSession.objects.filter(show_time__gt=now))
+        .filter(Exists(waiting), free_seats__gt=0)
+        .order_by("show_time", "pk")[:batch_size]
+    )
+    offers = sum(offer_seats(session, now) for session in sessions)
+    metrics.inc("waitlist_offers_total", offers)
+    return offers
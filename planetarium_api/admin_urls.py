@@ -0,0 +1,13 @@
+"""
+Admin URLs, imported lazily by ``planetarium_api.urls``.
+
+The admin app is installed with ``SimpleAdminConfig``, so the admin.py
+modules are discovered here on the first admin request instead of
+during ``django.setup()``.
+"""
+
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns, app_name, _ = admin.site.urls
@@ -0,0 +1,161 @@
+"""
+Several GET requests to the planetarium API in one round trip.
+
+``POST /api/batch/`` with ``{"requests": [{"path": "/api/planetarium/..."}]}``
+authenticates the caller once, runs every sub-request against the
+planetarium views as that user and returns their statuses and bodies in
+order. Sub-requests run concurrently on a shared thread pool, except
+inside a transaction (``ATOMIC_REQUESTS``, tests), whose uncommitted
+data other database connections would not see.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger("django.request")
+
+BATCH_NAMESPACE = "planetarium"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    # Created on first use, so gunicorn workers do not inherit the
+    # master's threads.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BATCH_WORKERS,
+                thread_name_prefix="batch",
+            )
+    return _executor
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET"], default="GET")
+    path = serializers.CharField()
+
+    def validate_path(self, value: str) -> str:
+        try:
+            match = resolve(urlsplit(value).path)
+        except Resolver404:
+            match = None
+        if match is None or match.namespace != BATCH_NAMESPACE:
+            raise serializers.ValidationError(
+                "Only planetarium API paths can be batched."
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value: list) -> list:
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        return value
+
+
+class SubResponseSerializer(serializers.Serializer):
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    body = serializers.JSONField()
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = SubResponseSerializer(many=True)
+
+
+def sub_request(request, path: str) -> HttpRequest:
+    """A GET of ``path`` carrying the headers and user of ``request``."""
+    url = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = url.path
+    sub.META = copy(request.META)
+    sub.META.update(
+        REQUEST_METHOD="GET",
+        PATH_INFO=url.path,
+        QUERY_STRING=url.query,
+        CONTENT_LENGTH="0",
+    )
+    sub.META.pop("CONTENT_TYPE", None)
+    sub.META.pop("wsgi.input", None)
+    sub.GET = QueryDict(url.query)
+    # Picked up by DRF's Request instead of authenticating again.
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def run(request, path: str) -> dict:
+    sub = sub_request(request, path)
+    try:
+        match = resolve(sub.path_info)
+        sub.resolver_match = match
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Resolver404:
+        return {"path": path, "status": 404, "body": {"detail": "Not found."}}
+    except Exception:
+        logger.exception("Batched request failed: %s", path)
+        return {
+            "path": path,
+            "status": 500,
+            "body": {"detail": "Server error."},
+        }
+    return {
+        "path": path,
+        "status": response.status_code,
+        "body": getattr(response, "data", None),
+    }
+
+
+def run_in_worker(request, path: str) -> dict:
+    # Like a request of its own, the thread's connection is closed when
+    # it is broken or older than CONN_MAX_AGE.
+    close_old_connections()
+    try:
+        return run(request, path)
+    finally:
+        close_old_connections()
+
+
+class BatchView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(request=BatchSerializer, responses=BatchResponseSerializer)
+    def post(self, request) -> Response:
+        """Run up to BATCH_MAX_REQUESTS planetarium GET requests at once"""
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        paths = [
+            item["path"] for item in serializer.validated_data["requests"]
+        ]
+
+        if len(paths) == 1 or connection.in_atomic_block:
+            responses = [run(request, path) for path in paths]
+        else:
+            responses = list(
+                get_executor().map(
+                    lambda path: run_in_worker(request, path), paths
+                )
+            )
+        return Response({"responses": responses})
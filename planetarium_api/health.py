@@ -0,0 +1,122 @@
+"""
+Liveness and readiness checks.
+
+``/healthz`` only tells that the worker process answers. ``/readyz``
+checks the database (a real round trip, not just a connection handle)
+and the cache; its result is kept for ``HEALTH_CHECK_CACHE_SECONDS`` so
+frequent orchestrator probes stay cheap.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import OperationalError
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from planetarium_api import metrics
+
+logger = logging.getLogger("planetarium.health")
+
+CACHE_PROBE_KEY = "health:probe"
+
+# (checked at, status code, payload) of the last /readyz run.
+_last_readiness = None
+
+
+def probe_database(alias: str = "default") -> float:
+    """Run ``SELECT 1`` on ``alias`` and return the latency in seconds."""
+    start = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return time.perf_counter() - start
+
+
+def wait_for_database(
+    alias: str = "default",
+    timeout: float = 60,
+    delay: float = 0.1,
+    max_delay: float = 5,
+    on_retry=None,
+) -> float:
+    """
+    Probe ``alias`` until it answers, doubling the delay between attempts.
+
+    Returns the latency of the successful probe, re-raises the last
+    error once ``timeout`` seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return probe_database(alias)
+        except OperationalError as error:
+            connections[alias].close()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            delay = min(delay, max_delay, remaining)
+            if on_retry:
+                on_retry(error, delay)
+            time.sleep(delay)
+            delay *= 2
+
+
+def probe_cache() -> float:
+    """Write and read back a key, return the latency in seconds."""
+    start = time.perf_counter()
+    cache.set(CACHE_PROBE_KEY, start, timeout=10)
+    if cache.get(CACHE_PROBE_KEY) != start:
+        raise RuntimeError("Cache did not return the written value.")
+    return time.perf_counter() - start
+
+
+def run_check(name: str, probe) -> dict:
+    """
+    Result of a readiness probe. Errors are logged, not returned: the
+    endpoint is public and driver messages name hosts and users.
+    """
+    start = time.perf_counter()
+    try:
+        latency = probe()
+    except Exception:  # any backend specific failure
+        logger.exception("Readiness check %s failed", name)
+        latency, ok = time.perf_counter() - start, False
+    else:
+        ok = True
+    return {"check": name, "ok": ok, "latency_ms": round(latency * 1000, 2)}
+
+
+@never_cache
+@require_safe
+def healthz(request) -> JsonResponse:
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+@require_safe
+def readyz(request) -> JsonResponse:
+    global _last_readiness
+
+    now = time.monotonic()
+    if (
+        _last_readiness is None
+        or now - _last_readiness[0] >= settings.HEALTH_CHECK_CACHE_SECONDS
+    ):
+        checks = {
+            "database": run_check("database", probe_database),
+            "cache": run_check("cache", probe_cache),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        payload = {"status": "ok" if ready else "unavailable", **checks}
+        _last_readiness = (now, 200 if ready else 503, payload)
+        metrics.inc("cache_requests_total", cache="readyz", result="miss")
+    else:
+        metrics.inc("cache_requests_total", cache="readyz", result="hit")
+
+    _, status_code, payload = _last_readiness
+    return JsonResponse(payload, status=status_code)
@@ -0,0 +1,315 @@
+"""
+In-process metrics exported in the Prometheus text format at /metrics.
+
+Every thread writes to its own shard, so recording a value never takes a
+lock; shards are only summed when the metrics are collected. With
+``METRICS_DIR`` set, each worker process periodically writes its totals
+to ``METRICS_DIR/metrics-<pid>-<boot id>.json`` and /metrics sums the
+files of all pre-forked workers. When a worker exits, the gunicorn
+master folds its file into ``metrics-retired.json``, so counters keep
+growing across worker restarts and a reused pid never overwrites them.
+
+/metrics is served to staff users and to scrapers sending
+``Authorization: Bearer <METRICS_TOKEN>``.
+"""
+
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.views import exception_handler as drf_exception_handler
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        "Request latency by route, method and status.",
+        LATENCY_BUCKETS,
+    ),
+    "db_query_duration_seconds": (
+        "Duration of single SQL queries by route.",
+        LATENCY_BUCKETS,
+    ),
+    "db_queries_per_request": (
+        "SQL queries executed per request by route.",
+        COUNT_BUCKETS,
+    ),
+}
+
+COUNTERS = {
+    "cache_requests_total": "Cache lookups by cache and result (hit/miss).",
+    "reservations_created_total": "Reservations created.",
+    "tickets_sold_total": "Tickets created by reservations.",
+    "seat_conflicts_total": "Ticket purchases rejected for a taken seat.",
+    "tickets_cancelled_total": "Tickets cancelled, releasing their seats.",
+    "throttle_rejections_total": "Requests rejected by throttling by view.",
+    "waitlist_offers_total": "Waitlist entries offered released seats.",
+}
+
+SEAT_MODELS = ("planetarium.Ticket", "planetarium.Reservation")
+RETIRED_FILE = "metrics-retired.json"
+
+
+def label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._local = threading.local()
+        # id(shard) -> (owner thread, shard). Written without a lock, a
+        # dict item assignment is atomic.
+        self._shards = {}
+        # Totals of shards whose thread has exited.
+        self._retired = self._new_shard()
+        self._collect_lock = threading.Lock()
+        self._last_flush = 0.0
+        # (pid, file name) of this process, renewed in forked workers.
+        self._file = None
+
+    @staticmethod
+    def _new_shard() -> dict:
+        return {"counters": {}, "histograms": {}}
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard()
+            self._shards[id(shard)] = (threading.current_thread(), shard)
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        counters = self._shard()["counters"]
+        key = (name, label_key(labels))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        histograms = self._shard()["histograms"]
+        key = (name, label_key(labels))
+        histogram = histograms.get(key)
+        if histogram is None:
+            buckets = HISTOGRAMS[name][1]
+            # Per bucket counts, then sum and count.
+            histogram = histograms[key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(HISTOGRAMS[name][1]):
+            if value <= bound:
+                histogram[index] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    @staticmethod
+    def _merge(target: dict, shard: dict) -> None:
+        for key, value in list(shard["counters"].items()):
+            target["counters"][key] = target["counters"].get(key, 0) + value
+        for key, values in list(shard["histograms"].items()):
+            merged = target["histograms"].setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                merged[index] += value
+
+    def snapshot(self) -> dict:
+        """Totals of this process."""
+        with self._collect_lock:
+            for shard_id, (thread, shard) in list(self._shards.items()):
+                if not thread.is_alive():
+                    self._merge(self._retired, shard)
+                    del self._shards[shard_id]
+            totals = self._new_shard()
+            self._merge(totals, self._retired)
+            for _, shard in list(self._shards.values()):
+                self._merge(totals, shard)
+        return totals
+
+    def flush(self, force: bool = False) -> None:
+        """Write this process' totals to ``METRICS_DIR``, if configured."""
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if (
+            not force
+            and now - self._last_flush < settings.METRICS_FLUSH_SECONDS
+        ):
+            return
+        self._last_flush = now
+
+        pid = os.getpid()
+        if self._file is None or self._file[0] != pid:
+            self._file = (pid, f"metrics-{pid}-{uuid.uuid4().hex}.json")
+        write_totals(
+            Path(settings.METRICS_DIR) / self._file[1], self.snapshot()
+        )
+
+    def collect(self) -> dict:
+        """Totals of all worker processes."""
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+
+        self.flush(force=True)
+        return read_totals(Path(settings.METRICS_DIR).glob("metrics-*.json"))
+
+    def start_flusher(self) -> None:
+        """Flush every ``METRICS_FLUSH_SECONDS``, also while idle."""
+
+        def run() -> None:
+            while True:
+                time.sleep(settings.METRICS_FLUSH_SECONDS)
+                self.flush(force=True)
+
+        if settings.METRICS_DIR:
+            threading.Thread(
+                target=run, name="metrics-flusher", daemon=True
+            ).start()
+
+
+def write_totals(path: Path, totals: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {
+                kind: [
+                    [name, labels, value]
+                    for (name, labels), value in values.items()
+                ]
+                for kind, values in totals.items()
+            }
+        )
+    )
+    os.replace(tmp_path, path)
+
+
+def read_totals(paths) -> dict:
+    totals = Registry._new_shard()
+    for path in paths:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        Registry._merge(
+            totals,
+            {
+                kind: {
+                    (name, tuple(map(tuple, labels))): value
+                    for name, labels, value in data[kind]
+                }
+                for kind in ("counters", "histograms")
+            },
+        )
+    return totals
+
+
+def retire_worker(pid: int) -> None:
+    """Fold the files of the exited worker ``pid`` into the retired totals."""
+    if not settings.METRICS_DIR:
+        return
+    directory = Path(settings.METRICS_DIR)
+    paths = list(directory.glob(f"metrics-{pid}-*.json"))
+    if not paths:
+        return
+    retired = directory / RETIRED_FILE
+    write_totals(retired, read_totals([retired, *paths]))
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+
+
+def format_labels(labels: tuple, **extra) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", r"\\").replace('"', r"\""))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(totals: dict) -> str:
+    lines = []
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (metric, labels), value in sorted(totals["counters"].items()):
+            if metric == name:
+                lines.append(
+                    f"{name}{format_labels(labels)} {format_value(value)}"
+                )
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, labels), values in sorted(totals["histograms"].items()):
+            if metric != name:
+                continue
+            for bound, count in zip(buckets, values):
+                lines.append(
+                    f"{name}_bucket"
+                    f"{format_labels(labels, le=format_value(bound))} {count}"
+                )
+            lines.append(
+                f'{name}_bucket{format_labels(labels, le="+Inf")} {values[-1]}'
+            )
+            lines.append(
+                f"{name}_sum{format_labels(labels)} {format_value(values[-2])}"
+            )
+            lines.append(f"{name}_count{format_labels(labels)} {values[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def can_scrape(request) -> bool:
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(
+        authorization.encode(), f"Bearer {token}".encode()
+    )
+
+
+@never_cache
+@require_safe
+def metrics_view(request) -> HttpResponse:
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def has_code(codes, code: str) -> bool:
+    if isinstance(codes, dict):
+        return any(has_code(value, code) for value in codes.values())
+    if isinstance(codes, list):
+        return any(has_code(value, code) for value in codes)
+    return codes == code
+
+
+def exception_handler(exc, context):
+    """DRF's exception handler, counting throttling and seat conflicts."""
+    view = context.get("view")
+    if isinstance(exc, Throttled):
+        inc("throttle_rejections_total", view=type(view).__name__)
+    elif isinstance(exc, ValidationError) and has_code(
+        exc.get_codes(), "unique"
+    ):
+        queryset = getattr(view, "queryset", None)
+        if queryset is not None and queryset.model._meta.label in SEAT_MODELS:
+            inc("seat_conflicts_total")
+    return drf_exception_handler(exc, context)
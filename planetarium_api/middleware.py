@@ -0,0 +1,301 @@
+import gzip
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from planetarium_api import metrics
+
+logger = logging.getLogger("planetarium.profiling")
+
+
+def view_name(view_func) -> str:
+    """``ViewSet.action`` for DRF viewsets, the function name otherwise."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", repr(view_func))
+    return view_class.__name__
+
+
+class RequestProfile:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.view = None
+        self.view_started = None
+        self.view_time = None
+        self.render_time = 0.0
+        self.queries = []
+        self.view_db_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries.append((sql, duration))
+            if self.view_started is not None and self.view_time is None:
+                self.view_db_time += duration
+
+    def end_view(self) -> None:
+        if self.view_started is not None and self.view_time is None:
+            self.view_time = time.perf_counter() - self.view_started
+
+    def summary(self, request, response) -> dict:
+        total = time.perf_counter() - self.started
+        db_time = sum(duration for _, duration in self.queries)
+        statements = Counter(sql for sql, _ in self.queries)
+        duplicates = {
+            sql: count for sql, count in statements.items() if count > 1
+        }
+        view_time = self.view_time or 0.0
+        app_time = max(view_time - self.view_db_time, 0)
+        return {
+            "method": request.method,
+            "path": request.path,
+            "view": self.view,
+            "status": response.status_code,
+            "queries": len(self.queries),
+            "duplicate_queries": sum(duplicates.values()) - len(duplicates),
+            "top_duplicate": (
+                max(duplicates, key=duplicates.get)[:200]
+                if duplicates
+                else None
+            ),
+            "db_ms": round(db_time * 1000, 2),
+            # Time in the view outside the database: authentication,
+            # permissions, validation, business logic and serialization
+            # together, not timed one by one.
+            "app_ms": round(app_time * 1000, 2),
+            "render_ms": round(self.render_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "response_bytes": (
+                None if response.streaming else len(response.content)
+            ),
+        }
+
+
+class RequestProfilingMiddleware:
+    """
+    Sampled per-request SQL and serialization profile.
+
+    A ``REQUEST_PROFILING_SAMPLE_RATE`` share of requests records query
+    count, database time, repeated statements (N+1 patterns), time spent
+    in the view outside the database and rendering, and response size per
+    view action. The
+    result is sent as a ``Server-Timing`` header and logged as JSON to
+    the ``planetarium.profiling`` logger. With a rate of 0 the middleware
+    removes itself from the stack.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.sample_rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        request.request_profile = profile
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(profile.record_query)
+                )
+            response = self.get_response(request)
+        profile.end_view()
+
+        summary = profile.summary(request, response)
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"',
+                f'app;dur={summary["app_ms"]};desc="view outside the db"',
+                f'render;dur={summary["render_ms"]}',
+                f'total;dur={summary["total_ms"]}',
+            )
+        )
+        logger.info(json.dumps(summary), extra={"profile": summary})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "request_profile", None)
+        if profile is not None:
+            profile.view = view_name(view_func)
+            actions = getattr(view_func, "actions", None)
+            if actions:
+                action = actions.get(request.method.lower(), "")
+                profile.view = f"{profile.view}.{action}"
+            profile.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, "request_profile", None)
+        if profile is not None:
+            profile.end_view()
+            start = time.perf_counter()
+            response.render()
+            profile.render_time = time.perf_counter() - start
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record request latency and SQL queries per route in the metrics
+    registry. Routes are URL names, e.g. ``planetarium:showsession-list``.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        durations = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                durations.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        route = (match.view_name if match else None) or "unmatched"
+        metrics.observe(
+            "http_request_duration_seconds",
+            elapsed,
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        metrics.observe("db_queries_per_request", len(durations), route=route)
+        for duration in durations:
+            metrics.observe("db_query_duration_seconds", duration, route=route)
+        metrics.registry.flush()
+        return response
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/vnd.oai.openapi",
+    "application/yaml",
+    "text/",
+)
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(
+        content, compresslevel=settings.GZIP_COMPRESSLEVEL, mtime=0
+    )
+
+
+def accepted_encoding(header: str):
+    """Preferred supported coding of an Accept-Encoding header, if any."""
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    weights = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        if params.strip().startswith("q="):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                continue
+        if coding == "*":
+            for name in supported:
+                weights.setdefault(name, weight)
+        elif coding in supported:
+            weights[coding] = weight
+    # Ties go to the first, smaller, coding of ``supported``.
+    best = max(supported, key=lambda name: weights.get(name, 0))
+    return best if weights.get(best, 0) > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least ``COMPRESSION_MIN_SIZE`` bytes with
+    brotli (if installed) or gzip, as the client accepts.
+
+    Responses with an ETag are compressed once: the compressed bytes are
+    cached under the ETag, encoding and content type for
+    ``COMPRESSION_CACHE_TIMEOUT`` seconds.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(
+                COMPRESSIBLE_TYPES
+            )
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        encoding = accepted_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            # Other clients may get it compressed.
+            patch_vary_headers(response, ("Accept-Encoding",))
+            return response
+
+        etag = response.get("ETag")
+        if etag:
+            variant = hashlib.md5(
+                f"{response['Content-Type']}:{etag}".encode()
+            ).hexdigest()
+            key = f"compressed:{encoding}:{variant}"
+            content = cache.get(key)
+            if content is None:
+                metrics.inc(
+                    "cache_requests_total", cache="compression", result="miss"
+                )
+                content = compress(response.content, encoding)
+                cache.set(key, content, settings.COMPRESSION_CACHE_TIMEOUT)
+            else:
+                metrics.inc(
+                    "cache_requests_total", cache="compression", result="hit"
+                )
+        else:
+            content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            # Sent as is to every client, nothing varies.
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # The compressed bytes differ, the representation does not.
+        if etag and not etag.startswith("W/"):
+            response["ETag"] = f"W/{etag}"
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+        return response
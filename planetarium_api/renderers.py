@@ -0,0 +1,73 @@
+"""
+JSON renderer and parser backed by orjson when it is installed.
+
+Output is the same as DRF's ``JSONRenderer``: values orjson cannot encode
+the way DRF does (datetimes, Decimals, UUIDs, lazy strings...) go through
+DRF's ``JSONEncoder``, and anything orjson rejects altogether, indented
+output (browsable API) or ASCII-only output falls back to the stdlib.
+The one difference: orjson writes NaN and infinities as null.
+"""
+
+import io
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    # Datetimes are passed to the encoder, which formats them like DRF
+    # (milliseconds, "Z" for UTC) instead of orjson's RFC 3339 form.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except TypeError:
+            # Integers over 64 bits, unsupported types...
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape U+2028 and U+2029 like DRF, see JSONRenderer.render().
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8").lower()
+        if orjson is None or encoding not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson rejects a few documents the stdlib parser accepts, such
+            # as integers over 64 bits; let the stdlib parser decide.
+            return super().parse(
+                io.BytesIO(content), media_type, parser_context
+            )
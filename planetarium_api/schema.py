@@ -0,0 +1,120 @@
+"""
+OpenAPI schema views.
+
+``manage.py generate_schema`` writes the schema once, at build or
+startup time, to ``OPENAPI_SCHEMA_FILE`` (versioned by
+``SPECTACULAR_SETTINGS["VERSION"]``). ``schema_view`` serves that file
+from memory with an ETag; live generation by drf_spectacular is only a
+fallback for development (DEBUG on and no file generated yet).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.http import condition, require_safe
+
+from planetarium_api import metrics
+
+JSON_CONTENT_TYPE = "application/vnd.oai.openapi+json"
+YAML_CONTENT_TYPE = "application/vnd.oai.openapi"
+
+# (file path, format) -> (content, etag), filled once per process.
+_documents = {}
+
+
+def lazy_view(view_path: str, **initkwargs):
+    """
+    Import a class-based view on its first request.
+
+    Keeps modules that are only needed by rarely used pages, like the
+    schema generator, out of the worker boot and the API request path.
+    """
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+live_schema_view = lazy_view("drf_spectacular.views.SpectacularAPIView")
+
+
+def schema_file() -> Path:
+    return Path(settings.OPENAPI_SCHEMA_FILE)
+
+
+def generate_schema() -> bytes:
+    """Run the drf_spectacular generator and render the schema as JSON."""
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def load_schema(schema_format: str = "json") -> tuple | None:
+    """Return ``(content, etag)`` of the generated schema, or None."""
+    path = schema_file()
+    key = (str(path), schema_format)
+    if key in _documents:
+        metrics.inc("cache_requests_total", cache="schema", result="hit")
+    else:
+        metrics.inc("cache_requests_total", cache="schema", result="miss")
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if schema_format == "yaml":
+            from drf_spectacular.renderers import OpenApiYamlRenderer
+
+            content = OpenApiYamlRenderer().render(
+                json.loads(content), renderer_context={}
+            )
+        etag = hashlib.sha256(content).hexdigest()[:32]
+        _documents[key] = (content, etag)
+    return _documents[key]
+
+
+def requested_format(request) -> str:
+    if request.GET.get("format") in ("yaml", "openapi"):
+        return "yaml"
+    if "yaml" in request.headers.get("Accept", ""):
+        return "yaml"
+    return "json"
+
+
+def schema_etag(request, *args, **kwargs) -> str | None:
+    document = load_schema(requested_format(request))
+    return document[1] if document else None
+
+
+@require_safe
+@condition(etag_func=schema_etag)
+def schema_view(request, *args, **kwargs) -> HttpResponse:
+    schema_format = requested_format(request)
+    document = load_schema(schema_format)
+
+    if document is None:
+        if settings.DEBUG:
+            return live_schema_view(request, *args, **kwargs)
+        return JsonResponse(
+            {"detail": "OpenAPI schema has not been generated."},
+            status=503,
+        )
+
+    content_type = (
+        YAML_CONTENT_TYPE if schema_format == "yaml" else JSON_CONTENT_TYPE
+    )
+    response = HttpResponse(document[0], content_type=content_type)
+    patch_vary_headers(response, ["Accept"])
+    return response
@@ -0,0 +1,84 @@
+"""
+Pre-fork application server for production.
+
+``manage.py serve`` runs ``planetarium_api.wsgi`` (or ``.asgi`` with
+uvicorn workers) under gunicorn. The application is loaded and warmed up
+in the master before forking, so workers share its imported modules
+and start answering without paying the import cost themselves. SIGHUP
+to the master gracefully replaces the workers, but they fork from the
+preloaded application: deploying new code needs a full restart of the
+master (``--reload`` turns preloading off for development).
+
+Workers flush their metrics to ``METRICS_DIR`` from a background thread
+and once more when they exit; the master then retires their file.
+"""
+
+import os
+
+from django.db import connections
+from django.urls import get_resolver
+from gunicorn.app.base import BaseApplication
+
+from planetarium_api import metrics
+
+ASGI_WORKER_CLASS = "uvicorn.workers.UvicornWorker"
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects container affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_workers(asgi: bool = False) -> int:
+    """
+    ``WEB_CONCURRENCY`` if set, else gunicorn's 2 * cores + 1 for sync
+    workers and one event loop per core for ASGI workers.
+    """
+    if os.environ.get("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    cores = available_cores()
+    return cores if asgi else 2 * cores + 1
+
+
+def post_fork(server, worker) -> None:
+    metrics.registry.start_flusher()
+
+
+def worker_exit(server, worker) -> None:
+    metrics.registry.flush(force=True)
+
+
+def child_exit(server, worker) -> None:
+    metrics.retire_worker(worker.pid)
+
+
+def warm_up() -> None:
+    """Import the urlconf and its views before the workers are forked."""
+    get_resolver().reverse_dict
+    # Connections must not be shared with the forked workers.
+    connections.close_all()
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict, asgi: bool = False) -> None:
+        self.options = options
+        self.asgi = asgi
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set("post_fork", post_fork)
+        self.cfg.set("worker_exit", worker_exit)
+        self.cfg.set("child_exit", child_exit)
+
+    def load(self):
+        if self.asgi:
+            from planetarium_api.asgi import application
+        else:
+            from planetarium_api.wsgi import application
+
+        warm_up()
+        return application
@@ -0,0 +1,29 @@
+"""
+Settings profiles for planetarium_api.
+
+The profile is picked by the ``DJANGO_PROFILE`` environment variable:
+``prod`` (default) builds the lean middleware stack and app list, ``dev``
+adds debug_toolbar and DEBUG, ``test`` runs against SQLite.
+A profile module can also be selected directly, e.g.
+``DJANGO_SETTINGS_MODULE=planetarium_api.settings.prod``.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ("dev", "test", "prod")
+
+PROFILE = os.environ.get("DJANGO_PROFILE", "prod")
+
+if PROFILE == "prod":
+    from planetarium_api.settings.prod import *  # noqa: F401,F403
+elif PROFILE == "dev":
+    from planetarium_api.settings.dev import *  # noqa: F401,F403
+elif PROFILE == "test":
+    from planetarium_api.settings.test import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f"Unknown DJANGO_PROFILE {PROFILE!r}, "
+        f"expected one of: {', '.join(PROFILES)}"
+    )
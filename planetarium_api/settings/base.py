@@ -0,0 +1,248 @@
+import os
+from datetime import timedelta
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+# Settings shared by every profile. SECRET_KEY, DEBUG, ALLOWED_HOSTS and
+# DATABASES are defined by the profile modules (dev, test, prod).
+# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin.apps.SimpleAdminConfig",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "planetarium",
+    "user",
+    "rest_framework",
+    "rest_framework.authtoken",
+    "drf_spectacular",
+]
+
+MIDDLEWARE = [
+    "planetarium_api.middleware.MetricsMiddleware",
+    "planetarium_api.middleware.RequestProfilingMiddleware",
+    "planetarium_api.middleware.CompressionMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "planetarium_api.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "planetarium_api.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+
+
+def postgres_database() -> dict:
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "HOST": os.environ["POSTGRES_HOST"],
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ["POSTGRES_USER"],
+        "PASSWORD": os.environ["POSTGRES_PASSWORD"],
+    }
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "Europe/Kiev"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = "static/"
+
+MEDIA_ROOT = BASE_DIR / "media"
+MEDIA_URL = "/media/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+AUTH_USER_MODEL = "user.User"
+
+
+REST_FRAMEWORK = {
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "planetarium_api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "planetarium_api.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    ),
+    "DEFAULT_THROTTLE_CLASSES": [
+        "rest_framework.throttling.AnonRateThrottle",
+        "rest_framework.throttling.UserRateThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "100/hour"},
+    "EXCEPTION_HANDLER": "planetarium_api.metrics.exception_handler",
+}
+
+SPECTACULAR_SETTINGS = {
+    "TITLE": "Planetarium API",
+    "DESCRIPTION": "Manage your tickets to planetarium, read about new events",
+    "VERSION": "1.0.0",
+    "SERVE_INCLUDE_SCHEMA": False,
+    "SWAGGER_UI_SETTINGS": {
+        "deepLinking": True,
+        "defaultModelRendering": "model",
+        "defaultModelsExpandDepth": 2,
+        "defaultModelExpandDepth": 2,
+    },
+}
+
+# Written by `manage.py generate_schema`, served by /api/schema/.
+OPENAPI_SCHEMA_FILE = (
+    BASE_DIR / "openapi" / f"schema-{SPECTACULAR_SETTINGS['VERSION']}.json"
+)
+
+# Share of requests profiled by RequestProfilingMiddleware, 0 disables it.
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.environ.get("REQUEST_PROFILING_SAMPLE_RATE", "0")
+)
+
+# Shared by pre-forked workers to aggregate /metrics, None keeps the
+# metrics of each process to itself.
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+
+# How often a worker writes its metrics to METRICS_DIR.
+METRICS_FLUSH_SECONDS = 5
+
+# Bearer token of Prometheus scrapers. Without it /metrics is only served
+# to staff users.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "planetarium.profiling": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "planetarium.health": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+# /api/batch/: sub-requests per batch and threads running them.
+BATCH_MAX_REQUESTS = 10
+BATCH_WORKERS = 4
+
+# Responses smaller than this are sent uncompressed.
+COMPRESSION_MIN_SIZE = 1024
+GZIP_COMPRESSLEVEL = 6
+BROTLI_QUALITY = 5
+# Lifetime of the compressed bytes of responses with an ETag.
+COMPRESSION_CACHE_TIMEOUT = 300
+
+# Lifetime of cached API results (planetarium.cache). They are also dropped
+# when the underlying data changes, but only in the worker making the change
+# unless CACHES points to a shared backend.
+PLANETARIUM_CACHE_TIMEOUT = 60
+
+# Seconds before a worker rebuilds its in-memory show search index even
+# without a change notification (non-PostgreSQL databases only).
+SEARCH_INDEX_TTL = 300
+
+# Idempotency-Key of reservation and ticket POSTs: how long the first
+# response is replayed, and how long a running request holds its key.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Price of rows without a PriceTier, and (occupancy, price multiplier)
+# steps applied once a session is that full, see planetarium.pricing.
+DEFAULT_TICKET_PRICE = "10.00"
+PRICE_SURGE = ((0.7, "1.10"), (0.9, "1.25"))
+
+# How long seats found by /best_seats/ are held for the user.
+SEAT_HOLD_SECONDS = 5 * 60
+
+# How long seats offered to a waitlisted user are held for them.
+WAITLIST_OFFER_SECONDS = 15 * 60
+
+# Paginated lists and admin change lists with more rows than this get an
+# approximate count: the planner's estimate, or an exact count reused for
+# ESTIMATED_COUNT_TTL seconds (planetarium.pagination).
+ESTIMATED_COUNT_THRESHOLD = 100_000
+ESTIMATED_COUNT_TTL = 5 * 60
+
+# How long a /readyz result is reused by a worker.
+HEALTH_CHECK_CACHE_SECONDS = 5
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+}
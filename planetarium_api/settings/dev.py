@@ -0,0 +1,30 @@
+import os
+
+from planetarium_api.settings.base import *  # noqa: F401,F403
+from planetarium_api.settings.base import (
+    INSTALLED_APPS,
+    MIDDLEWARE,
+    postgres_database,
+)
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ["SECRET_KEY"]
+
+DEBUG = os.environ.get("DJANGO_DEBUG", "1") == "1"
+
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
+
+INSTALLED_APPS = INSTALLED_APPS + ["debug_toolbar"]
+
+# The toolbar has to see the response after CommonMiddleware, as before.
+MIDDLEWARE = MIDDLEWARE.copy()
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("django.middleware.common.CommonMiddleware") + 1,
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+)
+
+DATABASES = {"default": postgres_database()}
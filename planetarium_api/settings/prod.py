@@ -0,0 +1,20 @@
+import os
+
+from planetarium_api.settings.base import *  # noqa: F401,F403
+from planetarium_api.settings.base import REST_FRAMEWORK, postgres_database
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ["SECRET_KEY"]
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "127.0.0.1").split(",")
+
+# Only JSON is rendered in production, the browsable API templates are
+# never loaded.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("planetarium_api.renderers.ORJSONRenderer",),
+}
+
+DATABASES = {"default": postgres_database()}
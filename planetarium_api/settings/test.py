@@ -0,0 +1,19 @@
+import os
+
+from planetarium_api.settings.base import *  # noqa: F401,F403
+from planetarium_api.settings.base import BASE_DIR
+
+SECRET_KEY = os.environ.get("SECRET_KEY", "planetarium-test-secret-key")
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["testserver", "127.0.0.1", "localhost"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    }
+}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -0,0 +1,563 @@
+import gzip
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+from planetarium_api import health, metrics, schema, server
+from planetarium_api.middleware import (
+    CompressionMiddleware,
+    accepted_encoding,
+    compress,
+)
+from planetarium_api.renderers import ORJSONParser, ORJSONRenderer
+
+SCHEMA_URL = reverse("schema")
+BATCH_URL = reverse("batch")
+
+
+class SchemaViewTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.schema_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.schema_dir)
+        self.addCleanup(schema._documents.clear)
+        self.settings_override = override_settings(
+            OPENAPI_SCHEMA_FILE=self.schema_dir / "schema-1.0.0.json"
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_schema_served_from_generated_file(self) -> None:
+        call_command("generate_schema", stdout=StringIO())
+
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.oai.openapi+json"
+        )
+        self.assertIn(b"/api/planetarium/show_sessions/", response.content)
+        self.assertIn("ETag", response)
+
+    def test_schema_not_modified_for_matching_etag(self) -> None:
+        call_command("generate_schema", stdout=StringIO())
+        etag = self.client.get(SCHEMA_URL)["ETag"]
+
+        response = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_schema_yaml_format(self) -> None:
+        call_command("generate_schema", stdout=StringIO())
+
+        response = self.client.get(SCHEMA_URL, {"format": "yaml"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.content.startswith(b"openapi: 3.0.3"))
+
+    def test_missing_schema_unavailable(self) -> None:
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    @override_settings(DEBUG=True)
+    def test_missing_schema_generated_live_in_debug(self) -> None:
+        response = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("drf_spectacular.views", sys.modules)
+
+
+class LazyUrlsTests(TestCase):
+    def test_admin_urls_reversible(self) -> None:
+        response = self.client.get(reverse("admin:login"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("planetarium.admin", sys.modules)
+
+
+class HealthTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        health._last_readiness = None
+        self.addCleanup(setattr, health, "_last_readiness", None)
+
+    def test_healthz(self) -> None:
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("healthz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readyz_checks_database_and_cache(self) -> None:
+        response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()["database"]["ok"])
+        self.assertTrue(response.json()["cache"]["ok"])
+
+    def test_readyz_result_reused(self) -> None:
+        self.client.get(reverse("readyz"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_readyz_unavailable_when_database_fails(self) -> None:
+        with mock.patch.object(
+            health, "probe_database", side_effect=OperationalError("down")
+        ):
+            with self.assertLogs("planetarium.health", "ERROR"):
+                response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        database = response.json()["database"]
+        self.assertEqual(sorted(database), ["check", "latency_ms", "ok"])
+        self.assertFalse(database["ok"])
+
+
+class WaitForDbTests(TestCase):
+    @mock.patch("planetarium_api.health.time.sleep")
+    def test_retries_with_exponential_backoff(self, sleep) -> None:
+        with mock.patch.object(
+            health,
+            "probe_database",
+            side_effect=[OperationalError, OperationalError, 0.001],
+        ):
+            call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [0.1, 0.2]
+        )
+
+    @mock.patch("planetarium_api.health.time.sleep")
+    def test_gives_up_after_timeout(self, sleep) -> None:
+        with mock.patch.object(
+            health, "probe_database", side_effect=OperationalError
+        ):
+            with self.assertRaises(CommandError):
+                call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+
+class ServerTests(SimpleTestCase):
+    @mock.patch.dict("os.environ", {"WEB_CONCURRENCY": ""})
+    @mock.patch.object(server, "available_cores", return_value=4)
+    def test_default_workers_from_cores(self, available_cores) -> None:
+        self.assertEqual(server.default_workers(), 9)
+        self.assertEqual(server.default_workers(asgi=True), 4)
+
+    @mock.patch.dict("os.environ", {"WEB_CONCURRENCY": "3"})
+    def test_default_workers_from_environment(self) -> None:
+        self.assertEqual(server.default_workers(), 3)
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+        show = AstronomyShow.objects.create(
+            title="Show", description="Description"
+        )
+        dome = PlanetariumDome.objects.create(
+            name="Dome", rows=5, seats_in_row=10
+        )
+        ShowSession.objects.create(
+            astronomy_show=show,
+            planetarium_dome=dome,
+            show_time=datetime(2026, 1, 1, 18, tzinfo=timezone.utc),
+        )
+
+    def test_disabled_without_sample_rate(self) -> None:
+        response = self.client.get(reverse("planetarium:showsession-list"))
+
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0)
+    def test_profiles_view_action(self) -> None:
+        client = APIClient()
+        client.force_authenticate(user=get_user_model().objects.get())
+
+        with self.assertLogs("planetarium.profiling") as logs:
+            response = client.get(reverse("planetarium:showsession-list"))
+
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("app;dur=", response["Server-Timing"])
+        profile = logs.records[0].profile
+        self.assertEqual(profile["view"], "ShowSessionViewSet.list")
+        self.assertEqual(profile["queries"], 1)
+        self.assertEqual(profile["response_bytes"], len(response.content))
+
+
+class MetricsTests(TestCase):
+    def counter(self, name: str, **labels) -> float:
+        key = (name, metrics.label_key(labels))
+        return metrics.registry.collect()["counters"].get(key, 0)
+
+    def test_threads_record_without_losing_updates(self) -> None:
+        registry = metrics.Registry()
+
+        def record() -> None:
+            for _ in range(1000):
+                registry.inc("tickets_sold_total")
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals = registry.snapshot()["counters"]
+        self.assertEqual(totals[("tickets_sold_total", ())], 4000)
+
+    def test_workers_aggregated_through_metrics_dir(self) -> None:
+        metrics_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        (metrics_dir / "metrics-1.json").write_text(
+            '{"counters": [["reservations_created_total", [], 5]], '
+            '"histograms": []}'
+        )
+
+        with override_settings(METRICS_DIR=metrics_dir):
+            before = self.counter("reservations_created_total")
+            metrics.inc("reservations_created_total")
+            after = self.counter("reservations_created_total")
+
+        self.assertEqual(after, before + 1)
+        self.assertGreaterEqual(after, 6)
+
+    def test_worker_files_retired(self) -> None:
+        metrics_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        for name in ("metrics-7-a.json", "metrics-7-b.json"):
+            (metrics_dir / name).write_text(
+                '{"counters": [["tickets_sold_total", [], 2]], '
+                '"histograms": []}'
+            )
+
+        with override_settings(METRICS_DIR=metrics_dir):
+            metrics.retire_worker(7)
+            metrics.retire_worker(7)
+            retired = metrics.read_totals(metrics_dir.glob("metrics-*.json"))
+
+        self.assertEqual(
+            sorted(path.name for path in metrics_dir.iterdir()),
+            [metrics.RETIRED_FILE],
+        )
+        self.assertEqual(retired["counters"][("tickets_sold_total", ())], 4)
+
+    def test_metrics_endpoint_restricted(self) -> None:
+        anonymous = self.client.get(reverse("metrics"))
+        with override_settings(METRICS_TOKEN="scraper-token"):
+            wrong = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer other"
+            )
+            scraper = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer scraper-token"
+            )
+
+        self.assertEqual(anonymous.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(wrong.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(scraper.status_code, status.HTTP_200_OK)
+
+    def test_metrics_endpoint(self) -> None:
+        self.client.force_login(
+            get_user_model().objects.create_user(
+                email="admin@user.com", password="testpass123", is_staff=True
+            )
+        )
+        self.client.get(reverse("healthz"))
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(
+            response,
+            'http_request_duration_seconds_bucket{method="GET",'
+            'route="healthz",status="200",le="+Inf"}',
+        )
+        self.assertContains(response, "# TYPE seat_conflicts_total counter")
+
+    def test_seat_conflict_counted(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass123"
+        )
+        session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(
+                title="Show", description="Description"
+            ),
+            planetarium_dome=PlanetariumDome.objects.create(
+                name="Dome", rows=5, seats_in_row=10
+            ),
+            show_time=datetime(2026, 1, 1, 18, tzinfo=timezone.utc),
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=session,
+            reservation=Reservation.objects.create(user=user),
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        before = self.counter("seat_conflicts_total")
+
+        response = client.post(
+            reverse("planetarium:reservation-list"),
+            {"tickets": [{"row": 1, "seat": 1, "show_session": session.id}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.counter("seat_conflicts_total"), before + 1)
+
+
+class ORJSONTests(SimpleTestCase):
+    def test_renders_like_drf(self) -> None:
+        data = {
+            "time": datetime(
+                2024, 1, 1, 20, 0, 0, 123456, tzinfo=timezone.utc
+            ),
+            "date": datetime(2024, 1, 1).date(),
+            "price": Decimal("12.50"),
+            "id": uuid.UUID(int=1),
+            "text": "Сузір'я \u2028 ✨",
+            "nested": [{"a": None, "b": True, 1: 2.5}],
+        }
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_falls_back_for_indent_and_big_integers(self) -> None:
+        for data, media_type in (
+            ({"a": [1, 2]}, "application/json; indent=4"),
+            ({"a": 2**70}, None),
+        ):
+            self.assertEqual(
+                ORJSONRenderer().render(data, media_type),
+                JSONRenderer().render(data, media_type),
+            )
+
+    def test_parses_like_drf(self) -> None:
+        for content in (b'{"a": [1, "\\u00e9"]}', b'{"a": %d}' % 2**70):
+            self.assertEqual(
+                ORJSONParser().parse(BytesIO(content)),
+                JSONParser().parse(BytesIO(content)),
+            )
+
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"a": '))
+
+
+class CompressionTests(SimpleTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.body = b'{"sessions": [%s]}' % b",".join([b'"Andromeda"'] * 500)
+        self.calls = 0
+
+    def get(self, accept_encoding: str = "gzip", etag: str = None):
+        def view(request) -> HttpResponse:
+            self.calls += 1
+            response = HttpResponse(self.body, content_type="application/json")
+            if etag:
+                response["ETag"] = etag
+            return response
+
+        request = RequestFactory().get(
+            "/", HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(view)(request)
+
+    def test_large_responses_are_gzipped(self) -> None:
+        response = self.get("br;q=0.5, gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(
+            response["Content-Length"], str(len(response.content))
+        )
+
+    def test_uncompressed_without_accepted_encoding(self) -> None:
+        for accept_encoding in ("", "identity", "gzip;q=0, *;q=0"):
+            response = self.get(accept_encoding)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, self.body)
+
+        self.body = b'{"small": true}'
+        self.assertFalse(self.get().has_header("Content-Encoding"))
+
+    def test_compressed_bytes_cached_by_etag(self) -> None:
+        with mock.patch(
+            "planetarium_api.middleware.compress", wraps=compress
+        ) as compress_mock:
+            first = self.get(etag='"v1"')
+            second = self.get(etag='"v1"')
+            self.get(etag='"v2"')
+
+        self.assertEqual(compress_mock.call_count, 2)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], 'W/"v1"')
+
+    def test_incompressible_response_left_as_is(self) -> None:
+        self.body = random.Random(0).randbytes(2048)
+
+        response = self.get(etag='"v1"')
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+        self.assertEqual(response["ETag"], '"v1"')
+        self.assertEqual(response.content, self.body)
+
+    def test_accepted_encoding(self) -> None:
+        self.assertEqual(accepted_encoding("deflate, gzip;q=0.8"), "gzip")
+        self.assertEqual(accepted_encoding("*"), accepted_encoding("br, gzip"))
+        self.assertIsNone(accepted_encoding("gzip;q=0"))
+        self.assertIsNone(accepted_encoding("deflate"))
+
+
+def sample_kiosk_data() -> tuple:
+    show = AstronomyShow.objects.create(title="Moon", description="Phases")
+    dome = PlanetariumDome.objects.create(name="Dome", rows=5, seats_in_row=5)
+    session = ShowSession.objects.create(
+        astronomy_show=show,
+        planetarium_dome=dome,
+        show_time=datetime(2024, 1, 1, 20, tzinfo=timezone.utc),
+    )
+    return show, dome, session
+
+
+def kiosk_paths(show, dome, session) -> list:
+    return [
+        reverse("planetarium:astronomyshow-detail", args=[show.id]),
+        reverse("planetarium:showsession-list") + f"?astronomy_show={show.id}",
+        reverse("planetarium:planetariumdome-detail", args=[dome.id]),
+        reverse("planetarium:showsession-detail", args=[session.id]),
+    ]
+
+
+class BatchTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def batch(self, *paths):
+        return self.client.post(
+            BATCH_URL,
+            {"requests": [{"path": path} for path in paths]},
+            format="json",
+        )
+
+    def test_batch_returns_responses_in_order(self) -> None:
+        paths = kiosk_paths(*sample_kiosk_data())
+
+        response = self.batch(*paths)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for path, result in zip(paths, response.data["responses"]):
+            self.assertEqual(result["path"], path)
+            self.assertEqual(result["status"], status.HTTP_200_OK)
+            self.assertEqual(result["body"], self.client.get(path).data)
+
+    def test_sub_request_errors_are_reported(self) -> None:
+        response = self.batch(
+            reverse("planetarium:astronomyshow-detail", args=[404])
+        )
+
+        self.assertEqual(
+            response.data["responses"][0]["status"], status.HTTP_404_NOT_FOUND
+        )
+
+    def test_only_planetarium_paths_are_batched(self) -> None:
+        for paths in (
+            [reverse("user:manage")],
+            ["/nowhere/"],
+            [],
+            [reverse("planetarium:showtheme-list")] * 11,
+        ):
+            response = self.batch(*paths)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_requires_authentication(self) -> None:
+        self.client.force_authenticate(user=None)
+
+        response = self.batch(reverse("planetarium:showtheme-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConcurrentBatchTests(TransactionTestCase):
+    def test_token_checked_once_for_concurrent_requests(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="test@user.com", password="testpass123"
+        )
+        paths = kiosk_paths(*sample_kiosk_data())
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+        with mock.patch.object(
+            JWTAuthentication,
+            "authenticate",
+            autospec=True,
+            side_effect=JWTAuthentication.authenticate,
+        ) as authenticate:
+            response = client.post(
+                BATCH_URL,
+                {"requests": [{"path": path} for path in paths]},
+                format="json",
+            )
+
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(
+            [result["status"] for result in response.data["responses"]],
+            [status.HTTP_200_OK] * len(paths),
+        )
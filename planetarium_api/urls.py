@@ -1,31 +1,42 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-    SpectacularRedocView,
-)
+
+from planetarium_api.batch import BatchView
+from planetarium_api.health import healthz, readyz
+from planetarium_api.metrics import metrics_view
+from planetarium_api.schema import lazy_view, schema_view
 
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
+    path("metrics", metrics_view, name="metrics"),
+    # The admin urlconf (and the admin.py modules it discovers) is
+    # imported on the first request under admin/, not at startup.
+    path("admin/", ("planetarium_api.admin_urls", "admin", "admin")),
     path(
         "api/planetarium/",
         include("planetarium.urls", namespace="planetarium"),
     ),
-    path("__debug__/", include("debug_toolbar.urls")),
     path("api/user/", include("user.urls", namespace="user")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/batch/", BatchView.as_view(), name="batch"),
+    path("api/schema/", schema_view, name="schema"),
     path(
         "api/schema/swagger/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
+        lazy_view(
+            "drf_spectacular.views.SpectacularSwaggerView", url_name="schema"
+        ),
         name="swagger",
     ),
     path(
         "api/schema/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
+        lazy_view(
+            "drf_spectacular.views.SpectacularRedocView", url_name="schema"
+        ),
         name="redoc",
     ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))